@@ -1,6 +1,14 @@
 from collections import defaultdict
 from typing import Any, NamedTuple
 
+from nornir_validate.formatting import (
+    DeclaredFormatters,
+    FormatterSpec,
+    RowSchema,
+    make_int,
+    split_output,
+)
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -10,82 +18,56 @@ class OsKeys(NamedTuple):
     key2: str
 
 
+# Precomputed keys per OS type, the engine passes the resolved OS type (ios, nxos, asa, wlc, panos or viptela) so is a straight lookup
+OS_KEYS = {
+    "ios": OsKeys("xxx", "xxx"),
+    "nxos": OsKeys("yyy", "yyy"),
+    "asa": OsKeys("zzz", "zzz"),
+    "wlc": OsKeys("yyx", "yyy"),
+    "panos": OsKeys("yyz", "yyy"),
+    "viptela": OsKeys("yyy", "yyy"),
+}
+
+
 def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
+    Raises:
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
         OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    if "ios" in os_type:
-        return OsKeys("xxx", "xxx")
-    elif "nxos" in os_type:
-        return OsKeys("yyy", "yyy")
-    elif "asa" in os_type:
-        return OsKeys("zzz", "zzz")
-    elif "wlc" in os_type:
-        return OsKeys("yyx", "yyy")
-    elif "panos" in os_type:
-        return OsKeys("yyz", "yyy")
-    elif "viptela" in os_type:
-        return OsKeys("yyy", "yyy")
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
+# DECLARED: Sub-features formatted by compiled declarations, the hand-written formatters are the fallback
 # ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
-
-    Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
-    Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
-    Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
-    """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+# Sub-features that are NTC rows grouped by one field can be declared rather than hand-written (feature_builder.py -sp)
+SUB_FEAT_B_SCHEMA = RowSchema({"yyy": "int_or_str"})
+FORMATTERS = DeclaredFormatters(
+    {
+        "sub_feat_b": FormatterSpec(
+            key="xxx",
+            fields={"y": "yyy", "z": {"ios": "zzz", "nxos": "zzy"}, "state": "state"},
+            schema=SUB_FEAT_B_SCHEMA,
+            actual_only=("state",),
+        ),
+    }
+)
 
 
 # ----------------------------------------------------------------------------
 # DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
-
-    Args:
-        input_data (str): The data to be converted to an integer
-    Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
-    """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
-
-
 def format_sub_feat_a(
-    val_file: bool,
-    key: OsKeys,
-    output: list[dict[str, str]],  # noqa: ARG001
+    val_file: bool, key: OsKeys, output: list[dict[str, str]]
 ) -> dict[str, Any]:
     """Format SUB_FEAT_A into the data structure.
 
@@ -96,14 +78,13 @@ def format_sub_feat_a(
     Returns:
         dict[str, Any]: {x: {y: z}}
     """
-    result: dict[str, dict[str, str]] = defaultdict(dict)
-    # If is val_file
-    if val_file:
-        key.key1  # noqa: B018
-        pass
-    # If is actual_state
-    if not val_file:
-        pass
+    result: dict[str, dict[str, int | str]] = defaultdict(dict)
+    for each_item in output:
+        # Numbers are converted with make_int (int if all digits, otherwise left as a string)
+        result[each_item[key.key1]]["y"] = make_int(each_item[key.key2])
+        # If is actual_state
+        if not val_file:
+            pass
     return dict(result)
 
 
@@ -120,14 +101,18 @@ def format_actual_state(
 
     Args:
         val_file (bool): Used to identify if creating validation file as sometimes need implicit values
-        os_type (str): The different Nornir platforms which are OS type of the device
+        os_type (str): The OS type resolved from the device platforms (ios, nxos, asa, wlc, panos or viptela)
         sub_feature (str): The name of the sub-feature that is being validated
         output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str/int from raw) command output from the device
     Returns:
         dict[str, Any]: Returns cmd output formatted into the data structure of actual state or validation file
     """
+    # DECLARED: Sub-features with a formatter declaration, any others use the hand-written formatters
+    formatted = FORMATTERS.format(val_file, os_type, sub_feature, output)
+    if formatted is not None:
+        return formatted
     key = _set_keys(os_type)
-    raw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    raw_output, ntc_output = split_output(os_type, sub_feature, output)
 
     ### SUB_FEAT_A: {x: {y: z}}
     if sub_feature == "sub_feat_a":
@@ -0,0 +1,451 @@
+"""Benchmarks each phase of nornir_validate offline using the tests/os_test_files fixtures (no devices needed).
+
+uv run scripts/benchmark.py                                   Benchmarks all OS types and features, prints a table
+uv run scripts/benchmark.py -o cisco_nxos -f route_table      Only benchmarks the matching OS types and/or features
+uv run scripts/benchmark.py -j bench.json                     Also saves the results as JSON (machine-readable)
+uv run scripts/benchmark.py -b bench.json -m 20               Compares against a saved run, exits 1 if any median is >20% slower
+uv run scripts/benchmark.py -d scale_test_files               Benchmarks the files created by generate_scale_fixtures.py
+uv run scripts/benchmark.py -i 200                            Exits 1 if the median 'import nornir_validate' is >200ms
+
+Per OS type and feature the phases are timed separately:
+- render: Rendering the desired state from the validation file (task_desired_state/task_template)
+- format: Formatting the command output into the actual state (actual_state_engine)
+- compare: Comparing desired and actual state (generate_validate_report)
+The cumulative time of 'import nornir_validate' (from '-X importtime' in a new interpreter each round) is also benchmarked.
+The first 'warmup' rounds (imports, template compilation, caches) are discarded and the garbage collector is disabled
+whilst timing. Command output and state are deep copied before each round (not timed) so no round sees another's changes.
+"""
+
+import argparse
+import copy
+import gc
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any
+
+import yaml
+from nornir import InitNornir
+from nornir.core.filter import F
+from nornir.core.task import Result, Task
+from nornir.plugins.runners import SerialRunner
+from rich.console import Console
+from rich.table import Table
+
+from nornir_validate.compliance_report import generate_validate_report
+from nornir_validate.core import (
+    actual_state_engine,
+    remove_cmds_desired_state,
+    task_desired_state,
+    task_template,
+)
+
+# Get project root (reliable regardless of where script is run)
+project_root = Path(__file__).parent.parent
+OS_TEST_FILES = os.path.join(project_root, "tests", "os_test_files")
+TEST_INVENTORY = os.path.join(project_root, "tests", "test_inventory")
+PHASES = ("render", "format", "compare")
+rc = Console()
+
+
+# ----------------------------------------------------------------------------
+# ARG: Filters, number of rounds and output files
+# ----------------------------------------------------------------------------
+def _create_parser() -> argparse.Namespace:
+    """Takes the input arguments used to filter the fixtures, set the rounds and the JSON and baseline files.
+
+    Returns:
+        argparse.Namespace: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-d", "--directory", default=OS_TEST_FILES, help="Directory of the test files"
+    )
+    parser.add_argument("-o", "--os_type", nargs="+", help="Only these OS types")
+    parser.add_argument("-f", "--feature", nargs="+", help="Only these features")
+    parser.add_argument("-r", "--repeat", type=int, default=20, help="Timed rounds")
+    parser.add_argument("-w", "--warmup", type=int, default=3, help="Discarded rounds")
+    parser.add_argument("-j", "--json", help="File to save the results to as JSON")
+    parser.add_argument("-b", "--baseline", help="JSON results to compare against")
+    parser.add_argument(
+        "-m",
+        "--max_regression",
+        type=float,
+        help="Exit 1 if any median is this percentage slower than the baseline",
+    )
+    parser.add_argument(
+        "-i",
+        "--import_budget",
+        type=float,
+        default=300,
+        help="Exit 1 if the median 'import nornir_validate' takes longer (ms)",
+    )
+    return parser.parse_args()
+
+
+# ----------------------------------------------------------------------------
+# FIXTURES: The per OS type and feature files used by the tests
+# ----------------------------------------------------------------------------
+def load_file(filename: str) -> Any:  # noqa: ANN401
+    """Loads a JSON or YAML fixture file."""
+    with open(filename) as input_data:
+        if filename.endswith(".json"):
+            return json.load(input_data)
+        return yaml.load(input_data, Loader=yaml.FullLoader)
+
+
+def get_fixtures(
+    directory: str, os_types: list[str] | None, features: list[str] | None
+) -> list[dict[str, Any]]:
+    """Gets the fixture files of every OS type and feature, optionally filtered.
+
+    Args:
+        directory (str): Directory of the test files, laid out the same as tests/os_test_files
+        os_types (list[str] | None): Only include these OS types (cisco_nxos, paloalto_panos, etc)
+        features (list[str] | None): Only include these features, such as route_table or system
+    Returns:
+        list[dict[str, Any]]: The OS type, feature, group of the test host and loaded validation, cmd_output and state files
+    """
+    fixtures = []
+    for each_os in sorted(os.scandir(directory), key=lambda x: x.name):
+        if not each_os.is_dir() or (os_types and each_os.name not in os_types):
+            continue
+        for each_feat in sorted(os.scandir(each_os.path), key=lambda x: x.name):
+            if not each_feat.is_dir() or (features and each_feat.name not in features):
+                continue
+            name = os.path.join(each_feat.path, f"{each_os.name}_{each_feat.name}")
+            fixtures.append(
+                {
+                    "os_type": each_os.name,
+                    "feature": each_feat.name,
+                    "group": each_os.name.split("_")[-1],
+                    "validations": load_file(f"{name}_validate.yml"),
+                    "cmd_output": load_file(f"{name}_cmd_output.json"),
+                    "desired_state": load_file(f"{name}_desired_state.yml"),
+                    "actual_state": load_file(f"{name}_actual_state.yml"),
+                }
+            )
+    return fixtures
+
+
+# ----------------------------------------------------------------------------
+# TIMER: Times a function over a number of rounds discarding the warmup rounds
+# ----------------------------------------------------------------------------
+def time_rounds(
+    func: Callable[..., Any],
+    repeat: int,
+    warmup: int,
+    setup: Callable[[], tuple[Any, ...]] | None = None,
+) -> list[float]:
+    """Times each round of the function with the garbage collector disabled.
+
+    Args:
+        func (Callable[..., Any]): The function to time
+        repeat (int): Number of timed rounds
+        warmup (int): Number of rounds run before the timed rounds that are discarded
+        setup (Callable[[], tuple[Any, ...]] | None): Untimed, returns the arguments for each round
+    Returns:
+        list[float]: Seconds taken by each timed round
+    """
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for each_round in range(warmup + repeat):
+            args = setup() if setup else ()
+            start = time.perf_counter()
+            func(*args)
+            duration = time.perf_counter() - start
+            if each_round >= warmup:
+                samples.append(duration)
+            # Collected outside of the timing so garbage from one round isn't charged to another
+            gc.collect()
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return samples
+
+
+def summarise(samples: list[float]) -> dict[str, float]:
+    """Gets the statistics of the timed rounds (in seconds), p95 is nearest-rank.
+
+    Args:
+        samples (list[float]): Seconds taken by each timed round
+    Returns:
+        dict[str, float]: {rounds, min, median, mean, stdev, p95, max}
+    """
+    ordered = sorted(samples)
+    return {
+        "rounds": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "stdev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "p95": ordered[max(1, math.ceil(0.95 * len(ordered))) - 1],
+        "max": ordered[-1],
+    }
+
+
+# ----------------------------------------------------------------------------
+# IMPORT: Cumulative time of 'import nornir_validate', heavy dependencies are imported lazily so should stay low
+# ----------------------------------------------------------------------------
+def import_time() -> float:
+    """Imports nornir_validate in a new interpreter (so nothing is already imported) and gets the time from '-X importtime'.
+
+    Returns:
+        float: Seconds taken to import nornir_validate including everything it imports
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import nornir_validate"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    # Each line is 'import time: self [us] | cumulative | imported package'
+    for line in output.splitlines()[1:]:
+        _, cumulative, module = line.split("|")
+        if module.strip() == "nornir_validate":
+            return int(cumulative) / 1_000_000
+    msg = "nornir_validate is not in the '-X importtime' output"
+    raise RuntimeError(msg)
+
+
+def bench_import(repeat: int, warmup: int) -> list[float]:
+    """Times the import over a number of rounds discarding the warmup rounds (first run compiles the bytecode).
+
+    Args:
+        repeat (int): Number of timed rounds
+        warmup (int): Number of rounds run before the timed rounds that are discarded
+    Returns:
+        list[float]: Seconds taken by each timed round
+    """
+    return [import_time() for _ in range(warmup + repeat)][warmup:]
+
+
+# ----------------------------------------------------------------------------
+# PHASES: Benchmarks of render (needs nornir for the host), format and compare
+# ----------------------------------------------------------------------------
+def task_bench_render(
+    task: Task, validations: dict[str, Any], repeat: int, warmup: int
+) -> Result:
+    """Times rendering the desired state within the nornir task so the runner overhead isn't included.
+
+    Args:
+        task (Task): The nornir task of the test host of the OS type
+        validations (dict[str, Any]): The validations to render (fixture validate.yml)
+        repeat (int): Number of timed rounds
+        warmup (int): Number of discarded rounds
+    Returns:
+        Result: Nornir result with the seconds taken by each timed round
+    """
+
+    def _render() -> None:
+        task.run(
+            task=task_desired_state,
+            validations=validations,
+            task_template=task_template,
+            severity_level=logging.DEBUG,
+        )
+
+    samples = time_rounds(_render, repeat, warmup)
+    # Stops the sub-task results of every round building up between fixtures
+    task.results.clear()
+    return Result(host=task.host, result=samples)
+
+
+def bench_fixture(
+    nr: Any,  # noqa: ANN401
+    fixture: dict[str, Any],
+    repeat: int,
+    warmup: int,
+) -> dict[str, list[float]]:
+    """Times each phase for the fixtures of an OS type feature.
+
+    Args:
+        nr (Any): Nornir object of the test inventory (serial runner)
+        fixture (dict[str, Any]): The OS type, feature and loaded fixture files
+        repeat (int): Number of timed rounds
+        warmup (int): Number of discarded rounds
+    Returns:
+        dict[str, list[float]]: {phase: seconds per timed round}
+    """
+    task_nr = nr.filter(F(has_parent_group=fixture["group"]))
+    output = task_nr.run(
+        task=task_bench_render,
+        validations=fixture["validations"],
+        repeat=repeat,
+        warmup=warmup,
+    )
+    host_result = output[f"{fixture['group']}_host"][0]
+    if host_result.failed:
+        msg = f"Rendering {fixture['os_type']} {fixture['feature']} failed: {host_result.exception}"
+        raise RuntimeError(msg)
+
+    desired_state = remove_cmds_desired_state(fixture["desired_state"])
+    return {
+        "render": host_result.result,
+        "format": time_rounds(
+            actual_state_engine,
+            repeat,
+            warmup,
+            lambda: (False, fixture["os_type"], copy.deepcopy(fixture["cmd_output"])),
+        ),
+        "compare": time_rounds(
+            generate_validate_report,
+            repeat,
+            warmup,
+            lambda: (
+                copy.deepcopy(desired_state),
+                copy.deepcopy(fixture["actual_state"]),
+                "hst",
+                None,
+            ),
+        ),
+    }
+
+
+# ----------------------------------------------------------------------------
+# OUTPUT: JSON results, table and comparison against a baseline
+# ----------------------------------------------------------------------------
+def run_metadata(repeat: int, warmup: int) -> dict[str, Any]:
+    """Details of the run so results from different machines or versions can be told apart."""
+    try:
+        nr_val_version = version("nornir-validate")
+    except PackageNotFoundError:
+        nr_val_version = "unknown"
+    return {
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "nornir_validate": nr_val_version,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "repeat": repeat,
+        "warmup": warmup,
+    }
+
+
+def compare_baseline(
+    results: list[dict[str, Any]], baseline_file: str
+) -> dict[str, float]:
+    """Gets the percentage change of each benchmark's median against the baseline, positive is slower.
+
+    Args:
+        results (list[dict[str, Any]]): Benchmarks of this run
+        baseline_file (str): JSON results of an earlier run
+    Returns:
+        dict[str, float]: {benchmark name: percentage change}, benchmarks not in the baseline are not included
+    """
+    baseline = {x["name"]: x for x in load_file(baseline_file)["benchmarks"]}
+    changes = {}
+    for each_bench in results:
+        old = baseline.get(each_bench["name"])
+        if old and old["median"] > 0:
+            changes[each_bench["name"]] = (
+                (each_bench["median"] - old["median"]) / old["median"] * 100
+            )
+    return changes
+
+
+def print_results(results: list[dict[str, Any]], changes: dict[str, float]) -> None:
+    """Prints a table of the benchmarks, times are in milliseconds."""
+    table = Table(title="nornir_validate benchmarks (ms)")
+    for column in ["benchmark", "median", "min", "p95", "stdev"]:
+        table.add_column(column, justify="left" if column == "benchmark" else "right")
+    if changes:
+        table.add_column("vs baseline", justify="right")
+    for each_bench in results:
+        row = [each_bench["name"]]
+        row.extend(
+            f"{each_bench[x] * 1000:.3f}" for x in ["median", "min", "p95", "stdev"]
+        )
+        if changes:
+            change = changes.get(each_bench["name"])
+            row.append("new" if change is None else f"{change:+.1f}%")
+        table.add_row(*row)
+    rc.print(table)
+
+
+# ----------------------------------------------------------------------------
+# ENGINE: Runs the benchmarks and outputs the results
+# ----------------------------------------------------------------------------
+def main() -> None:
+    args = _create_parser()
+    if args.repeat < 1 or args.warmup < 0:
+        rc.print("❌ The repeat must be at least 1 and warmup can't be negative")
+        sys.exit(2)
+    fixtures = get_fixtures(args.directory, args.os_type, args.feature)
+    if not fixtures:
+        rc.print("❌ No fixtures match the OS type and feature filters")
+        sys.exit(2)
+
+    nr = InitNornir(
+        inventory={
+            "plugin": "SimpleInventory",
+            "options": {
+                "host_file": os.path.join(TEST_INVENTORY, "hosts_validations.yml"),
+                "group_file": os.path.join(TEST_INVENTORY, "groups.yml"),
+            },
+        },
+        logging={"enabled": False},
+    ).with_runner(SerialRunner())
+
+    results = []
+    for fixture in fixtures:
+        samples = bench_fixture(nr, fixture, args.repeat, args.warmup)
+        for phase in PHASES:
+            results.append(
+                {
+                    "name": f"{fixture['os_type']}.{fixture['feature']}.{phase}",
+                    "os_type": fixture["os_type"],
+                    "feature": fixture["feature"],
+                    "phase": phase,
+                    **summarise(samples[phase]),
+                }
+            )
+
+    import_samples = summarise(bench_import(args.repeat, args.warmup))
+    results.append(
+        {
+            "name": "import.nornir_validate",
+            "os_type": "all",
+            "feature": "nornir_validate",
+            "phase": "import",
+            **import_samples,
+        }
+    )
+
+    changes = compare_baseline(results, args.baseline) if args.baseline else {}
+    print_results(results, changes)
+    if args.json:
+        output = {"meta": run_metadata(args.repeat, args.warmup), "benchmarks": results}
+        with open(args.json, "w") as json_file:
+            json.dump(output, json_file, indent=2)
+        rc.print(f"✅ Saved the results to '{args.json}'")
+    over_budget = import_samples["median"] * 1000 > args.import_budget
+    if over_budget:
+        rc.print(
+            f"❌ import nornir_validate takes {import_samples['median'] * 1000:.1f}ms, "
+            f"the budget is {args.import_budget:g}ms"
+        )
+    slower = {}
+    if args.max_regression is not None:
+        slower = {k: v for k, v in changes.items() if v > args.max_regression}
+        for name, change in slower.items():
+            rc.print(f"❌ {name} is {change:.1f}% slower than the baseline")
+    if slower or over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""Creates a precompiled '<name>_index.json' alongside every index file, these are loaded instead of parsing the YAML.
+
+uv run compile_index_files.py
+
+A precompiled file holds the sha256 of the YAML it was built from, if the YAML is changed it is ignored until rerun.
+"""
+
+from nornir_validate.index_registry import compile_index_files
+
+for json_file in compile_index_files():
+    print(f"✅ Created the file '{json_file}'")
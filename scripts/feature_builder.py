@@ -6,10 +6,12 @@ uv run feature_builder.py -di <netmiko_ostype> <feature.subfeature> <ip or filen
 uv run feature_builder.py -vf <os_type> <feature>                                     Generates the validate file (saved to <os_type>_<feature>_desired_state.yml)
 uv run feature_builder.py -ds <os_type> <feature>                                     Creates the desired_state data structure (saved to <os_type>_<feature>_desired_state.yml)
 uv run feature_builder.py -as <os_type> <feature>                                     Creates the actual_state data structure (saved to <os_type>_<feature>_actual_state.yml)
+uv run feature_builder.py -sp <os_type> <feature.subfeature>                          Generates a FormatterSpec declaration from the cmd_output (prints to screen)
 """
 
 import argparse
 import ast
+import contextlib
 import copy
 import importlib
 import json
@@ -34,6 +36,9 @@ from rich.console import Console
 from rich.theme import Theme
 from ruamel.yaml import YAML
 
+from nornir_validate.index_registry import index_registry
+from nornir_validate.platform_profile import resolve_os_type
+
 # Get project root (reliable regardless of where script is run)
 project_root = Path(__file__).parent.parent
 # Module-level cache
@@ -92,6 +97,12 @@ def _create_parser() -> dict[str, None | list[str]]:
         nargs=2,
         help="Renders that validation input against the desired_state template to create the desired state test file",
     )
+    parser.add_argument(
+        "-sp",
+        "--create_spec",
+        nargs=2,
+        help="Generates a declaration of the sub-feature formatting (FormatterSpec) from the cmd output",
+    )
     return vars(parser.parse_args())
 
 
@@ -172,7 +183,7 @@ def _format_cmd_output(
         else:
             # Gets per-sub-feature actual state structured data from imported feature_templates (python imports)
             result = loaded_modules[feature].format_actual_state(
-                val_file, str(os_type), sub_feature, output
+                val_file, resolve_os_type(os_type), sub_feature, output
             )
             actual_state[feature][sub_feature] = result
     return dict(actual_state)
@@ -322,6 +333,8 @@ def create_feature(
     # Update all_index file if feat/subfeat not already in it
     all_index_file = files("nornir_validate").joinpath("index_files", f"all_index.yml")
     prt_all_msg = _update_index(feature, subfeat, Path(str(all_index_file)))
+    # Index files have changed so must be reloaded by the registry
+    index_registry.clear()
 
     # Print result of what directories and files have been touched
     if len(dir_created) != 0:
@@ -346,14 +359,8 @@ def create_commands(
         test_path (str): The path to the test directory, includes os_type and feature name
         tmpl_path (Path): The path to the templates folder, includes feature name
     """
-    # Loads data from YAML file
-    files("nornir_validate").joinpath("feature_templates", feature)
-    index_file = files("nornir_validate").joinpath(
-        "index_files", f"{os_type}_index.yml"
-    )
-    # index_file = os.path.join(os.path.split(test_path)[0], "subfeature_index.yml")
-    with index_file.open("r") as input_data:
-        index_data = yaml.load(input_data, Loader=yaml.FullLoader)
+    # Loads data from the index file (shared registry, only parsed once when rebuilding all test files)
+    index_data = index_registry.validations(os_type, example_data=True)
     # Render and format the data
     commands = _render_tmpl(os_type, feature, index_data, tmpl_path)
     cmds_file = os.path.join(test_path, f"{os_type}_{feature}_commands.yml")
@@ -432,6 +439,10 @@ def generate_cmd_data(
             struc_data = parse_output(os_type, command, cmd_output)
         except ParsingException:
             struc_data = cmd_output.splitlines()
+    # NXOS: Converts "| json" cmd output from string to JSON (same as nornir_validate.core)
+    if "json" in str(command):
+        with contextlib.suppress(Exception):
+            struc_data = [json.loads(cmd_output if valid_file else str(struc_data))]
     # JSON: Writes the data to json file
     cmd_output_data[feature][subfeat] = struc_data
     with open(cmd_output_file, "w", encoding="utf-8") as f:
@@ -538,6 +549,62 @@ def format_actual_state(os_type: str, feature: str, test_path: str) -> None:
         rc.print(print_msg)
 
 
+# ----------------------------------------------------------------------------
+# SPEC: Generate the declaration of a sub-feature's formatting
+# ----------------------------------------------------------------------------
+def _spec_source(subfeat: str, output: list[dict[str, Any]]) -> str:
+    """Builds the RowSchema and FormatterSpec source for NTC rows, the first field is the key and all the others fields.
+
+    Args:
+        subfeat (str): The name of the sub-feature the spec is for
+        output (list[dict[str, Any]]): The NTC rows of the sub-feature's command output
+    Returns:
+        str: Python source of the schema and the FormatterSpec entry to add to the feature's DeclaredFormatters
+    """
+    key, *fields = output[0]
+    # Any field that is numeric in one of the rows is made an integer
+    numeric = [
+        x for x in output[0] if any(str(row.get(x)).isdecimal() for row in output)
+    ]
+    schema_name = f"{subfeat.upper()}_SCHEMA"
+    lines = []
+    if numeric:
+        lines.append(f"{schema_name} = RowSchema(")
+        lines.append("    {")
+        lines.extend(f'        "{x}": "int_or_str",' for x in numeric)
+        lines.extend(["    }", ")", ""])
+    lines.extend([f'"{subfeat}": FormatterSpec(', f'    key="{key}",', "    fields={"])
+    lines.extend(f'        "{x}": "{x}",' for x in fields)
+    lines.append("    },")
+    if numeric:
+        lines.append(f"    schema={schema_name},")
+    lines.append("),")
+    return "\n".join(lines)
+
+
+def create_spec(os_type: str, feature: str, subfeat: str, test_path: str) -> None:
+    """Prints a FormatterSpec for the sub-feature generated from its cmd output, to be edited and added to the feature's FORMATTERS.
+
+    Args:
+        os_type (str): The network operating system type (based off netmiko platform)
+        feature (str): The name of the feature the sub-feature is in
+        subfeat (str): The name of the sub-feature to generate the declaration for
+        test_path (str): The path to the test directory, includes os_type and feature name
+    """
+    cmd_output_file = os.path.join(test_path, f"{os_type}_{feature}_cmd_output.json")
+    with open(cmd_output_file) as input_data:
+        output = json.load(input_data)[feature].get(subfeat) or []
+    # Only NTC rows can be declared, raw output needs a hand-written formatter
+    if not output or not all(isinstance(x, dict) for x in output):
+        rc.print(
+            f"❌ The '{feature}.{subfeat}' cmd output has no NTC rows, it needs a hand-written formatter"
+        )
+        return
+    rc.print(
+        _spec_source(subfeat, output), markup=False, highlight=False, soft_wrap=True
+    )
+
+
 # ----------------------------------------------------------------------------
 # Runs the script
 # ----------------------------------------------------------------------------
@@ -574,6 +641,11 @@ def main() -> None:
         format_actual_state(os_type, feature, test_path)
     elif args["create_desired_state"] is not None:
         create_desired_state(os_type, feature, test_path, tmpl_path)
+    elif args["create_spec"] is not None:
+        if subfeat is not None:
+            create_spec(os_type, feature, subfeat, test_path)
+        else:
+            rc.print("❌ Missing sub-feature for feature 'f{feature}' on 'f{os_type}'")
     else:
         msg = "At least one of the arguments '-cf', '-as' or '-ds' is required"
         raise Exception(msg)
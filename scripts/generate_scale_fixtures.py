@@ -0,0 +1,579 @@
+"""Generates large synthetic test files (same layout as tests/os_test_files) to stress test and benchmark the formatters.
+
+uv run scripts/generate_scale_fixtures.py                                 Generates every scenario at the default scale
+uv run scripts/generate_scale_fixtures.py -s route -r 1000000 -v 500     1M routes across 500 VRFs
+uv run scripts/generate_scale_fixtures.py -s mac ap -d /tmp/scale         Only the MAC and AP scenarios, saved to /tmp/scale
+uv run scripts/generate_scale_fixtures.py -s all -r 2000 -c               Small scale, checks the raw output parses (TextFSM) to the structured output
+
+Scenarios (OS type, feature and sub-features):
+- route: cisco_ios route_table (vrf, route), BGP, OSPF (with ECMP), static and connected routes spread across VRFs
+- mac: cisco_ios layer2 (mac_table), the MAC entries spread across VLANs
+- ap: cisco_wlc wifi (ap, ap_model, client_count, wlan_client), clients spread across the APs and WLANs
+- bgp: cisco_ios route_protocol (bgp_peer), established, idle and active peers
+- acl: cisco_ios system (mgmt_acl and acl), extended ACLs of host, network and any ACEs
+
+Per scenario the command output is saved both structured (as returned by netmiko/TextFSM, <os>_<feature>_cmd_output.json)
+and raw (the device CLI output per command, <os>_<feature>_raw.json). From the structured output the validation, actual state and
+desired state files are created using feature_builder (the same as rebuild_test_files.py), so they always match each other.
+The output is deterministic for the same seed, use 'uv run scripts/benchmark.py -d <directory>' to benchmark it.
+"""
+
+import argparse
+import ipaddress
+import json
+import os
+import random
+from collections.abc import Callable
+from importlib.resources import files
+from pathlib import Path
+from typing import Any
+
+from feature_builder import (
+    create_desired_state,
+    create_val_file,
+    format_actual_state,
+    rc,
+)
+
+# Get project root (reliable regardless of where script is run)
+project_root = Path(__file__).parent.parent
+SCENARIOS = ("route", "mac", "ap", "bgp", "acl")
+# Netmiko platform used to parse the raw output with TextFSM when checking
+NTC_PLATFORM = {"cisco_ios": "cisco_ios", "cisco_wlc": "cisco_wlc_ssh"}
+# Column order of the TextFSM templates (lowercase), used to build the structured output
+IOS_VRF_KEYS = ("name", "default_rd", "protocols", "interfaces")
+IOS_ROUTE_KEYS = (
+    "vrf", "protocol", "type", "network", "prefix_length", "distance", "metric",
+    "nexthop_ip", "nexthop_vrf", "nexthop_if", "uptime", "flag",
+)  # fmt: skip
+IOS_BGP_KEYS = (
+    "router_id", "local_as", "address_family", "bgp_neighbor", "bgp_version",
+    "neighbor_as", "messages_received", "messages_sent", "table_version",
+    "input_queue", "output_queue", "up_down", "state_or_prefixes_received",
+)  # fmt: skip
+IOS_ACL_KEYS = (
+    "acl_type", "acl_name", "line_num", "action", "protocol", "src_host", "src_any",
+    "src_network", "src_wildcard", "src_network_object_group_name", "src_port_match",
+    "src_port", "src_port_range_start", "src_port_range_end", "dst_host", "dst_any",
+    "dst_network", "dst_wildcard", "dst_network_object_group_name", "dst_port_match",
+    "dst_port", "dst_port_range_start", "dst_port_range_end",
+    "service_object_group_name", "flags_match", "tcp_flag", "log", "log_tag",
+    "icmp_type", "time", "state", "matches",
+)  # fmt: skip
+WLC_AP_KEYS = (
+    "ap_name", "slot", "ap_model", "mac_address", "radio_mac", "location", "port",
+    "country", "ip_address", "clients", "dse_location", "priority", "state",
+)  # fmt: skip
+
+
+# ----------------------------------------------------------------------------
+# ARG: Scenarios, scale of each scenario and output directory
+# ----------------------------------------------------------------------------
+def _create_parser() -> argparse.Namespace:
+    """Takes the input arguments used to select the scenarios and their scale.
+
+    Returns:
+        argparse.Namespace: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-s", "--scenario", nargs="+", default=["all"], choices=[*SCENARIOS, "all"]
+    )
+    parser.add_argument("-d", "--directory", default="scale_test_files")
+    parser.add_argument("-r", "--routes", type=int, default=1_000_000)
+    parser.add_argument("-v", "--vrfs", type=int, default=500)
+    parser.add_argument("-m", "--macs", type=int, default=100_000)
+    parser.add_argument("--vlans", type=int, default=1000)
+    parser.add_argument("-a", "--aps", type=int, default=5000)
+    parser.add_argument("--wlans", type=int, default=16)
+    parser.add_argument("-p", "--peers", type=int, default=2000)
+    parser.add_argument("-l", "--aces", type=int, default=10_000)
+    parser.add_argument("--acls", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "-c",
+        "--check",
+        action="store_true",
+        help="Parse the raw output with TextFSM and check it matches the structured output (slow at scale)",
+    )
+    return parser.parse_args()
+
+
+# ----------------------------------------------------------------------------
+# DEF: Mini-functions used by the scenarios
+# ----------------------------------------------------------------------------
+def _record(keys: tuple[str, ...], **values: Any) -> dict[str, Any]:  # noqa: ANN401
+    """Creates a structured (TextFSM) record, the keys not given are empty strings the same as TextFSM."""
+    return {each_key: values.get(each_key, "") for each_key in keys}
+
+
+def _uptime(rand: random.Random) -> str:
+    """A random route or peer uptime in the IOS format, such as 1d02h or 3w4d."""
+    if rand.random() < 0.5:
+        return f"{rand.randint(1, 6)}d{rand.randint(0, 23):02}h"
+    return f"{rand.randint(1, 52)}w{rand.randint(0, 6)}d"
+
+
+def _mac(num: int, prefix: str = "00:1b:54") -> str:
+    """A unique MAC address from a number."""
+    return f"{prefix}:{(num >> 16) & 0xFF:02x}:{(num >> 8) & 0xFF:02x}:{num & 0xFF:02x}"
+
+
+def _split(total: int, parts: int) -> list[int]:
+    """Splits the total as evenly as possible into the number of parts."""
+    return [total // parts + (1 if idx < total % parts else 0) for idx in range(parts)]
+
+
+# ----------------------------------------------------------------------------
+# ROUTE: cisco_ios route_table, 'show vrf' and 'show ip route [vrf x]' per VRF
+# ----------------------------------------------------------------------------
+def gen_route(args: argparse.Namespace, rand: random.Random) -> dict[str, Any]:
+    """Routes split across the global table and VRFs, most are BGP with some OSPF (10% ECMP), static and connected.
+
+    Args:
+        args (argparse.Namespace): The number of routes and VRFs
+        rand (random.Random): Seeded random used for the route attributes
+    Returns:
+        dict[str, Any]: {sub_feature: {cmd: [structured], raw: {cmd: str}}}
+    """
+    vrfs = [f"VRF{idx:04}" for idx in range(1, args.vrfs + 1)]
+    vrf_struct: list[dict[str, Any]] = []
+    vrf_raw = ["  Name" + " " * 29 + "Default RD" + " " * 12 + "Protocols   Interfaces"]
+    rte_struct: dict[str, list[dict[str, Any]]] = {}
+    rte_raw: dict[str, list[str]] = {}
+    # Each table uses its own range of networks, VRFs can overlap (same as real devices)
+    for table, num_routes in zip(
+        ["", *vrfs], _split(args.routes, len(vrfs) + 1), strict=True
+    ):
+        idx = len(rte_struct)
+        intfs = [f"Vl{100 + idx % 3900}", f"Lo{idx}"]
+        cmd = f"show ip route vrf {table}" if table else "show ip route"
+        if table:
+            vrf_struct.append(
+                _record(
+                    IOS_VRF_KEYS,
+                    name=table,
+                    default_rd=f"65000:{idx}",
+                    protocols="ipv4",
+                    interfaces=intfs,
+                )
+            )
+            vrf_raw.append(f"  {table:<33}{f'65000:{idx}':<22}{'ipv4':<12}{intfs[0]}")
+            vrf_raw.append(" " * 69 + intfs[1])
+        struct, raw = [], []
+        if table:
+            raw.append(f"\nRouting Table: {table}")
+        raw.append(
+            "Codes: L - local, C - connected, S - static, B - BGP, O - OSPF, IA - OSPF inter area"
+        )
+        raw.append("Gateway of last resort is 10.255.0.1 to network 0.0.0.0\n")
+        connected = ipaddress.IPv4Network(f"10.255.{idx % 256}.0/24")
+        base = int(ipaddress.IPv4Address("11.0.0.0"))
+        for num in range(num_routes):
+            route = dict(vrf=table, uptime=_uptime(rand))
+            if num == 0:
+                route.update(
+                    protocol="S",
+                    network="0.0.0.0",
+                    prefix_length="0",
+                    distance="1",
+                    metric="0",
+                )
+                route["nexthop_ip"] = str(connected[1])
+                raw.append(f"S*       0.0.0.0/0 [1/0] via {route['nexthop_ip']}")
+                route.pop("uptime")
+                struct.append(_record(IOS_ROUTE_KEYS, **route, flag="*"))
+                continue
+            if num in (1, 2):
+                proto = "C" if num == 1 else "L"
+                pfx = "24" if num == 1 else "32"
+                net = (
+                    str(connected.network_address) if num == 1 else str(connected[254])
+                )
+                route.pop("uptime")
+                route.update(
+                    protocol=proto,
+                    network=net,
+                    prefix_length=pfx,
+                    nexthop_if=f"Vlan{100 + idx % 3900}",
+                )
+                raw.append(
+                    f"{proto}        {net}/{pfx} is directly connected, {route['nexthop_if']}"
+                )
+                struct.append(_record(IOS_ROUTE_KEYS, **route))
+                continue
+            net = str(ipaddress.IPv4Address(base + num * 256))
+            choice = rand.random()
+            if choice < 0.8:
+                route.update(
+                    protocol="B",
+                    network=net,
+                    prefix_length="24",
+                    distance="20",
+                    metric="0",
+                )
+                route["nexthop_ip"] = (
+                    f"10.254.{rand.randint(0, 255)}.{rand.randint(1, 254)}"
+                )
+                raw.append(
+                    f"B        {net}/24 [20/0] via {route['nexthop_ip']}, {route['uptime']}"
+                )
+                struct.append(_record(IOS_ROUTE_KEYS, **route))
+            elif choice < 0.95:
+                rtype = rand.choice(["", "IA", "E2"])
+                metric = str(rand.randint(2, 200))
+                paths = 2 if rand.random() < 0.1 else 1
+                for path in range(paths):
+                    nh_ip, nh_if = (
+                        f"10.253.{idx % 256}.{path + 1}",
+                        f"GigabitEthernet0/{path}",
+                    )
+                    route.update(
+                        protocol="O", type=rtype, network=net, prefix_length="24"
+                    )
+                    route.update(
+                        distance="110",
+                        metric=metric,
+                        nexthop_ip=nh_ip,
+                        nexthop_if=nh_if,
+                    )
+                    if path == 0:
+                        raw.append(
+                            f"O {rtype:<2}     {net}/24 [110/{metric}] via {nh_ip}, {route['uptime']}, {nh_if}"
+                        )
+                    else:
+                        raw.append(
+                            f"                [110/{metric}] via {nh_ip}, {route['uptime']}, {nh_if}"
+                        )
+                    struct.append(_record(IOS_ROUTE_KEYS, **route))
+            else:
+                route.pop("uptime")
+                route.update(
+                    protocol="S",
+                    network=net,
+                    prefix_length="24",
+                    distance="1",
+                    metric="0",
+                )
+                route["nexthop_ip"] = str(connected[1])
+                raw.append(f"S        {net}/24 [1/0] via {route['nexthop_ip']}")
+                struct.append(_record(IOS_ROUTE_KEYS, **route))
+        rte_struct[cmd], rte_raw[cmd] = struct, raw
+    return {
+        "vrf": {"show vrf": vrf_struct},
+        "route": rte_struct,
+        "raw": {
+            "show vrf": "\n".join(vrf_raw),
+            **{k: "\n".join(v) for k, v in rte_raw.items()},
+        },
+    }
+
+
+# ----------------------------------------------------------------------------
+# MAC: cisco_ios layer2, total dynamic MAC count and the count per VLAN
+# ----------------------------------------------------------------------------
+def gen_mac(args: argparse.Namespace, rand: random.Random) -> dict[str, Any]:
+    """The MAC entries randomly spread across the VLANs, the commands return counts so the output is raw.
+
+    Args:
+        args (argparse.Namespace): The number of MAC entries and VLANs
+        rand (random.Random): Seeded random used to spread the MACs
+    Returns:
+        dict[str, Any]: {sub_feature: {cmd: [raw lines]}, raw: {cmd: str}}
+    """
+    vlans = [10 + idx for idx in range(args.vlans)]
+    counts = dict.fromkeys(vlans, 0)
+    for _ in range(args.macs):
+        counts[rand.choice(vlans)] += 1
+    total_cmd = "show mac address-table dynamic | count dynamic|DYNAMIC"
+    mac_table = {total_cmd: [f"Number of lines which match regexp = {args.macs}"]}
+    for vlan, count in counts.items():
+        cmd = f"show mac address-table count Vlan {vlan} | in Dynamic|Vlan"
+        mac_table[cmd] = [
+            f"Mac Entries for Vlan {vlan}:",
+            f"Dynamic Address Count  : {count}",
+        ]
+    return {
+        "mac_table": mac_table,
+        "raw": {k: "\n".join(v) for k, v in mac_table.items()},
+    }
+
+
+# ----------------------------------------------------------------------------
+# AP: cisco_wlc wifi, 'show ap summary' and client counts (with the per client rows)
+# ----------------------------------------------------------------------------
+def gen_ap(args: argparse.Namespace, rand: random.Random) -> dict[str, Any]:
+    """APs with 0 to 30 clients each spread across the WLANs.
+
+    Args:
+        args (argparse.Namespace): The number of APs and WLANs
+        rand (random.Random): Seeded random used for the clients and models
+    Returns:
+        dict[str, Any]: {sub_feature: {cmd: [structured or raw lines]}, raw: {cmd: str}}
+    """
+    models = ["AIR-AP2802I-E-K9", "AIR-AP3802I-E-K9", "C9120AXI-E", "C9130AXI-E"]
+    ap_struct: list[dict[str, Any]] = []
+    clients: list[tuple[str, int]] = []
+    ap_raw = [
+        f"Number of APs.................................... {args.aps}",
+        "",
+        "Global AP User Name.............................. admin",
+        "",
+        "AP Name             Slots  AP Model              Ethernet MAC       Location          Country     IP Address       Clients   DSE Location",
+        "------------------  -----  --------------------  -----------------  ----------------  ----------  ---------------  --------  --------------",
+    ]
+    for idx in range(args.aps):
+        name, model, mac = f"AP-{idx:05}", rand.choice(models), _mac(idx, "b0:8b:cf")
+        ip, location = (
+            f"10.{20 + idx // 65536}.{idx // 256 % 256}.{idx % 256}",
+            f"DC - R{idx % 500}",
+        )
+        num_clients = rand.randint(0, 30)
+        clients.extend((name, rand.randint(1, args.wlans)) for _ in range(num_clients))
+        ap_struct.append(
+            _record(WLC_AP_KEYS, ap_name=name, slot="3", ap_model=model, mac_address=mac, location=location,
+                    country="GB", ip_address=ip, clients=str(num_clients), dse_location="[0 ,0 ,0 ]")
+        )  # fmt: skip
+        ap_raw.append(
+            f"{name:<20}{'3':<7}{model:<22}{mac:<19}{location:<18}{'GB':<12}{ip:<17}{num_clients:<10}[0 ,0 ,0 ]"
+        )
+    header = [
+        "MAC Address       AP Name                        Slot Status        WLAN  Auth Protocol         Port Wired Tunnel  Role",
+        "----------------- ------------------------------ ---- ------------- ----- ---- ---------------- ---- ----- ------- ----------------",
+    ]
+
+    def _client_rows(wlan: int | None) -> list[str]:
+        return [
+            f"{_mac(idx)} {ap:<30}  1   Associated     {wl:<5} Yes   802.11ac(5 GHz)  8    No    No      Local"
+            for idx, (ap, wl) in enumerate(clients)
+            if wlan is None or wl == wlan
+        ]
+
+    client_count = {
+        "show client summary": [
+            "",
+            f"Number of Clients................................ {len(clients)}",
+            "",
+            *header,
+            *_client_rows(None),
+        ]
+    }
+    for wlan in range(1, args.wlans + 1):
+        wl_rows = _client_rows(wlan)
+        client_count[f"show client wlan 999{wlan}"] = [
+            f"Error: Invalid WLAN ID 999{wlan} - must be in the range 1-513"
+        ]
+        client_count[f"show client wlan {wlan}"] = [
+            "",
+            f"Number of Clients in WLAN........................ {len(wl_rows)}",
+            "",
+            *header,
+            *wl_rows,
+        ]
+    return {
+        "ap": {"show ap summary": ap_struct},
+        "ap_model": {"show ap summary": ap_struct},
+        "client_count": client_count,
+        "wlan_client": {"show client summary": client_count["show client summary"]},
+        "raw": {
+            "show ap summary": "\n".join(ap_raw),
+            **{k: "\n".join(v) for k, v in client_count.items()},
+        },
+    }
+
+
+# ----------------------------------------------------------------------------
+# BGP: cisco_ios route_protocol, 'show ip bgp all summary'
+# ----------------------------------------------------------------------------
+def gen_bgp(args: argparse.Namespace, rand: random.Random) -> dict[str, Any]:
+    """BGP peers, 90% established (prefixes received) with the rest idle, active or admin down.
+
+    Args:
+        args (argparse.Namespace): The number of peers
+        rand (random.Random): Seeded random used for the peer attributes
+    Returns:
+        dict[str, Any]: {sub_feature: {cmd: [structured]}, raw: {cmd: str}}
+    """
+    common = dict(
+        router_id="192.168.255.1", local_as="65000", address_family="IPv4 Unicast"
+    )
+    struct = []
+    raw = [
+        "For address family: IPv4 Unicast",
+        "BGP router identifier 192.168.255.1, local AS number 65000",
+        "BGP table version is 1000000, main routing table version 1000000",
+        "",
+        "Neighbor        V           AS MsgRcvd MsgSent   TblVer  InQ OutQ Up/Down  State/PfxRcd",
+    ]
+    for idx in range(args.peers):
+        nbr = str(ipaddress.IPv4Address(int(ipaddress.IPv4Address("10.100.0.1")) + idx))
+        asn = str(65001 + idx % 1000)
+        if rand.random() < 0.9:
+            up_down, state = _uptime(rand), str(rand.randint(0, 10000))
+            rcvd, sent = str(rand.randint(100, 99999)), str(rand.randint(100, 99999))
+        else:
+            up_down, state = "never", rand.choice(["Idle", "Active", "Idle (Admin)"])
+            rcvd, sent = "0", "0"
+        struct.append(
+            _record(IOS_BGP_KEYS, **common, bgp_neighbor=nbr, bgp_version="4", neighbor_as=asn,
+                    messages_received=rcvd, messages_sent=sent, table_version="1000000", input_queue="0",
+                    output_queue="0", up_down=up_down, state_or_prefixes_received=state)
+        )  # fmt: skip
+        raw.append(
+            f"{nbr:<15} 4 {asn:>12} {rcvd:>7} {sent:>7} {'1000000':>8}    0    0 {up_down:<8} {state}"
+        )
+    cmd = "show ip bgp all summary"
+    return {"bgp_peer": {cmd: struct}, "raw": {cmd: "\n".join(raw)}}
+
+
+# ----------------------------------------------------------------------------
+# ACL: cisco_ios system, 'show ip access-lists <name>' per ACL
+# ----------------------------------------------------------------------------
+def gen_acl(args: argparse.Namespace, rand: random.Random) -> dict[str, Any]:
+    """Extended ACLs each with the number of ACEs, a mix of host, network and any sources and destinations.
+
+    The same ACLs are used for the management ACL (mgmt_acl) and full ACL (acl) sub-features.
+
+    Args:
+        args (argparse.Namespace): The number of ACLs and ACEs per ACL
+        rand (random.Random): Seeded random used for the ACE attributes
+    Returns:
+        dict[str, Any]: {sub_feature: {cmd: [structured]}, raw: {cmd: str}}
+    """
+    mgmt_acl: dict[str, list[dict[str, Any]]] = {}
+    raw_acl = {}
+    for acl_idx in range(1, args.acls + 1):
+        name = f"MGMT_ACL_{acl_idx}"
+        cmd = f"show ip access-lists {name}"
+        struct = [_record(IOS_ACL_KEYS, acl_type="Extended", acl_name=name)]
+        raw = [f"Extended IP access list {name}"]
+        for idx in range(args.aces):
+            seq = str((idx + 1) * 10)
+            ace = dict(
+                acl_type="Extended", acl_name=name, line_num=seq, action="permit"
+            )
+            if idx == args.aces - 1:
+                ace.update(
+                    action="deny",
+                    protocol="ip",
+                    src_any="any",
+                    dst_any="any",
+                    log="log",
+                )
+                raw.append(f"    {seq} deny ip any any log")
+                struct.append(_record(IOS_ACL_KEYS, **ace))
+                continue
+            if rand.random() < 0.5:
+                src = str(
+                    ipaddress.IPv4Address(int(ipaddress.IPv4Address("10.0.0.0")) + idx)
+                )
+                ace["src_host"], src_raw = src, f"host {src}"
+            else:
+                src = f"10.{idx // 256 % 256}.{idx % 256}.0"
+                ace.update(src_network=src, src_wildcard="0.0.0.255")
+                src_raw = f"{src} 0.0.0.255"
+            protocol = rand.choice(["ip", "tcp", "udp"])
+            ace.update(protocol=protocol, dst_any="any")
+            line = f"    {seq} permit {protocol} {src_raw} any"
+            if protocol != "ip":
+                port = rand.choice(
+                    ["22", "161", "443"] if protocol == "tcp" else ["53", "123", "161"]
+                )
+                ace.update(dst_port_match="eq", dst_port=port)
+                line += f" eq {port}"
+            if rand.random() < 0.3:
+                matches = str(rand.randint(1, 99999))
+                ace["matches"] = matches
+                line += f" ({matches} matches)"
+            raw.append(line)
+            struct.append(_record(IOS_ACL_KEYS, **ace))
+        mgmt_acl[cmd], raw_acl[cmd] = struct, "\n".join(raw)
+    return {"mgmt_acl": mgmt_acl, "acl": mgmt_acl, "raw": raw_acl}
+
+
+# OS type, feature and function of each scenario
+GENERATORS: dict[
+    str, tuple[str, str, Callable[[argparse.Namespace, random.Random], dict[str, Any]]]
+] = {
+    "route": ("cisco_ios", "route_table", gen_route),
+    "mac": ("cisco_ios", "layer2", gen_mac),
+    "ap": ("cisco_wlc", "wifi", gen_ap),
+    "bgp": ("cisco_ios", "route_protocol", gen_bgp),
+    "acl": ("cisco_ios", "system", gen_acl),
+}
+
+
+# ----------------------------------------------------------------------------
+# CHECK: Parses the raw output with TextFSM and compares it to the structured output
+# ----------------------------------------------------------------------------
+def check_raw(
+    os_type: str, sub_feats: dict[str, Any], raw: dict[str, str]
+) -> list[str]:
+    """Checks the raw output of each structured command parses (ntc_templates) to the same structured output.
+
+    Args:
+        os_type (str): The netmiko platform of the scenario
+        sub_feats (dict[str, Any]): {sub_feature: {cmd: [structured or raw lines]}}
+        raw (dict[str, str]): The raw output of each command
+    Returns:
+        list[str]: The commands that don't match, empty if all match
+    """
+    from ntc_templates.parse import parse_output  # type: ignore[import-untyped]
+
+    mismatch = []
+    for cmds in sub_feats.values():
+        for cmd, output in cmds.items():
+            if output and isinstance(output[0], dict):
+                parsed = parse_output(
+                    platform=NTC_PLATFORM[os_type], command=cmd, data=raw[cmd]
+                )
+                if parsed != output:
+                    mismatch.append(cmd)
+    return mismatch
+
+
+# ----------------------------------------------------------------------------
+# ENGINE: Generates the command output and creates the val, actual and desired state files from it
+# ----------------------------------------------------------------------------
+def main() -> None:
+    args = _create_parser()
+    scenarios = SCENARIOS if "all" in args.scenario else args.scenario
+    for each_scenario in scenarios:
+        os_type, feature, generator = GENERATORS[each_scenario]
+        data = generator(args, random.Random(args.seed))
+        raw = data.pop("raw")
+        if args.check:
+            mismatch = check_raw(os_type, data, raw)
+            for cmd in mismatch:
+                rc.print(
+                    f"❌ {os_type} {feature} '{cmd}' raw output does not parse to the structured output"
+                )
+            if mismatch:
+                raise SystemExit(1)
+        # Same as a device, each sub-feature is the output of all its commands joined together
+        cmd_output: dict[str, dict[str, Any]] = {feature: {}}
+        for sub_feat, cmds in data.items():
+            cmd_output[feature][sub_feat] = [
+                row for output in cmds.values() for row in output
+            ]
+
+        test_path = os.path.join(args.directory, os_type, feature)
+        os.makedirs(test_path, exist_ok=True)
+        with open(
+            os.path.join(test_path, f"{os_type}_{feature}_cmd_output.json"), "w"
+        ) as json_file:
+            json.dump(cmd_output, json_file)
+        with open(
+            os.path.join(test_path, f"{os_type}_{feature}_raw.json"), "w"
+        ) as json_file:
+            json.dump({feature: raw}, json_file, indent=2)
+        tmpl_path = Path(
+            str(files("nornir_validate").joinpath("feature_templates", feature))
+        )
+        create_val_file(os_type, feature, test_path)
+        format_actual_state(os_type, feature, test_path)
+        create_desired_state(os_type, feature, test_path, tmpl_path)
+
+
+if __name__ == "__main__":
+    main()
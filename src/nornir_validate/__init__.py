@@ -2,9 +2,11 @@ from importlib.metadata import PackageNotFoundError, version
 
 from nornir_validate.core import (
     print_build_result,
+    print_command_report,
     print_val_result,
     val_file_builder,
     validate,
+    warm_feature_registry,
 )
 
 try:
@@ -13,4 +15,11 @@ except PackageNotFoundError:
     # Package isn't installed yet (dev mode)
     __version__ = "0.0.0"
 
-__all__ = ["validate", "print_val_result", "val_file_builder", "print_build_result"]
+__all__ = [
+    "validate",
+    "print_val_result",
+    "val_file_builder",
+    "print_build_result",
+    "print_command_report",
+    "warm_feature_registry",
+]
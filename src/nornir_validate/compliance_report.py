@@ -1,10 +1,12 @@
-import json
 import os
 import re
 from datetime import datetime
 from typing import Any
 
-from napalm.base import validate  # type: ignore
+from . import json_codec
+from .formatting import RecordTable
+from .instrumentation import Timings
+from .tracing import traced
 
 
 # ----------------------------------------------------------------------------
@@ -54,8 +56,8 @@ def save_report_to_file(
     )
     # If report file already exists conditionally updates 'skipped' and 'complies' with report outcome
     if os.path.exists(filename):
-        with open(filename) as file_content:
-            existing_report = json.load(file_content)
+        with open(filename, "rb") as file_content:
+            existing_report = json_codec.loads(file_content.read())
         if list(report.values())[0].get("skipped"):
             existing_report["skipped"].extend(skipped)
         elif len(skipped) == 0:
@@ -71,20 +73,50 @@ def save_report_to_file(
             existing_report["skipped"] = skipped
     # Writes to file the full napalm_validate result (including an existing report)
     existing_report.update(report)
-    with open(filename, "w") as file_content:
-        json.dump(existing_report, file_content)
+    with open(filename, "wb") as file_content:
+        file_content.write(json_codec.dumps(existing_report))
     # return f" The report can be viewed using:  \n \33[3m\033[1;37m\33[30m  cat {filename} | python -m json.tool \033[0;0m"
     return f" The report can be viewed using:  \ncat {filename} | python -m json.tool"
 
 
+# ----------------------------------------------------------------------------
+# COMPACT: Converts compact actual states into the nested dicts napalm_validate compares
+# ----------------------------------------------------------------------------
+def materialise_actual_state(d_state_sub_feat: Any, a_state_sub_feat: Any) -> Any:  # noqa: ANN401
+    """Converts a compact (RecordTable) actual state to nested dicts, only building the entries the desired state names.
+
+    napalm_validate only compares the keys in the desired state, in strict mode any other keys are just listed as
+    extra so their entries are not built (are None). Actual state that isn't compact is returned unchanged.
+
+    Args:
+        d_state_sub_feat (Any): Desired state of the sub-feature
+        a_state_sub_feat (Any): Actual state of the sub-feature, can be a RecordTable
+    Returns:
+        Any: The actual state in the data structure napalm_validate compares
+    """
+    if not isinstance(a_state_sub_feat, RecordTable):
+        return a_state_sub_feat
+    # LIST: Lists (and any non-dict desired state) are compared against all entries
+    if not isinstance(d_state_sub_feat, dict) or "list" in d_state_sub_feat:
+        return a_state_sub_feat.as_dict()
+    result = a_state_sub_feat.subset(x for x in d_state_sub_feat if x != "_mode")
+    if "strict" in str(d_state_sub_feat.get("_mode", "")).split():
+        result.update(
+            dict.fromkeys(x for x in a_state_sub_feat.records if x not in result)
+        )
+    return result
+
+
 # ----------------------------------------------------------------------------------------------------------
 # VALIDATE: Uses naplam_validate on custom data fed in (still supports '_mode: strict') to validate and create reports
 # ----------------------------------------------------------------------------------------------------------
+@traced("generate_validate_report")
 def generate_validate_report(
     d_state: dict[str, Any],
     a_state: dict[str, Any],
     hostname: str,
     directory: str | None,
+    timings: Timings | None = None,
 ) -> dict[str, Any]:
     """Runs the napalm-validate compare method on each feature, adds skipped key if cant be run producing compliance report output based on all features.
 
@@ -93,9 +125,14 @@ def generate_validate_report(
         a_state (dict[str, Any]): Actual state got from the device
         hostname (str): Hostname of the device being validated
         directory (str | None): If specified the directory where the report will be saved
+        timings (Timings | None): Records the duration of each sub-feature comparison (compare phase)
 
     Returns (dict[str, Any]): A dictionary of report details result (compliance state) and tasks status, all all fed into Nornir Result
     """
+    # napalm is only imported when first used as importing it loads all of its drivers
+    from napalm.base import validate  # type: ignore
+
+    timings = timings if timings is not None else Timings()
     report: dict[str, Any] = {}
     for feature, sub_feat in d_state.items():
         for each_sub_feat in sub_feat:
@@ -103,14 +140,19 @@ def generate_validate_report(
                 name = f"{feature}.{each_sub_feat}"
                 # napalm_validate compare method produces report based on desired and actual state
                 d_state_sub_feat = d_state[feature][each_sub_feat]
-                a_state_sub_feat = a_state[feature][each_sub_feat]
-                if isinstance(d_state_sub_feat, dict):
-                    report[name] = validate.compare(d_state_sub_feat, a_state_sub_feat)
-                else:
-                    report[name] = validate.compare(
-                        {each_sub_feat: d_state_sub_feat},
-                        {each_sub_feat: a_state_sub_feat},
-                    )
+                a_state_sub_feat = materialise_actual_state(
+                    d_state_sub_feat, a_state[feature][each_sub_feat]
+                )
+                with timings.measure("compare", feature, each_sub_feat):
+                    if isinstance(d_state_sub_feat, dict):
+                        report[name] = validate.compare(
+                            d_state_sub_feat, a_state_sub_feat
+                        )
+                    else:
+                        report[name] = validate.compare(
+                            {each_sub_feat: d_state_sub_feat},
+                            {each_sub_feat: a_state_sub_feat},
+                        )
             # If validation couldn't be run on a command adds skipped key to the cmd dictionary
             except NotImplementedError:
                 report[feature] = {"skipped": True, "reason": "NotImplemented"}
@@ -1,78 +1,51 @@
 import ast
 import contextlib
-import importlib
-import json
 import logging
 import os
 import re
 from collections import defaultdict
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from importlib.resources import files
-from types import ModuleType
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import yaml
 from nornir.core import Nornir
 from nornir.core.exceptions import NornirSubTaskError
-from nornir.core.inventory import Host
 from nornir.core.task import AggregatedResult, Result, Task
-from nornir_jinja2.plugins.tasks import template_file  # type: ignore
-from nornir_netmiko.tasks import netmiko_send_command  # type: ignore
-from nornir_rich.functions import print_result  # type: ignore
-from nornir_utils.plugins.tasks.files import write_file  # type: ignore
 
+from . import json_codec
 from .compliance_report import generate_validate_report
-
-# Module-level cache
-_loaded_modules: dict[str, Any] = {}
+from .feature_registry import feature_registry, validation_features
+from .index_registry import index_registry
+from .instrumentation import CommandStats, Timings, command_stats
+from .memory_profile import MemoryProfiler
+from .metrics import get_metrics
+from .platform_profile import (
+    OS_INDEX_FILES,
+    merge_os_types,  # noqa: F401 (kept importable from core)
+    platform_profile,
+    resolve_os_type,
+)
+from .probe_cache import get_probe_cache, host_version
+from .tracing import traced
+
+if TYPE_CHECKING:
+    from .formatting import RecordTable
 
 
 # ----------------------------------------------------------------------------
 # IMPORT: Import actual_state modules required based on validations in input data
 # ----------------------------------------------------------------------------
-def import_actual_state_modules(feature: str) -> dict[str, ModuleType]:
-    """Imports the actual_state.py modules for the feature used in the validation input file, caches results to avoid re-importing.
+def warm_feature_registry(input_data: dict[str, Any] | str = "") -> None:
+    """Imports the actual_state modules of the features in the validations before nr.run so hosts don't stall on the imports.
 
     Args:
-        feature (str): Feature name used in file path and xx__actual_state.py
-
-    Returns:
-        dict[str, ModuleType]: Dictionary of {feature_name: imported_module}
+        input_data (dict[str, Any] | str): Validations (same as validate) or an empty string for all features (same as val_file_builder)
     """
-    # Only import if not already cached
-    if feature not in _loaded_modules:
-        module_path = (
-            f"nornir_validate.feature_templates.{feature}.{feature}_actual_state"
-        )
-        try:
-            _loaded_modules[feature] = importlib.import_module(module_path)
-        except ImportError as e:
-            print(f"❌ Could not import {module_path}: {e}")
-        except Exception as e:
-            print(f"❌ Error loading {module_path}: {e}")
-    return _loaded_modules
-
-
-# ----------------------------------------------------------------------------
-#  OS_TYPE: Gets os_type from host_var OS types (platform) and then removes duplicates and None
-# ----------------------------------------------------------------------------
-def merge_os_types(host: Host) -> list[str]:
-    """For a Nornir host object gathers the connection handlers name for the different connection plugins.
-
-    Args:
-        host (Host): Nornir inventory host object, holds the hosts attributes
-    Returns:
-        list[str]: List of the connection handlers for the different connection plugins
-    """
-    tmp_os_type: list[str | None] = []
-    tmp_os_type.append(host.platform)
-    tmp_os_type.append(host.get_connection_parameters("scrapli").platform)
-    tmp_os_type.append(host.get_connection_parameters("netmiko").platform)
-    tmp_os_type.append(host.get_connection_parameters("napalm").platform)
-    set_os_type = set(tmp_os_type)
-    os_type = [x for x in set_os_type if x is not None]
-    os_type.sort()
-    return os_type
+    if len(input_data) == 0:
+        feature_registry.warm(create_val_dm()["all"])
+    elif isinstance(input_data, dict):
+        feature_registry.warm(validation_features(input_data))
 
 
 # ----------------------------------------------------------------------------
@@ -177,26 +150,35 @@ def remove_cmds_desired_state(desired_state: dict[str, Any]) -> dict[str, Any]:
 # ----------------------------------------------------------------------------
 #  VAL_DM: Creates validation data model for all feature/sub-feature validations
 # ----------------------------------------------------------------------------
-def create_val_dm() -> dict[str, dict[str, list[str]]]:
-    """Creates validation data model from all_subfeat_index file.
+def return_index_name(os_type: Iterable[str]) -> str:
+    """Gets the name of the per-platform index file for the OS type resolved from the platform names.
+
+    Args:
+        os_type (Iterable[str]): Connection handlers (plugins) of the host, the result of merge_os_types
+    Returns:
+        str: Name of the index file (cisco_nxos, paloalto_panos, etc), if no match is 'all'
+    """
+    return OS_INDEX_FILES.get(resolve_os_type(os_type), "all")
+
 
+def create_val_dm(
+    os_type: Iterable[str] | None = None,
+) -> dict[str, dict[str, list[str]]]:
+    """Creates validation data model from the platform index file (or all_index file if no platform or unknown platform).
+
+    Args:
+        os_type (Iterable[str] | None): Connection handlers (plugins) of the host, used to select the per-platform index file
     Returns:
         dict[str, Any]: Validation DM with any example data (dicts) such as route table VRF names removed
     """
-    all_index_file = files("nornir_validate").joinpath("index_files", "all_index.yml")
-    validations: dict[str, dict[str, list[str]]]
-    with all_index_file.open("r") as tmp_data:
-        validations = yaml.load(tmp_data, Loader=yaml.FullLoader)
-        for feat in validations["all"]:
-            for idx, sub_feat in enumerate(validations["all"][feat]):
-                if isinstance(sub_feat, dict):
-                    validations["all"][feat][idx] = list(sub_feat.keys())[0]
-    return validations
+    index_name = "all" if os_type is None else return_index_name(os_type)
+    return index_registry.validations(index_name)
 
 
 # ----------------------------------------------------------------------------
 # 1. DESIRED_STATE: Create a host_var of desired state by running (per-os-type) task_template
 # ----------------------------------------------------------------------------
+@traced("task_desired_state")
 def task_desired_state(
     task: Task,
     validations: dict[str, Any],
@@ -273,8 +255,11 @@ def task_template(
     # :param task: The task object that is passed to the plugin
     # :type task: Task
     """
+    # Heavy plugin dependencies are only imported when first used so 'import nornir_validate' is fast
+    from nornir_jinja2.plugins.tasks import template_file  # type: ignore
+
     # 2a. CRUNCH: Formulate data to be used in templates to create desired state
-    os_type = merge_os_types(task.host)
+    os_type = platform_profile(task.host).os_type
     feat_desired_data = return_feature_desired_data(validations)
     # 2b. TMPL: Create the desired state (includes cmds to get actual state) from the jinja2 template
     for feature, values in feat_desired_data.items():
@@ -295,39 +280,131 @@ def task_template(
 # ----------------------------------------------------------------------------
 # 3. ACTUAL_STATE: Formats cmd outputs to create the actual state
 # ----------------------------------------------------------------------------
+@traced("actual_state_engine")
 def actual_state_engine(
-    val_file: bool, os_type: list[str], feat_actual_data: dict[str, dict[str, Any]]
+    val_file: bool,
+    os_type: Iterable[str] | str,
+    feat_actual_data: dict[str, dict[str, Any]],
+    timings: Timings | None = None,
+    desired_state: dict[str, dict[str, Any]] | None = None,
+    compact: bool = False,
 ) -> dict[str, dict[str, Any]]:
     """From the cmd output creates the actual state of features and sub-features with the output of the sub-features formatted.
 
     Args:
         val_file (bool): True if generate validation file called this function
-        os_type (list[str]): Connection handler (plugin) used to format cmd data into actual state structure (same format as desired state)
+        os_type (Iterable[str] | str): Connection handlers (plugins) or the resolved OS type, used to format cmd data into actual state
         feat_actual_data (dict[str, dict[str, Any]]): The structured or non-structured data (cmd output) got from devices
+        timings (Timings | None): Records the duration of formatting each sub-feature as the format phase
+        desired_state (dict[str, dict[str, Any]] | None): Desired state without cmds, used by sub-features evaluated against it such as ACL flows
+        compact (bool): Declared sub-features are formatted into a RecordTable rather than nested dicts, not used for validation files
     Returns:
         dict[str, dict[str, Any]]: Actual state formatted as ({feat: {subfeat: actual_result})
     """
+    # OS type resolved once rather than by each sub-feature
+    os_key = resolve_os_type(os_type)
+    timings = timings if timings is not None else Timings()
     actual_state: dict[str, dict[str, Any]] = defaultdict(dict)
     for feature, sub_feat_dict in feat_actual_data.items():
         for sub_feature, output in sub_feat_dict.items():
             # EMPTY: If output is empty just adds an empty dictionary
+            result: dict[str, Any] | RecordTable
             if output is None or len(output) == 0:
                 result = {}
             else:
                 # Gets per-sub-feature actual state structured data from imported feature_templates (python imports)
-                modules = import_actual_state_modules(feature)
-                result = modules[feature].format_actual_state(
-                    val_file, str(os_type), sub_feature, output
-                )
+                format_actual_state = feature_registry.get(feature)
+                evaluate_actual_state = feature_registry.get_evaluator(feature)
+                with timings.measure("format", feature, sub_feature):
+                    evaluated = None
+                    # EVALUATE: Sub-features that evaluate the desired state against the output (returns None if not one)
+                    if desired_state is not None and evaluate_actual_state:
+                        sub_feat_ds = desired_state.get(feature, {}).get(sub_feature)
+                        evaluated = evaluate_actual_state(
+                            os_key, sub_feature, output, sub_feat_ds or {}
+                        )
+                    # COMPACT: Declared sub-features held as records, converted to dicts by the compliance report
+                    compact_result = None
+                    if compact and not val_file and evaluated is None:
+                        declared = feature_registry.get_declared(feature)
+                        if declared is not None:
+                            compact_result = declared.format_compact(
+                                os_key, sub_feature, output
+                            )
+                    if evaluated is not None:
+                        result = evaluated
+                    elif compact_result is not None:
+                        result = compact_result
+                    else:
+                        result = format_actual_state(
+                            val_file, os_key, sub_feature, output
+                        )
             actual_state[feature][sub_feature] = result
     return dict(actual_state)
 
 
+# ----------------------------------------------------------------------------
+# CMD: Runs a command and parses the output, timing each separately
+# ----------------------------------------------------------------------------
+@traced("run_command")
+def run_command(
+    task: Task, cmd: str, timings: Timings, feature: str, sub_feature: str
+) -> list[Any]:
+    """Runs the command with netmiko and parses the output, TextFSM is run separately from netmiko so it can be timed.
+
+    Args:
+        task (Task): The Nornir task that executes host actions
+        cmd (str): The command to run
+        timings (Timings): Records the duration and size of the command (command phase) and parsing (parse phase)
+        feature (str): The feature the command is run for
+        sub_feature (str): The sub-feature the command is run for
+    Raises:
+        NornirSubTaskError: If the netmiko task fails
+    Returns:
+        list[Any]: The structured data, decoded JSON (in a list) or lines of non-structured data
+    """
+    from netmiko.utilities import structured_data_converter
+    from nornir_netmiko.tasks import netmiko_send_command  # type: ignore
+
+    with timings.measure("command", feature, sub_feature, cmd) as record:
+        raw_output = task.run(
+            task=netmiko_send_command,
+            command_string=cmd,
+            severity_level=logging.DEBUG,
+        ).result
+        record.size = len(raw_output)
+    with timings.measure("parse", feature, sub_feature, cmd) as record:
+        output: Any = raw_output
+        # Converts NXOS "| json" cmds from string to JSON (invalid JSON, such as an error, is kept as a string)
+        if "json" in cmd:
+            with contextlib.suppress(ValueError):
+                output = [json_codec.loads(raw_output)]
+        # Same conversion as netmiko_send_command(use_textfsm=True), returns the string if there is no NTC template
+        else:
+            device_type = task.host.get_connection("netmiko", task.nornir.config)
+            output = structured_data_converter(
+                raw_data=raw_output,
+                command=cmd,
+                platform=device_type.device_type,
+                use_textfsm=True,
+            )
+        # Required for non-structured data(no NTC template)
+        if isinstance(output, str):
+            output = output.lstrip().rstrip().splitlines()
+        record.size = len(output)
+    return list(output)
+
+
 # ----------------------------------------------------------------------------
 # 4. ENGINE: Formats gathered output as actual state and runs compliance report - Only one that prints (logging debug)
 # ----------------------------------------------------------------------------
+@traced("validate")
 def validate(
-    task: Task, input_data: dict[str, Any], save_report: str | None = None
+    task: Task,
+    input_data: dict[str, Any],
+    save_report: str | None = None,
+    profile_memory: bool = False,
+    compact: bool = False,
 ) -> Result:
     """The main engine that runs file formatting, nornir tasks and compliance report.
 
@@ -335,46 +412,66 @@ def validate(
         task (Task): The nornir tasks that implements (runs) this the nornir tasks
         input_data (str): The User defined input data from input file
         save_report (str | None): To optionally save compliance reports to the directory specified in this variable
+        profile_memory (bool): Takes tracemalloc snapshots at each phase boundary, returned in the Result as 'memory_profile'
+        compact (bool): Holds the actual state of declared sub-features as compact records, only entries that are compared become dicts
     Returns:
         Result: The final result of nornir_validate (all tasks), a special Nornir Result object passed back to the main() method to be printed
     """
+    # TIMINGS: Per-phase, per-feature/sub-feature and per-command durations returned in the Result
+    timings = Timings(platform=str(task.host.platform))
+    # MEM_PROFILE: Opt-in as tracemalloc slows down the run
+    profiler = MemoryProfiler() if profile_memory else None
     # 4a. TMPL: Creates desired states using the jinja template by calling task_desired_state (1) which in term calls task_template (2)
-    task.run(
-        task=task_desired_state,
-        validations=input_data,
-        task_template=task_template,
-        severity_level=logging.DEBUG,
-    )
+    with timings.measure("render"):
+        task.run(
+            task=task_desired_state,
+            validations=input_data,
+            task_template=task_template,
+            severity_level=logging.DEBUG,
+        )
+    if profiler:
+        profiler.checkpoint("render")
     # 4b. CMD: Using commands crunched from the desired output gathers per-feature/sub-feature actual config of the device
+    # Sub-features that share a command (such as "show ap summary") reuse the output rather than re-sending it
     feat_actual_data: dict[str, dict[str, Any]] = defaultdict(dict)
+    host_cmd_output: dict[str, list[Any]] = {}
     for feature, sub_feature in task.host["desired_state"].items():
         for sub_feat_name, sub_feat_cmds in sub_feature.items():
             cmd_output = []
             for cmd in sub_feat_cmds.keys():  # noqa: SIM118
-                tmp_cmd_output = task.run(
-                    task=netmiko_send_command,
-                    command_string=cmd,
-                    use_textfsm=True,
-                    severity_level=logging.DEBUG,
-                ).result
-                # Converts NXOS "| json" cmds from string to JSON (suppress exceptions in case feature not used)
-                if "json" in cmd:
-                    with contextlib.suppress(Exception):
-                        tmp_cmd_output = [json.loads(tmp_cmd_output)]
-                # Required for non-structured data(no NTC template)
-                elif isinstance(tmp_cmd_output, str):
-                    tmp_cmd_output = tmp_cmd_output.lstrip().rstrip().splitlines()
-                cmd_output.extend(tmp_cmd_output)
+                if cmd not in host_cmd_output:
+                    host_cmd_output[cmd] = run_command(
+                        task, cmd, timings, feature, sub_feat_name
+                    )
+                cmd_output.extend(host_cmd_output[cmd])
             feat_actual_data[feature][sub_feat_name] = cmd_output
+    if profiler:
+        profiler.checkpoint("collect")
+        profiler.retain("cmd_output", feat_actual_data)
 
     # 4c. ACTUAL: Formats the returned data into dict of cmds {cmd: {seq: key:val}} same as desired_state
-    os_type = merge_os_types(task.host)
-    actual_state = actual_state_engine(False, os_type, feat_actual_data)
-    # 4d. VAL: Uses Napalm_validate validate method to generate a compliance report
+    os_type = platform_profile(task.host).os_type
     desired_state = remove_cmds_desired_state(task.host["desired_state"])
+    actual_state = actual_state_engine(
+        False, os_type, feat_actual_data, timings, desired_state, compact
+    )
+    if profiler:
+        profiler.checkpoint("format")
+        profiler.retain("actual_state", actual_state)
+    # 4d. VAL: Uses Napalm_validate validate method to generate a compliance report
     comp_result = generate_validate_report(
-        desired_state, actual_state, str(task.host), save_report
+        desired_state, actual_state, str(task.host), save_report, timings
     )
+    memory_profile = None
+    if profiler:
+        profiler.checkpoint("compare")
+        profiler.retain("desired_state", task.host["desired_state"])
+        profiler.retain("host_data", task.host.data)
+        memory_profile = profiler.stop()
+    # METRICS: Updated as each host finishes if enabled (set_metrics)
+    metrics = get_metrics()
+    if metrics is not None:
+        metrics.observe_host(timings, comp_result["report"], comp_result["failed"])
     # 4e. RSLT: Nornir returns compliance result or if fails the compliance report
     return Result(
         host=task.host,
@@ -382,14 +479,21 @@ def validate(
         result=comp_result["result"],
         report=comp_result["report"],
         report_text=comp_result["report_text"],
+        timings=timings,
+        memory_profile=memory_profile,
     )
 
 
 # ----------------------------------------------------------------------------
 # 5. VAL_FILE_BUILDER: Builds validation files based on the actual state
 # ----------------------------------------------------------------------------
+@traced("val_file_builder")
 def val_file_builder(
-    task: Task, input_data: dict[str, Any] | str = "", directory: str = ""
+    task: Task,
+    input_data: dict[str, Any] | str = "",
+    directory: str = "",
+    probe_cache: str | None = None,
+    probe_cache_ttl: int = 604800,
 ) -> Result:
     """Generates a validation file based on what features are enabled on a device (gathered from actual state).
 
@@ -397,47 +501,71 @@ def val_file_builder(
         task (Task): The Nornir task that executes host actions and stores the results
         input_data (dict[str, Any] | str): Validations or if an empty string if dynamically creating a validation file
         directory (str): Working directory where the file will be saved
+        probe_cache (str | None): Optional file to cache commands a platform/version does not support, they are skipped on later runs
+        probe_cache_ttl (int): Number of seconds a cached unsupported command is skipped for, default is 7 days
     Returns:
         Result: The nornir result from the execution of the task, so list of enabled and not enabled features as well as val file name
     """
+    from nornir_utils.plugins.tasks.files import write_file  # type: ignore
+
     # ERROR: Error patterns returned by devices that would mean a feature is not configured
     error_patterns = [
         "ERROR: % Invalid input detected at '^' marker.",
         "% Invalid input detected at '^' marker.",
         "Invalid command at '^' marker.",
     ]
-    # 5a. Use input input validation DM or if empty create one of all the possible validations
-    validations = create_val_dm() if len(input_data) == 0 else input_data
+    # 5a. Use input validation DM or if empty create one of all the possible validations for the host's platform
+    validations: dict[str, Any] | str
+    if len(input_data) == 0:
+        validations = create_val_dm(platform_profile(task.host).platforms)
+    else:
+        validations = input_data
+    timings = Timings(platform=str(task.host.platform))
     # 5b. TMPL: Creates desired states using the jinja template by calling task_desired_state (1) which in term calls task)template (2)
-    task.run(
-        task=task_desired_state,
-        validations=validations,
-        task_template=task_template,
-        severity_level=logging.DEBUG,
-    )
+    with timings.measure("render"):
+        task.run(
+            task=task_desired_state,
+            validations=validations,
+            task_template=task_template,
+            severity_level=logging.DEBUG,
+        )
     # 5c. CMD: Using commands crunched from the desired output gathers pre-feature/sub-feature actual config of the device
     feat_actual_data: dict[str, dict[str, Any]] = defaultdict(dict)
     used_subfeat, not_used_subfeat = ([] for i in range(2))
+    # PROBE_CACHE: Hosts without a platform can't be keyed so don't use the cache
+    cache = (
+        get_probe_cache(probe_cache, probe_cache_ttl)
+        if probe_cache and task.host.platform
+        else None
+    )
+    platform, os_version = str(task.host.platform), host_version(task.host)
+    # Sub-features that share a command reuse the output rather than re-sending it
+    host_cmd_output: dict[str, list[Any]] = {}
     for feature, sub_feature in task.host["desired_state"].items():
         for sub_feat_name, sub_feat_cmds in sub_feature.items():
-            cmd_output = []
+            # PROBE_CACHE: Skips sub-features whose commands are all known to be unsupported on this platform/version
+            if (
+                cache
+                and sub_feat_cmds
+                and all(
+                    cache.is_unsupported(platform, os_version, cmd)
+                    for cmd in sub_feat_cmds
+                )
+            ):
+                not_used_subfeat.append(sub_feat_name)
+                continue
+            cmd_output, unsupported_cmds = [], []
             for cmd in sub_feat_cmds.keys():  # noqa: SIM118
-                try:
-                    tmp_cmd_output = task.run(
-                        task=netmiko_send_command,
-                        command_string=cmd,
-                        use_textfsm=True,
-                        severity_level=logging.DEBUG,
-                    ).result
-                except NornirSubTaskError:
-                    tmp_cmd_output = []
-                # Converts NXOS "| json" cmds from string to JSON (suppress exceptions in case feature not used)
-                if "json" in cmd:
-                    with contextlib.suppress(Exception):
-                        tmp_cmd_output = [json.loads(tmp_cmd_output)]
-                # Required for non-structured data(no NTC template)
-                elif isinstance(tmp_cmd_output, str):
-                    tmp_cmd_output = tmp_cmd_output.lstrip().rstrip().splitlines()
+                if cmd not in host_cmd_output:
+                    try:
+                        host_cmd_output[cmd] = run_command(
+                            task, cmd, timings, feature, sub_feat_name
+                        )
+                    except NornirSubTaskError:
+                        host_cmd_output[cmd] = []
+                tmp_cmd_output = host_cmd_output[cmd]
+                if any(pattern in str(tmp_cmd_output) for pattern in error_patterns):
+                    unsupported_cmds.append(cmd)
                 cmd_output.extend(tmp_cmd_output)
             if len(tmp_cmd_output) != 0:
                 # SKIP: Skips sub-feature validation if command returned an error
@@ -448,10 +576,15 @@ def val_file_builder(
                     used_subfeat.append(sub_feat_name)
             else:
                 not_used_subfeat.append(sub_feat_name)
+            # PROBE_CACHE: Only records commands the device rejected, no output just means not configured on this host
+            if cache and unsupported_cmds:
+                cache.record(platform, os_version, unsupported_cmds)
+    if cache:
+        cache.save()
 
     #  5d. FORMAT: Format the returned data into dict of cmds {cmd: {seq: key:val}} and save to file
-    os_type = merge_os_types(task.host)
-    actual_state = actual_state_engine(True, os_type, feat_actual_data)
+    os_type = platform_profile(task.host).os_type
+    actual_state = actual_state_engine(True, os_type, feat_actual_data, timings)
     val_file = os.path.join(directory, f"{str(task.host)}_vals.yml")
     task.run(
         task=write_file,
@@ -465,6 +598,7 @@ def val_file_builder(
         used_subfeat=used_subfeat,
         not_used_subfeat=not_used_subfeat,
         file_info=info,
+        timings=timings,
     )
 
 
@@ -477,6 +611,8 @@ def print_val_result(result: AggregatedResult) -> None:
     Args:
         result (AggregatedResult): The nornir result from the execution of the task, so the compliance report in Nornir Result format
     """
+    from nornir_rich.functions import print_result  # type: ignore
+
     print_result(result)
 
 
@@ -487,6 +623,8 @@ def print_build_result(result: AggregatedResult, nr: Nornir) -> None:
         result (AggregatedResult): The nornir result from the execution of the task, am only printing results for specified vars
         nr (Nornir,): The Nornir inventory from which get (loop through) hostnames
     """
+    from nornir_rich.functions import print_result
+
     for each_host in nr.inventory.hosts.keys():  # noqa: SIM118
         print_result(
             result[each_host][0],
@@ -498,3 +636,35 @@ def print_build_result(result: AggregatedResult, nr: Nornir) -> None:
                 "file_info",
             ],
         )
+
+
+def print_command_report(result: AggregatedResult, top: int = 10) -> None:
+    """Prints a table per platform of the slowest commands (time to run and parse) of a validate or val_file_builder run.
+
+    Args:
+        result (AggregatedResult): The nornir result from the execution of the task
+        top (int): Number of commands to print per platform
+    """
+    from rich.console import Console
+    from rich.table import Table
+
+    per_platform: dict[str, list[CommandStats]] = defaultdict(list)
+    for stats in command_stats(result):
+        per_platform[stats.platform].append(stats)
+    for platform, all_stats in per_platform.items():
+        table = Table(title=f"Slowest commands: {platform}")
+        table.add_column("command")
+        for column in ["count", "p50", "p95", "max", "total", "bytes", "parse"]:
+            table.add_column(column, justify="right")
+        for stats in all_stats[:top]:
+            table.add_row(
+                stats.command,
+                str(stats.count),
+                f"{stats.p50:.3f}s",
+                f"{stats.p95:.3f}s",
+                f"{stats.max:.3f}s",
+                f"{stats.seconds:.3f}s",
+                str(stats.bytes),
+                f"{stats.parse_seconds:.3f}s",
+            )
+        Console().print(table)
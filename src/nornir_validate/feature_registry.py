@@ -0,0 +1,124 @@
+import importlib
+import threading
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from .formatting import DeclaredFormatters
+
+# Signature of the format_actual_state function in each feature_templates/<feature>/<feature>_actual_state.py
+FormatActualState = Callable[[bool, str, str, Any], dict[str, Any]]
+# Optional evaluate_actual_state function of a feature, for sub-features whose actual state depends on the desired state
+EvaluateActualState = Callable[[str, str, Any, Any], dict[str, Any] | None]
+FEATURE_PACKAGE = "nornir_validate.feature_templates"
+
+
+# ----------------------------------------------------------------------------
+# REGISTRY: Resolves each feature's format_actual_state function once per process
+# ----------------------------------------------------------------------------
+class FeatureRegistry:
+    """Thread-safe cache of the format_actual_state function of each feature.
+
+    A feature module is imported the first time it is needed (or when warmed), all nornir host threads then share
+    the resolved function. Lookups of an already resolved feature do not take the lock.
+
+    Args:
+        package (str): Package holding the feature directories, defaults to nornir_validate.feature_templates
+    """
+
+    def __init__(self, package: str = FEATURE_PACKAGE) -> None:
+        self.package = package
+        self._lock = threading.Lock()
+        self._formatters: dict[str, FormatActualState] = {}
+        self._evaluators: dict[str, EvaluateActualState | None] = {}
+        self._declared: dict[str, DeclaredFormatters | None] = {}
+
+    def get(self, feature: str) -> FormatActualState:
+        """Gets the format_actual_state function for the feature, importing the feature module if not already resolved.
+
+        Args:
+            feature (str): Feature name used in file path and xx_actual_state.py
+        Raises:
+            ImportError: If the feature module can not be imported or has no format_actual_state function
+        Returns:
+            FormatActualState: The feature's format_actual_state function
+        """
+        formatter = self._formatters.get(feature)
+        if formatter is not None:
+            return formatter
+        with self._lock:
+            # Another thread may have resolved it while waiting for the lock
+            if feature not in self._formatters:
+                module_path = f"{self.package}.{feature}.{feature}_actual_state"
+                try:
+                    module = importlib.import_module(module_path)
+                    self._evaluators[feature] = getattr(
+                        module, "evaluate_actual_state", None
+                    )
+                    self._declared[feature] = getattr(module, "FORMATTERS", None)
+                    self._formatters[feature] = module.format_actual_state
+                except (ImportError, AttributeError) as e:
+                    msg = f"❌ Could not import {module_path}: {e}"
+                    raise ImportError(msg) from e
+            return self._formatters[feature]
+
+    def get_evaluator(self, feature: str) -> EvaluateActualState | None:
+        """Gets the optional evaluate_actual_state function for the feature, importing the feature module if not already resolved.
+
+        Args:
+            feature (str): Feature name used in file path and xx_actual_state.py
+        Returns:
+            EvaluateActualState | None: The feature's evaluate_actual_state function, None if the feature doesn't have one
+        """
+        self.get(feature)
+        return self._evaluators[feature]
+
+    def get_declared(self, feature: str) -> DeclaredFormatters | None:
+        """Gets the declared (compiled) formatters of the feature, importing the feature module if not already resolved.
+
+        Args:
+            feature (str): Feature name used in file path and xx_actual_state.py
+        Returns:
+            DeclaredFormatters | None: The feature's FORMATTERS, None if the feature doesn't declare any sub-features
+        """
+        self.get(feature)
+        return self._declared[feature]
+
+    def warm(self, features: Iterable[str]) -> None:
+        """Resolves the features up front so the first hosts of a run don't stall on (or contend for) the imports.
+
+        Args:
+            features (Iterable[str]): Feature names, such as those returned by validation_features
+        """
+        for feature in features:
+            self.get(feature)
+
+    def clear(self) -> None:
+        """Empties the registry so the features are resolved again on next use."""
+        with self._lock:
+            self._formatters.clear()
+            self._evaluators.clear()
+            self._declared.clear()
+
+
+# ----------------------------------------------------------------------------
+# FEATURES: Gets all the features used in a validation file
+# ----------------------------------------------------------------------------
+def validation_features(input_data: dict[str, Any]) -> set[str]:
+    """Gets the names of all features in a validation file from the all, groups and hosts sections.
+
+    Args:
+        input_data (dict[str, Any]): Validations in the format of the validation (input) file
+    Returns:
+        set[str]: Feature names
+    """
+    features = set(input_data.get("all") or {})
+    for section in ["groups", "hosts"]:
+        for validations in (input_data.get(section) or {}).values():
+            features.update(validations or {})
+    return features
+
+
+# ----------------------------------------------------------------------------
+# SHARED: One registry per process used by validate and val_file_builder
+# ----------------------------------------------------------------------------
+feature_registry = FeatureRegistry()
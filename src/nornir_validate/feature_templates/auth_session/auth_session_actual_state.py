@@ -1,20 +1,9 @@
+from nornir_validate.formatting import make_int
+
+
 # ----------------------------------------------------------------------------
 # DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
-
-    Args:
-        input_data (str): The data to be converted to an integer
-    Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
-    """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
-
-
 # ----------------------------------------------------------------------------
 # ACTUAL_STATE: Engine use to create sub-feature actual state or validation file
 # ----------------------------------------------------------------------------
@@ -36,7 +25,7 @@ def format_actual_state(
     """
     ### MAB_COUNT: {mab_count: xx}
     if sub_feature == "mab_count" or sub_feature == "dot1x_count":
-        return _make_int(output[0].split()[-1])
+        return make_int(output[0].split()[-1])
 
     ### CatchAll
     else:
@@ -1,6 +1,9 @@
+import re
 from collections import defaultdict
 from typing import Any, NamedTuple
 
+from nornir_validate.formatting import RowSchema, fix_nxos, make_int, split_output
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -9,68 +12,69 @@ class OsKeys(NamedTuple):
     nve_vni_bd_vrf: str
 
 
+# Precomputed keys per OS type, the engine passes the resolved OS type so is a straight lookup
+OS_KEYS = {
+    "ios": OsKeys("vrf"),
+    "nxos": OsKeys("bd_vrf"),
+}
+
+
 def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
+    Raises:
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
         OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    if "ios" in os_type:
-        return OsKeys("vrf")
-    elif "nxos" in os_type:
-        return OsKeys("bd_vrf")
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
+# SCHEMA: Field types of the command output rows, coerced in bulk before formatting
 # ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
-
-    Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
-    Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
-    Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
-    """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+NVE_VNI_SCHEMA = RowSchema({"vni": "int_or_str", "bd": "int_or_str"})
 
 
 # ----------------------------------------------------------------------------
 # DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
+def _nxos_nve_format(
+    sub_feature: str, output: list[dict[str, Any]]
+) -> list[dict[str, str]]:
+    """Formats NXOS 'show nve vni/peers | json' into the same data structure as the NTC templates.
 
     Args:
-        input_data (str): The data to be converted to an integer
+        sub_feature (str): The name of the sub-feature that is being validated, nve_vni or nve_peer
+        output (list[dict[str, Any]]): The command output from the device in JSON format
     Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
+        list[dict[str, str]]: List of VNIs (vni, state, mode, type, bd_vrf) or peers (peer, state)
     """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
+    if sub_feature == "nve_vni":
+        nxos_vni_list = []
+        for each_vni in fix_nxos(output[0], "TABLE_nve_vni", "ROW_nve_vni"):
+            # Type is in the format 'L2 [6]' or 'L3 [BLU]'
+            vni_type = re.match(r"^(\S+)\s*\[(.*)\]", str(each_vni.get("type", "")))
+            nxos_vni_list.append(
+                dict(
+                    vni=str(each_vni["vni"]),
+                    state=str(each_vni.get("vni-state", "")),
+                    mode=str(each_vni.get("mode", "")),
+                    type=vni_type.group(1) if vni_type else str(each_vni.get("type")),
+                    bd_vrf=vni_type.group(2) if vni_type else "",
+                )
+            )
+        return nxos_vni_list
+    return [
+        dict(peer=str(each_peer["peer-ip"]), state=str(each_peer["peer-state"]))
+        for each_peer in fix_nxos(output[0], "TABLE_nve_peers", "ROW_nve_peers")
+    ]
 
 
 def format_nve_vni(
@@ -86,12 +90,12 @@ def format_nve_vni(
         dict[str | int, Any]: {l3vni: {bdi_vrf: z, state: Up}}, val file doesn't include state
     """
     result: dict[str | int, dict[str, str | int]] = defaultdict(dict)
-    for each_vni in output:
-        vni = _make_int(each_vni["vni"])
+    for each_vni in NVE_VNI_SCHEMA.coerce(output):
+        vni = each_vni["vni"]
         if "L2" in each_vni["mode"]:
-            result[vni]["bd_vrf"] = _make_int(each_vni["bd"])
+            result[vni]["bd_vrf"] = each_vni["bd"]
         else:
-            result[vni]["bd_vrf"] = _make_int(each_vni[key.nve_vni_bd_vrf])
+            result[vni]["bd_vrf"] = make_int(each_vni[key.nve_vni_bd_vrf])
         # If creating actual state
         if not val_file:
             result[vni]["state"] = each_vni["state"]
@@ -142,7 +146,11 @@ def format_actual_state(
         dict[Any, Any] | list[str]: Returns cmd output formatted into the data structure of actual state or validation file
     """
     key = _set_keys(os_type)
-    raw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    raw_output, ntc_output = split_output(os_type, sub_feature, output)
+
+    # NXOS: Converts JSON output into the same data structure as the NTC templates
+    if bool(re.search("nxos", os_type)):
+        ntc_output = _nxos_nve_format(sub_feature, ntc_output)
 
     ### NVE_VNI: {l3vni: {bdi_vrf: z, state: Up}}, val file doesn't include state
     if sub_feature == "nve_vni":
@@ -1,5 +1,7 @@
 from typing import NamedTuple
 
+from nornir_validate.formatting import make_int, split_output
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -9,70 +11,33 @@ class OsKeys(NamedTuple):
     conn_pos: int
 
 
-def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
-
-    Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-    Returns:
-        OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
-    """
-    if "asa" in os_type:
-        return OsKeys(0, -1)
-    elif "panos" in os_type:
-        return OsKeys(1, -2)
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
+# Precomputed keys per OS type, the engine passes the resolved OS type so is a straight lookup
+OS_KEYS = {
+    "asa": OsKeys(0, -1),
+    "panos": OsKeys(1, -2),
+}
 
 
-# ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
-# ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
+def _set_keys(os_type: str) -> OsKeys:
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
     Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
+        OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
 # DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
-
-    Args:
-        input_data (str): The data to be converted to an integer
-    Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
-    """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
-
-
 def format_conn_count(key: OsKeys, output: list[str]) -> str | int:
     """Format FW conns into the data structure.
 
@@ -82,7 +47,7 @@ def format_conn_count(key: OsKeys, output: list[str]) -> str | int:
     Returns:
         str:  {conn_count: xx}
     """
-    return _make_int(output[key.conn_line].split()[key.conn_pos])
+    return make_int(output[key.conn_line].split()[key.conn_pos])
 
 
 # ----------------------------------------------------------------------------
@@ -105,7 +70,7 @@ def format_actual_state(
         dict[str, Any]: Returns cmd output formatted into the data structure of actual state or validation file
     """
     key = _set_keys(os_type)
-    raw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    raw_output, ntc_output = split_output(os_type, sub_feature, output)
 
     ### FW_CONN_COUNT: {conn_count: xx}
     if sub_feature == "conn_count":
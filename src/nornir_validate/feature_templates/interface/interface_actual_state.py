@@ -2,6 +2,9 @@ import re
 from collections import defaultdict
 from typing import Any, NamedTuple
 
+from nornir_validate.formatting import RowSchema, fix_nxos, make_int, split_output
+from nornir_validate.intf_name import STATUS_ABBR, abbreviate_intf
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -15,103 +18,88 @@ class OsKeys(NamedTuple):
     ip_status: str
 
 
+# Precomputed keys per OS type, the engine passes the resolved OS type so is a straight lookup
+OS_KEYS = {
+    "ios": OsKeys("port", "vlan_id", "status", "interface", "ip_address", "status"),
+    "nxos": OsKeys("port", "vlan_id", "status", "intf-name", "prefix", "link-state"),
+    "asa": OsKeys(
+        "interface",
+        "interface_zone",
+        "link_status",
+        "interface",
+        "ip_address",
+        "status",
+    ),
+    "wlc": OsKeys("port", "stp_status", "link_status", "name", "ip_address", "status"),
+    "panos": OsKeys("interface", "", "state", "interface", "ip_address", "state"),
+}
+
+
 def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
+    Raises:
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
         OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    if "ios" in os_type:
-        return OsKeys("port", "vlan_id", "status", "interface", "ip_address", "status")
-    elif "nxos" in os_type:
-        return OsKeys("port", "vlan_id", "status", "intf-name", "prefix", "link-state")
-    elif "asa" in os_type:
-        return OsKeys(
-            "interface",
-            "interface_zone",
-            "link_status",
-            "interface",
-            "ip_address",
-            "status",
-        )
-    elif "wlc" in os_type:
-        return OsKeys(
-            "port", "stp_status", "link_status", "name", "ip_address", "status"
-        )
-    elif "panos" in os_type:
-        return OsKeys("interface", "", "state", "interface", "ip_address", "state")
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
+# SCHEMA: Field types of the command output rows, coerced in bulk before formatting
 # ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
-
-    Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
-    Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
-    Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
-    """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+SWPORT_SCHEMA = RowSchema({"access_vlan": "int_or_str"})
 
 
 # ----------------------------------------------------------------------------
 # DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
+def _nxos_intf_format(output: list[dict[str, Any]]) -> list[dict[str, str]]:
+    """Formats NXOS 'show interface status | json' into the same data structure as the NTC template.
 
     Args:
-        input_data (str): The data to be converted to an integer
+        output (list[dict[str, Any]]): The command output from the device in JSON format
     Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
+        list[dict[str, str]]: List of dictionaries with the port, status, vlan_id, duplex, speed and type of each interface
     """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
+    return [
+        dict(
+            port=abbreviate_intf(str(each_intf["interface"]), STATUS_ABBR),
+            name=str(each_intf.get("name", "")),
+            status=str(each_intf.get("state", "")),
+            vlan_id=str(each_intf.get("vlan", "")),
+            duplex=str(each_intf.get("duplex", "")),
+            speed=str(each_intf.get("speed", "")),
+            type=str(each_intf.get("type", "")),
+        )
+        for each_intf in fix_nxos(output[0], "TABLE_interface", "ROW_interface")
+    ]
 
 
-def _fix_nxos(
-    main_dict: dict[str, Any], parent_name: str, child_name: str
-) -> list[dict[str, Any]]:
-    """NXOS JSON makes dict rather than list if only 1 item in output. If the child_dict is a dict this methods convert it to a list.
+def _nxos_swport_format(output: list[dict[str, Any]]) -> list[dict[str, str]]:
+    """Formats NXOS 'show interface switchport | json' into the same data structure as the NTC template.
 
     Args:
-        main_dict (dict[str, Any]): The dictionary of the command output
-        parent_name (str): The parent dictionary key name (e.g. TABLE_xx)
-        child_name (str): The key of the dictionary that you want to fix, for example ROW_xx
+        output (list[dict[str, Any]]): The command output from the device in JSON format
     Returns:
-        A list of dictionaries
+        list[dict[str, str]]: List of dictionaries with the interface, mode, access_vlan and trunking_vlans of each switchport
     """
-    child_dict_value: list[dict[str, Any]] | dict[str, Any] = main_dict[parent_name][
-        child_name
+    return [
+        dict(
+            interface=str(each_intf["interface"]),
+            mode=str(each_intf.get("oper_mode", "")),
+            access_vlan=str(each_intf.get("access_vlan", "")),
+            trunking_vlans=str(each_intf.get("trunk_vlans", "")),
+        )
+        for each_intf in fix_nxos(output[0], "TABLE_interface", "ROW_interface")
     ]
-    if isinstance(child_dict_value, dict):
-        child_dict_value = [child_dict_value]
-    return child_dict_value
 
 
 def _make_none(
@@ -150,6 +138,8 @@ def format_intf(
     skip_statuses = {
         "disabled",
         "xcvrAbsen",
+        "xcvrAbsent",
+        "sfpAbsent",
         "administratively down",
         "admin down",
         "Down",
@@ -158,33 +148,33 @@ def format_intf(
         "down",
     }
     for each_intf in output:
-        intf_name = _make_int(each_intf[key.intf_name])
+        intf_name = make_int(each_intf[key.intf_name])
         # BYPASS: Dont include disabled ports when building val_file
         if val_file and each_intf[key.intf_status] in skip_statuses:
             continue
         # SPEED/DUPLEX: WLC doesnt have standard duplex and speed NTC keys
         if bool(re.search("wlc", os_type)):
-            result[intf_name]["speed"] = _make_int(
+            result[intf_name]["speed"] = make_int(
                 each_intf["physical_status"].split()[0]
             )
             try:
-                duplex = _make_int(each_intf["physical_status"].split()[1])
+                duplex = make_int(each_intf["physical_status"].split()[1])
                 result[intf_name]["duplex"] = duplex
             except IndexError:
                 result[intf_name]["duplex"] = each_intf["physical_status"]
         # SPEED/DUPLEX: actual file
         elif not val_file:
             result[intf_name]["duplex"] = _make_none(each_intf, "duplex")
-            result[intf_name]["speed"] = _make_int(each_intf["speed"])
+            result[intf_name]["speed"] = make_int(each_intf["speed"])
             result[intf_name]["speed"] = _make_none(result[intf_name], "speed")
         # SPEED/DUPLEX: Val file
         elif val_file:
             if len(each_intf["duplex"]) != 0:
                 result[intf_name]["duplex"] = each_intf["duplex"]
             if len(each_intf["speed"]) != 0:
-                result[intf_name]["speed"] = _make_int(each_intf["speed"])
+                result[intf_name]["speed"] = make_int(each_intf["speed"])
         # TYPE: Applies to actual_state and val_file
-        if isinstance(_make_int(each_intf.get(key.intf_type, "x")), int):
+        if isinstance(make_int(each_intf.get(key.intf_type, "x")), int):
             result[intf_name]["type"] = "access"
         # TYPE: Actual_state only
         elif not val_file:
@@ -211,7 +201,7 @@ def format_swport(val_file: bool, output: list[dict[str, Any]]) -> dict[str, Any
     """
     result: dict[str, dict[str, str | int | list[str] | None]] = defaultdict(dict)
 
-    for each_intf in output:
+    for each_intf in SWPORT_SCHEMA.coerce(output):
         # BYPASS: Dont include disabled ports when building val_file
         skip_statuses = {"down", ""}
         if val_file and each_intf["mode"] in skip_statuses:
@@ -222,13 +212,13 @@ def format_swport(val_file: bool, output: list[dict[str, Any]]) -> dict[str, Any
             mode = each_intf["mode"].replace("static ", "").split()[0]
         result[each_intf["interface"]]["mode"] = mode
         if each_intf["mode"] == "static access" or each_intf["mode"] == "access":
-            result[each_intf["interface"]]["vlan"] = _make_int(each_intf["access_vlan"])
+            result[each_intf["interface"]]["vlan"] = each_intf["access_vlan"]
         elif bool(re.search("trunk", each_intf["mode"])):
             trunk_vl = each_intf["trunking_vlans"]
             try:
-                trunk_vl = [_make_int(vl) for vl in trunk_vl.split(",")]
+                trunk_vl = [make_int(vl) for vl in trunk_vl.split(",")]
             except AttributeError:
-                trunk_vl = [_make_int(vl) for vl in trunk_vl[0].split(",")]
+                trunk_vl = [make_int(vl) for vl in trunk_vl[0].split(",")]
             result[each_intf["interface"]]["vlan"] = trunk_vl
         else:
             result[each_intf["interface"]]["vlan"] = None
@@ -254,7 +244,7 @@ def format_ipbrief(
         key.ip_status: ["administratively down", "admin-down"],
     }
     if bool(re.search("nxos", os_type)):
-        output = _fix_nxos(output[0], "TABLE_intf", "ROW_intf")
+        output = fix_nxos(output[0], "TABLE_intf", "ROW_intf")
     for each_intf in output:
         # Val file only
         if val_file:
@@ -309,7 +299,14 @@ def format_actual_state(
         dict[str | int, Any]: Returns cmd output formatted into the data structure of actual state or validation file
     """
     key = _set_keys(os_type)
-    aw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    aw_output, ntc_output = split_output(os_type, sub_feature, output)
+
+    # NXOS: Converts JSON output into the same data structure as the NTC templates
+    if bool(re.search("nxos", os_type)):
+        if sub_feature == "intf":
+            ntc_output = _nxos_intf_format(ntc_output)
+        elif sub_feature == "switchport":
+            ntc_output = _nxos_swport_format(ntc_output)
 
     ### INTF: {intf: {duplex: x, speed: x, type:x, connected }}
     if sub_feature == "intf":
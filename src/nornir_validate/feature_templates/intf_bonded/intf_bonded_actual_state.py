@@ -2,6 +2,9 @@ import re
 from collections import defaultdict
 from typing import Any, NamedTuple
 
+from nornir_validate.formatting import fix_nxos, make_int, split_output
+from nornir_validate.intf_name import STATUS_ABBR, abbreviate_intf
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -13,90 +16,31 @@ class OsKeys(NamedTuple):
     po_intf: str
 
 
-def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
+# Precomputed keys per OS type, the engine passes the resolved OS type so is a straight lookup
+_PO_KEYS = OsKeys("bundle_name", "bundle_status", "bundle_protocol", "member_interface")
+OS_KEYS = {"ios": _PO_KEYS, "nxos": _PO_KEYS, "asa": _PO_KEYS}
 
-    Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-    Returns:
-        OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
-    """
-    if "ios" in os_type or "nxos" in os_type or "asa" in os_type:
-        return OsKeys(
-            "bundle_name", "bundle_status", "bundle_protocol", "member_interface"
-        )
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
 
-
-# ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
-# ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
+def _set_keys(os_type: str) -> OsKeys:
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
     Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
+        OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
 # DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
-
-    Args:
-        input_data (str): The data to be converted to an integer
-    Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
-    """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
-
-
-def _fix_nxos(
-    main_dict: dict[str, Any], parent_name: str, child_name: str
-) -> list[dict[str, Any]]:
-    """NXOS JSON makes dict rather than list if only 1 item in output. If the child_dict is a dict this methods convert it to a list.
-
-    Args:
-        main_dict (dict[str, Any]): The dictionary of the command output
-        parent_name (str): The parent dictionary key name (e.g. TABLE_xx)
-        child_name (str): The key of the dictionary that you want to fix, for example ROW_xx
-    Returns:
-        A list of dictionaries
-    """
-    child_dict_value: list[dict[str, Any]] | dict[str, Any] = main_dict[parent_name][
-        child_name
-    ]
-    if isinstance(child_dict_value, dict):
-        child_dict_value = [child_dict_value]
-    return child_dict_value
-
-
 def _format_status(status: str) -> str:
     """Takes the status and for NXOS removes additional letters and brackets and returns a string.
 
@@ -110,6 +54,31 @@ def _format_status(status: str) -> str:
     return status.replace("(", "").replace(")", "")
 
 
+def _nxos_po_format(output: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Formats NXOS 'show port-channel summary | json' into the same data structure as the NTC template.
+
+    Args:
+        output (list[dict[str, Any]]): The command output from the device in JSON format
+    Returns:
+        list[dict[str, Any]]: List of port-channels with bundle name, protocol, status and list of member interfaces and member statuses
+    """
+    nxos_po_list = []
+    for each_po in fix_nxos(output[0], "TABLE_channel", "ROW_channel"):
+        members = fix_nxos(each_po, "TABLE_member", "ROW_member")
+        nxos_po_list.append(
+            dict(
+                bundle_name=abbreviate_intf(str(each_po["port-channel"]), STATUS_ABBR),
+                bundle_protocol=str(each_po.get("prtcl", "NONE")),
+                bundle_status=f"({each_po.get('layer', '')}{each_po.get('status', '')})",
+                member_interface=[
+                    abbreviate_intf(str(m["port"]), STATUS_ABBR) for m in members
+                ],
+                member_interface_status=[f"({m['port-status']})" for m in members],
+            )
+        )
+    return nxos_po_list
+
+
 def format_po(
     val_file: bool, key: OsKeys, output: list[dict[str, Any]]
 ) -> dict[str, Any]:
@@ -163,10 +132,10 @@ def format_vpc_peer(val_file: bool, output: list[dict[str, Any]]) -> dict[str, A
     result["role"] = output[0]["vpc-role"]
     peer_link = output[0]["TABLE_peerlink"]["ROW_peerlink"]
     trunk_vl = peer_link["peer-up-vlan-bitset"]
-    result["peerlink_vlans"] = [_make_int(vl) for vl in trunk_vl.split(",")]
+    result["peerlink_vlans"] = [make_int(vl) for vl in trunk_vl.split(",")]
     # If creating actual state also needs state (is implicit in val file)
     if not val_file:
-        result["peerlink_port_state"] = _make_int(peer_link["peer-link-port-state"])
+        result["peerlink_port_state"] = make_int(peer_link["peer-link-port-state"])
         result["peer_status"] = output[0]["vpc-peer-status"]
         result["keepalive_status"] = output[0]["vpc-peer-keepalive-status"]
         result["vlan_consistency"] = output[0]["vpc-per-vlan-peer-consistency"]
@@ -185,15 +154,15 @@ def format_vpcs(val_file: bool, output: list[dict[str, str]]) -> dict[str | int,
         dict[str | int, Any]: {vpc_xx: {'po': x, 'vlans': [x,y], 'port_state': x, 'consistency_status': x}, val_file {vpc_xx: {'po': x, 'vlans': [x,y]}
     """
     result: dict[str | int, dict[str, str | int | list[str | int]]] = defaultdict(dict)
-    all_vpcs = _fix_nxos(output[0], "TABLE_vpc", "ROW_vpc")
+    all_vpcs = fix_nxos(output[0], "TABLE_vpc", "ROW_vpc")
     for vpc in all_vpcs:
-        vpc_id = _make_int(vpc["vpc-id"])
+        vpc_id = make_int(vpc["vpc-id"])
         result[vpc_id]["po"] = vpc["vpc-ifindex"]
         trunk_vl = vpc["up-vlan-bitset"]
-        result[vpc_id]["vlans"] = [_make_int(vl) for vl in trunk_vl.split(",")]
+        result[vpc_id]["vlans"] = [make_int(vl) for vl in trunk_vl.split(",")]
         # If creating actual state also needs state (is implicit in val file)
         if not val_file:
-            result[vpc_id]["port_state"] = _make_int(vpc["vpc-port-state"])
+            result[vpc_id]["port_state"] = make_int(vpc["vpc-port-state"])
             result[vpc_id]["consistency_status"] = vpc["vpc-consistency-status"]
     return dict(result)
 
@@ -218,7 +187,11 @@ def format_actual_state(
         dict[str, Any]: Returns cmd output formatted into the data structure of actual state or validation file
     """
     key = _set_keys(os_type)
-    aw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    aw_output, ntc_output = split_output(os_type, sub_feature, output)
+
+    # NXOS: Converts JSON output into the same data structure as the NTC templates
+    if bool(re.search("nxos", os_type)) and sub_feature == "port_channel":
+        ntc_output = _nxos_po_format(ntc_output)
 
     ### PORT_CHANNEL: {po_name: {protocol: type, status: code, members: {intf_name: {mbr_status: code}}}}
     if sub_feature == "port_channel":
@@ -1,6 +1,10 @@
+import re
 from collections import defaultdict
 from typing import Any, NamedTuple
 
+from nornir_validate.formatting import RowSchema, fix_nxos, make_int, split_output
+from nornir_validate.intf_name import STATUS_ABBR, abbreviate_intf
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -11,65 +15,79 @@ class OsKeys(NamedTuple):
     mac_table_idx: int
 
 
+# Precomputed keys per OS type, the engine passes the resolved OS type so is a straight lookup
+OS_KEYS = {
+    "ios": OsKeys("Vlan", -1, 1),
+    "nxos": OsKeys("enet", 0, 1),
+}
+
+
 def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
+    Raises:
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
         OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    if "ios" in os_type:
-        return OsKeys("Vlan", -1, 1)
-    elif "nxos" in os_type:
-        return OsKeys("enet", 0, 1)
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
+# SCHEMA: Field types of the command output rows, coerced in bulk before formatting
 # ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
-
-    Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
-    Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
-    Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
-    """
-    raw_output = [str(o) for o in output if isinstance(o, (str, int))]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if len(raw_output) != 0 and output != raw_output:
-        pass  # Pass instead of RAISE as it changes all int into str (makes MYPY checks easier)
-    elif len(ntc_output) != 0 and output != ntc_output:
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+VLAN_SCHEMA = RowSchema({"vlan_id": "int_or_str"})
 
 
 # ----------------------------------------------------------------------------
 # DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
+def _nxos_vlan_intf(ifidx: str | list[str]) -> list[str]:
+    """Expands NXOS JSON VLAN member ports (comma separated with ranges) into a list of abbreviated interface names.
 
     Args:
-        input_data (str): The data to be converted to an integer
+        ifidx (str | list[str]): Member ports, for example 'port-channel1,Ethernet1/21-24', is a list if a long output
     Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
+        list[str]: List of individual interfaces, for example ['Po1', 'Eth1/21', 'Eth1/22', 'Eth1/23', 'Eth1/24']
     """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
+    all_intf: list[str] = []
+    ifidx = ",".join(ifidx) if isinstance(ifidx, list) else ifidx
+    for each_intf in [i.strip() for i in ifidx.split(",") if i.strip()]:
+        each_intf = abbreviate_intf(each_intf, STATUS_ABBR)
+        intf_range = re.match(r"^(.*\D)(\d+)-(\d+)$", each_intf)
+        if intf_range:
+            name, first, last = intf_range.groups()
+            all_intf.extend(f"{name}{x}" for x in range(int(first), int(last) + 1))
+        else:
+            all_intf.append(each_intf)
+    return all_intf
+
+
+def _nxos_vlan_format(output: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Formats NXOS 'show vlan brief | json' into the same data structure as the NTC template.
+
+    Args:
+        output (list[dict[str, Any]]): The command output from the device in JSON format
+    Returns:
+        list[dict[str, Any]]: List of VLANs with the vlan_id, vlan_name, status and list of member interfaces
+    """
+    return [
+        dict(
+            vlan_id=str(each_vl["vlanshowbr-vlanid"]),
+            vlan_name=str(each_vl.get("vlanshowbr-vlanname", "")),
+            status=str(each_vl.get("vlanshowbr-vlanstate", "")),
+            interfaces=_nxos_vlan_intf(each_vl.get("vlanshowplist-ifidx", "")),
+        )
+        for each_vl in fix_nxos(
+            output[0], "TABLE_vlanbriefxbrief", "ROW_vlanbriefxbrief"
+        )
+    ]
 
 
 def format_vlan(output: list[dict[str, Any]]) -> dict[str | int, Any]:
@@ -81,8 +99,8 @@ def format_vlan(output: list[dict[str, Any]]) -> dict[str | int, Any]:
         dict[str | int, Any]: {vlan: {name: x, intf:[x,y]}}
     """
     result: dict[str | int, dict[str, dict[str, list[str]]]] = defaultdict(dict)
-    for each_vl in output:
-        vl_id = _make_int(each_vl["vlan_id"])
+    for each_vl in VLAN_SCHEMA.coerce(output):
+        vl_id = each_vl["vlan_id"]
         result[vl_id]["name"] = each_vl["vlan_name"]
         result[vl_id]["intf"] = each_vl["interfaces"]
     for each_item in [1002, 1003, 1004, 1005]:
@@ -101,20 +119,16 @@ def format_stp(val_file: bool, output: list[dict[str, Any]]) -> dict[str | int,
         dict[str | int, Any]: {vlan: {intfx: FWD, intfy: FWD}}, if val_file is {vlan: {'intf': [intfx, intfy]}}
     """
     result: dict[str | int, dict[str, Any]] = defaultdict(dict)
-    for each_vl in output:
+    for each_vl in VLAN_SCHEMA.coerce(output):
         # If creating actual state
         if not val_file:
-            result[_make_int(each_vl["vlan_id"])][each_vl["interface"]] = each_vl[
-                "status"
-            ]
+            result[each_vl["vlan_id"]][each_vl["interface"]] = each_vl["status"]
         # If creating validation file
         elif val_file:
-            if result.get(_make_int(each_vl["vlan_id"])) is None:
-                result[_make_int(each_vl["vlan_id"])]["intf"] = [each_vl["interface"]]
-            elif isinstance(result[_make_int(each_vl["vlan_id"])]["intf"], list):
-                result[_make_int(each_vl["vlan_id"])]["intf"].append(
-                    each_vl["interface"]
-                )
+            if result.get(each_vl["vlan_id"]) is None:
+                result[each_vl["vlan_id"]]["intf"] = [each_vl["interface"]]
+            elif isinstance(result[each_vl["vlan_id"]]["intf"], list):
+                result[each_vl["vlan_id"]]["intf"].append(each_vl["interface"])
     return dict(result)
 
 
@@ -130,7 +144,7 @@ def format_mac_table(key: OsKeys, output: list[str]) -> dict[str, str | int]:
     result = {}
     # Total MAC count is always first element in list
     try:
-        result["total_mac_count"] = _make_int(output[0].split()[-1])
+        result["total_mac_count"] = make_int(output[0].split()[-1])
     except Exception as e:
         result["total_mac_count"] = 0
     # Per-VLAN MAC count are in 2 consecutive cmds, first VL to match on and second the count
@@ -138,7 +152,7 @@ def format_mac_table(key: OsKeys, output: list[str]) -> dict[str, str | int]:
         each_item = str(each_item)
         if key.mac_table_match in each_item:
             name = f"vl{each_item.split()[key.mac_table_element].replace(':', '')}_mac_count"
-            result[name] = _make_int(output[idx + key.mac_table_idx].split()[-1])
+            result[name] = make_int(output[idx + key.mac_table_idx].split()[-1])
             output[idx] = ""
             output[idx + 1] = ""
     return dict(result)
@@ -164,7 +178,11 @@ def format_actual_state(
         dict[Any, Any]: Returns cmd output formatted into the data structure of actual state or validation file
     """
     key = _set_keys(os_type)
-    raw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    raw_output, ntc_output = split_output(os_type, sub_feature, output, int_as_str=True)
+
+    # NXOS: Converts JSON output into the same data structure as the NTC templates
+    if bool(re.search("nxos", os_type)) and sub_feature == "vlan":
+        ntc_output = _nxos_vlan_format(ntc_output)
 
     ### VLAN: {vlan: {name: x, intf:[x,y]}}
     if sub_feature == "vlan":
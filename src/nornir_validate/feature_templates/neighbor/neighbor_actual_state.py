@@ -1,6 +1,10 @@
+import re
 from collections import defaultdict
 from typing import Any, NamedTuple
 
+from nornir_validate.formatting import fix_nxos, split_output
+from nornir_validate.intf_name import CDP_ABBR, abbreviate_intf
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -11,56 +15,68 @@ class OsKeys(NamedTuple):
     cdp_remote: str
 
 
+# Precomputed keys per OS type, the engine passes the resolved OS type so is a straight lookup
+OS_KEYS = {
+    "ios": OsKeys("local_interface", "neighbor_name", "neighbor_interface"),
+    "nxos": OsKeys("local_interface", "neighbor_name", "neighbor_interface"),
+    "wlc": OsKeys("local_interface", "chassis_id", "neighbor_interface"),
+}
+
+
 def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
+    Raises:
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
         OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    if "ios" in os_type or "nxos" in os_type:
-        return OsKeys("local_interface", "neighbor_name", "neighbor_interface")
-    elif "wlc" in os_type:
-        return OsKeys("local_interface", "chassis_id", "neighbor_interface")
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
+# DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
+def _nxos_nbr_format(
+    sub_feature: str, output: list[dict[str, Any]]
+) -> list[dict[str, str]]:
+    """Formats NXOS 'show cdp/lldp neighbors | json' into the same data structure as the NTC templates.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
-    Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
+        sub_feature (str): The name of the sub-feature that is being validated, cdp or lldp
+        output (list[dict[str, Any]]): The command output from the device in JSON format
     Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
+        list[dict[str, str]]: List of neighbors with the local_interface, neighbor_name and neighbor_interface
     """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+    if sub_feature == "cdp":
+        return [
+            dict(
+                local_interface=abbreviate_intf(str(each_nbr["intf_id"]), CDP_ABBR),
+                neighbor_name=str(each_nbr["device_id"]),
+                neighbor_interface=abbreviate_intf(str(each_nbr["port_id"]), CDP_ABBR),
+            )
+            for each_nbr in fix_nxos(
+                output[0],
+                "TABLE_cdp_neighbor_brief_info",
+                "ROW_cdp_neighbor_brief_info",
+            )
+        ]
+    return [
+        dict(
+            local_interface=abbreviate_intf(str(each_nbr["l_port_id"]), CDP_ABBR),
+            neighbor_name=str(each_nbr["chassis_id"]),
+            neighbor_interface=str(each_nbr["port_id"]),
+        )
+        for each_nbr in fix_nxos(output[0], "TABLE_nbor", "ROW_nbor")
+    ]
 
 
-# ----------------------------------------------------------------------------
-# DEF: Mini-functions used by the main function
-# ----------------------------------------------------------------------------
 def format_cdp_lldp_nbr(key: OsKeys, output: list[dict[str, str]]) -> dict[str, Any]:
     """Format CDP or LLDP neighbors into the data structure.
 
@@ -97,7 +113,11 @@ def format_actual_state(
         dict[str, dict[str, str]]: Returns cmd output formatted into the data structure of actual state or validation file
     """
     key = _set_keys(os_type)
-    raw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    raw_output, ntc_output = split_output(os_type, sub_feature, output)
+
+    # NXOS: Converts JSON output into the same data structure as the NTC templates
+    if bool(re.search("nxos", os_type)) and sub_feature in ["cdp", "lldp"]:
+        ntc_output = _nxos_nbr_format(sub_feature, ntc_output)
 
     ### CDP/LLDP: {intf: {nbr_name: xx, nbr_intf: yy}}
     if sub_feature == "cdp" or sub_feature == "lldp":
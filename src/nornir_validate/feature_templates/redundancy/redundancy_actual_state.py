@@ -2,6 +2,13 @@ import re
 from collections import defaultdict
 from typing import Any, NamedTuple
 
+from nornir_validate.formatting import (
+    DeclaredFormatters,
+    FormatterSpec,
+    RowSchema,
+    split_output,
+)
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -11,74 +18,57 @@ class OsKeys(NamedTuple):
     ha_state_peer: str
 
 
+# Precomputed keys per OS type, the engine passes the resolved OS type so is a straight lookup
+OS_KEYS = {
+    "ios": OsKeys("active_software_state", "standby_software_state"),
+    "asa": OsKeys("service_state", "service_state_mate"),
+    "wlc": OsKeys("local_state", "peer_state"),
+    "panos": OsKeys("state", ""),
+}
+
+
 def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
+    Raises:
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
         OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    if "ios" in os_type:
-        return OsKeys("active_software_state", "standby_software_state")
-    elif "asa" in os_type:
-        return OsKeys("service_state", "service_state_mate")
-    elif "wlc" in os_type:
-        return OsKeys("local_state", "peer_state")
-    elif "panos" in os_type:
-        return OsKeys("state", "")
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
+# SCHEMA: Field types of the command output rows, coerced in bulk before formatting
 # ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
-
-    Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
-    Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
-    Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
-    """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+SW_STACK_SCHEMA = RowSchema({"switch": "int_or_str", "priority": "int_or_str"})
 
 
 # ----------------------------------------------------------------------------
-# DEF: Mini-functions used by the main function
+# DECLARED: Sub-features formatted by compiled declarations, the hand-written formatters are the fallback
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
-
-    Args:
-        input_data (str): The data to be converted to an integer
-    Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
-    """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
+FORMATTERS = DeclaredFormatters(
+    {
+        "sw_stack": FormatterSpec(
+            key="switch",
+            fields={"role": "role", "priority": "priority", "state": "state"},
+            schema=SW_STACK_SCHEMA,
+            actual_only=("state",),
+            key_format="switch{}",
+        ),
+    }
+)
 
 
+# ----------------------------------------------------------------------------
+# DEF: Mini-functions used by the main function
+# ----------------------------------------------------------------------------
 def format_ha_state(
     key: OsKeys, os_type: str, output: list[dict[str, Any]]
 ) -> dict[str, str]:
@@ -115,10 +105,10 @@ def format_sw_stack(val_file: bool, output: list[dict[str, Any]]) -> dict[str, A
         dict[str, Any]: {switchx: {priority: x, role: x, state: x}}, val)file doesn't have 'state: x'
     """
     result: dict[str, dict[str, str | int]] = defaultdict(dict)
-    for each_swi in output:
-        swi = f"switch{_make_int(each_swi['switch'])}"
+    for each_swi in SW_STACK_SCHEMA.coerce(output):
+        swi = f"switch{each_swi['switch']}"
         result[swi]["role"] = each_swi["role"]
-        result[swi]["priority"] = _make_int(each_swi["priority"])
+        result[swi]["priority"] = each_swi["priority"]
         result[swi]["role"] = each_swi["role"]
         # If creating actual state also needs state (is implicit in val file)
         if not val_file:
@@ -130,7 +120,7 @@ def format_sw_stack(val_file: bool, output: list[dict[str, Any]]) -> dict[str, A
 # ACTUAL_STATE: Engine use to create sub-feature actual state or validation file
 # ----------------------------------------------------------------------------
 def format_actual_state(
-    val_file: bool,  # noqa: ARG001
+    val_file: bool,
     os_type: str,
     sub_feature: str,
     output: list[str | dict[str, str]],
@@ -145,8 +135,12 @@ def format_actual_state(
     Returns:
         dict[str, Any]: Returns cmd output formatted into the data structure of actual state or validation file
     """
+    # DECLARED: Sub-features with a formatter declaration, any others use the hand-written formatters
+    formatted = FORMATTERS.format(val_file, os_type, sub_feature, output)
+    if formatted is not None:
+        return formatted
     key = _set_keys(os_type)
-    raw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    raw_output, ntc_output = split_output(os_type, sub_feature, output)
 
     ### HA_STATE: {local_state: x, peer_state: x}
     if sub_feature == "ha_state":
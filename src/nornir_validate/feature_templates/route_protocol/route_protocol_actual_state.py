@@ -2,6 +2,9 @@ import re
 from collections import Counter, defaultdict
 from typing import Any, NamedTuple
 
+from nornir_validate.formatting import fix_nxos, make_int, split_output
+from nornir_validate.intf_name import canonical_intf
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -13,74 +16,96 @@ class OsKeys(NamedTuple):
     bgp_pfxrcd: str
 
 
+# Precomputed keys per OS type, the engine passes the resolved OS type so is a straight lookup
+OS_KEYS = {
+    "ios": OsKeys(
+        "neighbor_id", "bgp_neighbor", "neighbor_as", "state_or_prefixes_received"
+    ),
+    "nxos": OsKeys("neighbor_id", "bgp_neigh", "neigh_as", "state_pfxrcd"),
+    "asa": OsKeys("neighbor_id", "bgp_neigh", "neigh_as", "state_pfxrcd"),
+    "panos": OsKeys("", "bgp_neighbor", "neighbor_as", "accepted_pfx"),
+}
+
+
 def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
+    Raises:
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
         OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    if "ios" in os_type:
-        return OsKeys(
-            "neighbor_id", "bgp_neighbor", "neighbor_as", "state_or_prefixes_received"
-        )
-    elif "nxos" in os_type:  # noqa: SIM114
-        return OsKeys("neighbor_id", "bgp_neigh", "neigh_as", "state_pfxrcd")
-    elif "asa" in os_type:
-        return OsKeys("neighbor_id", "bgp_neigh", "neigh_as", "state_pfxrcd")
-    elif "panos" in os_type:
-        return OsKeys("", "bgp_neighbor", "neighbor_as", "accepted_pfx")
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
+# DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
+def _nxos_ospf_format(output: list[dict[str, Any]]) -> list[dict[str, str]]:
+    """Formats NXOS 'show ip ospf interface brief/neighbor vrf all | json' into the same data structure as the NTC templates.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
-    Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
+        output (list[dict[str, Any]]): The command output from the device in JSON format, one dict for OSPF interfaces and one for neighbors
     Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
+        list[dict[str, str]]: OSPF interfaces (process, vrf, interface, area) followed by OSPF neighbors (interface, neighbor_id, state)
     """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
-
-
-# ----------------------------------------------------------------------------
-# DEF: Mini-functions used by the main function
-# ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
+    nxos_ospf_list = []
+    for each_cmd in output:
+        for each_ctx in fix_nxos(each_cmd, "TABLE_ctx", "ROW_ctx"):
+            for each_intf in fix_nxos(each_ctx, "TABLE_intf", "ROW_intf"):
+                nxos_ospf_list.append(
+                    dict(
+                        process=str(each_ctx["ptag"]),
+                        vrf=str(each_ctx.get("cname", "")),
+                        interface=str(each_intf["ifname"]),
+                        area=str(each_intf["area"]),
+                    )
+                )
+            for each_nbr in fix_nxos(each_ctx, "TABLE_nbr", "ROW_nbr"):
+                nxos_ospf_list.append(
+                    dict(
+                        interface=str(each_nbr["intf"]),
+                        neighbor_id=str(each_nbr["rid"]),
+                        state=str(each_nbr["state"]),
+                    )
+                )
+    return nxos_ospf_list
+
+
+def _nxos_bgp_format(output: list[dict[str, Any]]) -> list[dict[str, str]]:
+    """Formats NXOS 'show ip bgp all summary vrf all | json' into the same data structure as the NTC template.
 
     Args:
-        input_data (str): The data to be converted to an integer
+        output (list[dict[str, Any]]): The command output from the device in JSON format
     Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
+        list[dict[str, str]]: List of BGP peers with vrf, address_family, bgp_neigh, neigh_as and state_pfxrcd
     """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
+    nxos_bgp_list = []
+    for each_vrf in fix_nxos(output[0], "TABLE_vrf", "ROW_vrf"):
+        for each_af in fix_nxos(each_vrf, "TABLE_af", "ROW_af"):
+            for each_saf in fix_nxos(each_af, "TABLE_saf", "ROW_saf"):
+                for each_peer in fix_nxos(each_saf, "TABLE_neighbor", "ROW_neighbor"):
+                    # Same as CLI, received prefixes only shown if the peer is up
+                    if each_peer["state"] == "Established":
+                        state_pfxrcd = str(each_peer["prefixreceived"])
+                    else:
+                        state_pfxrcd = str(each_peer["state"])
+                    nxos_bgp_list.append(
+                        dict(
+                            vrf=str(each_vrf["vrf-name-out"]),
+                            address_family=str(each_saf["af-name"]),
+                            bgp_neigh=str(each_peer["neighborid"]),
+                            neigh_as=str(each_peer["neighboras"]),
+                            state_pfxrcd=state_pfxrcd,
+                        )
+                    )
+    return nxos_bgp_list
 
 
 def format_eigrp_nhbr(val_file: bool, output: list[dict[str, Any]]) -> dict[str, Any]:
@@ -97,7 +122,7 @@ def format_eigrp_nhbr(val_file: bool, output: list[dict[str, Any]]) -> dict[str,
         intf = each_nbr["interface"]
         state = "down" if len(each_nbr["uptime"]) == 0 else "up"
         if result.get(intf) is None:
-            result[intf]["asn"] = _make_int(each_nbr["as"])
+            result[intf]["asn"] = make_int(each_nbr["as"])
         # val_file
         if val_file:
             result[intf]["nbr"] = each_nbr["ip_address"]
@@ -139,9 +164,9 @@ def format_ospf_nhbr(
         for each_intf in output:
             # Data from "show ip int br" is saved in result
             if each_intf.get("process") is not None:
-                pid = _make_int(each_intf["process"])
+                pid = make_int(each_intf["process"])
                 result[each_intf["interface"]]["pid"] = pid
-                result[each_intf["interface"]]["area"] = _make_int(each_intf["area"])
+                result[each_intf["interface"]]["area"] = make_int(each_intf["area"])
                 # If is actual state adds empty dict
                 if tmp_dict_nbr.default_factory is dict:
                     result[each_intf["interface"]]["nbr"] = {}
@@ -158,19 +183,17 @@ def format_ospf_nhbr(
         dict_nbr = _ospf_nhbr(key.neighbor_id, output, defaultdict(list))
     elif not val_file:
         dict_nbr = _ospf_nhbr(key.neighbor_id, output, defaultdict(dict))
-    # NBR: Add neighbors based on matching interfaces in results and dict_nbr
-    for intf in result.keys():  # noqa: SIM118
-        for intf1, nbr in dict_nbr.items():
-            # ASA has to be treated differently as interfaces are logical names
-            if bool(re.search("asa", os_type)):
-                if intf == intf1:
-                    result[intf]["nbr"] = nbr
-            else:
-                # Splits intf short and long names to then be able to interface number ([1:]) and short name is in long name ([0])
-                spl_intf = re.split(r"(\D+)", intf.lower())[1:]
-                spl_intf1 = re.split(r"(\D+)", intf1.lower())[1:]
-                if spl_intf[1:] == spl_intf1[1:] and spl_intf[0] in spl_intf1[0]:
-                    result[intf]["nbr"] = nbr
+    # NBR: Add neighbors to the interfaces in results, joined on the full interface name as one output uses short names
+    # ASA has to be treated differently as interfaces are logical names
+    is_asa = bool(re.search("asa", os_type))
+    nbr_by_intf = {
+        (intf if is_asa else canonical_intf(intf)): nbr
+        for intf, nbr in dict_nbr.items()
+    }
+    for intf in result:
+        nbr = nbr_by_intf.get(intf if is_asa else canonical_intf(intf))
+        if nbr is not None:
+            result[intf]["nbr"] = nbr
     return dict(result)
 
 
@@ -185,8 +208,8 @@ def format_ospf_lsdb(output: list[str]) -> dict[str | int, Any]:
     result: dict[str | int, dict[str, str | int]] = {}
     for idx, each_item in enumerate(output):
         if "Process ID" in each_item:
-            proc = _make_int(each_item.split("s ID")[1].replace(")", "").split()[0])
-            result[proc] = {"total_lsa": _make_int(output[idx + 1].split()[1])}
+            proc = make_int(each_item.split("s ID")[1].replace(")", "").split()[0])
+            result[proc] = {"total_lsa": make_int(output[idx + 1].split()[1])}
     return result
 
 
@@ -225,10 +248,8 @@ def format_bgp(
     else:
         cln_output = output
     for each_peer in cln_output:
-        result[each_peer[key.bgp_nhbr]]["asn"] = _make_int(each_peer[key.bgp_nhbr_as])
-        result[each_peer[key.bgp_nhbr]]["rcv_pfx"] = _make_int(
-            each_peer[key.bgp_pfxrcd]
-        )
+        result[each_peer[key.bgp_nhbr]]["asn"] = make_int(each_peer[key.bgp_nhbr_as])
+        result[each_peer[key.bgp_nhbr]]["rcv_pfx"] = make_int(each_peer[key.bgp_pfxrcd])
     return dict(result)
 
 
@@ -252,7 +273,14 @@ def format_actual_state(
         dict[str | int, Any]: Returns cmd output formatted into the data structure of actual state or validation file
     """
     key = _set_keys(os_type)
-    raw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    raw_output, ntc_output = split_output(os_type, sub_feature, output)
+
+    # NXOS: Converts JSON output into the same data structure as the NTC templates
+    if bool(re.search("nxos", os_type)):
+        if sub_feature == "ospf_intf_nbr":
+            ntc_output = _nxos_ospf_format(ntc_output)
+        elif sub_feature == "bgp_peer":
+            ntc_output = _nxos_bgp_format(ntc_output)
 
     ### EIGRP_INTF_NBR: {intf: {asn: x, nbr: {nbr_ip: up}}
     if sub_feature == "eigrp_intf_nbr":
@@ -1,8 +1,13 @@
+import functools
 import ipaddress
 import re
-from collections import defaultdict
+import socket
+import sys
+from collections.abc import Iterable, Iterator
 from typing import Any, NamedTuple
 
+from nornir_validate.formatting import fix_nxos, make_int, split_output
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -16,72 +21,210 @@ class OsKeys(NamedTuple):
     route_type: str
 
 
+# Precomputed keys per OS type, the engine passes the resolved OS type so is a straight lookup
+OS_KEYS = {
+    "ios": OsKeys("IP", 2, "prefix_length", "nexthop_ip", "nexthop_if", "protocol"),
+    "nxos": OsKeys("IP", -1, "prefix_length", "nexthop_ip", "nexthop_if", "protocol"),
+    "asa": OsKeys("IP", 2, "netmask", "nexthopip", "nexthopif", "protocol"),
+    "panos": OsKeys("IPv6", 3, "prefix_length", "nexthop_ip", "nexthop_if", "flags"),
+}
+
+
 def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
+    Raises:
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
         OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    if "ios" in os_type:
-        return OsKeys("IP", 2, "prefix_length", "nexthop_ip", "nexthop_if", "protocol")
-    elif "nxos" in os_type:
-        return OsKeys("IP", -1, "prefix_length", "nexthop_ip", "nexthop_if", "protocol")
-    elif "asa" in os_type:
-        return OsKeys("IP", 2, "netmask", "nexthopip", "nexthopif", "protocol")
-    elif "panos" in os_type:
-        return OsKeys("IPv6", 3, "prefix_length", "nexthop_ip", "nexthop_if", "flags")
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
+# DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
+def _nxos_vrf_format(output: list[dict[str, Any]]) -> list[dict[str, str]]:
+    """Formats NXOS 'show vrf interface | json' into the same data structure as the NTC template.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
-    Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
-    Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
-    """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+        output (list[dict[str, Any]]): The command output from the device in JSON format
+    Returns:
+        list[dict[str, str]]: List of dictionaries with the VRF name and interface
+    """
+    return [
+        dict(name=str(each_intf["vrf_name"]), interface=str(each_intf["if_name"]))
+        for each_intf in fix_nxos(output[0], "TABLE_if", "ROW_if")
+    ]
+
+
+def _nxos_route_format(output: list[dict[str, Any]]) -> Iterator[dict[str, str]]:
+    """Formats NXOS 'show ip route | json' into the same data structure as the NTC template (one entry per path).
+
+    Is a generator so the routes are formatted as they are consumed rather than building a second copy of the route table.
+
+    Args:
+        output (list[dict[str, Any]]): The command output from the device in JSON format, one dict per route table cmd
+    Returns:
+        Iterator[dict[str, str]]: Routes with vrf, network, prefix_length, nexthop_ip, nexthop_if, protocol and type
+    """
+    for each_cmd in output:
+        for each_vrf in fix_nxos(each_cmd, "TABLE_vrf", "ROW_vrf"):
+            vrf = str(each_vrf["vrf-name-out"])
+            for each_af in fix_nxos(each_vrf, "TABLE_addrf", "ROW_addrf"):
+                for each_pfx in fix_nxos(each_af, "TABLE_prefix", "ROW_prefix"):
+                    network, pfx_len = str(each_pfx["ipprefix"]).split("/")
+                    for each_path in fix_nxos(each_pfx, "TABLE_path", "ROW_path"):
+                        yield dict(
+                            vrf=vrf,
+                            network=network,
+                            prefix_length=pfx_len,
+                            nexthop_ip=str(each_path.get("ipnexthop", "")),
+                            nexthop_if=str(each_path.get("ifname", "")),
+                            protocol=str(each_path.get("clientname", "")),
+                            type=str(each_path.get("type", "")),
+                        )
 
 
 # ----------------------------------------------------------------------------
-# DEF: Mini-functions used by the main function
+# ROUTE: Compact route table built as the routes are streamed in, converted to the dict data structure at the end
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
+# Route types where the next-hop is the interface (directly connected)
+CONNECTED_RTYPE = re.compile(r"^L$|^local$|^C$|^direct$|A C")
+
+
+@functools.cache
+def _mask_to_pfxlen(mask: str) -> str:
+    """Converts an IPv4 subnet mask (or prefix length) to the prefix length, cached as there are only 33 masks.
 
     Args:
-        input_data (str): The data to be converted to an integer
+        mask (str): Subnet mask such as 255.255.255.0 or prefix length such as 24
     Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
+        str: The prefix length
+    """
+    if mask.isdigit():
+        return str(int(mask))
+    return str(ipaddress.IPv4Network(f"0.0.0.0/{mask}").prefixlen)
+
+
+def _route_pfx(network: str, mask: str) -> str:
+    """Takes a network and a mask (or prefix length) and returns the network/prefix length, IPv4 or IPv6.
+
+    Args:
+        network (str): The network address of the route
+        mask (str): Subnet mask or prefix length of the route, IPv6 is always a prefix length
+    Returns:
+        str: The route in the format network/prefix_length
+    """
+    # IPv6 addresses are compressed to their shortest form
+    if ":" in network:
+        return ipaddress.IPv6Interface(f"{network}/{mask}").with_prefixlen
+    return f"{network}/{_mask_to_pfxlen(mask)}"
+
+
+@functools.cache
+def _is_connected(route_type: str) -> bool:
+    """Whether a route type is directly connected (next-hop is the interface), cached as there are few route types."""
+    return bool(CONNECTED_RTYPE.search(route_type))
+
+
+@functools.cache
+def _format_route_type(route_type: str, sub_type: str) -> str:
+    """Format route type string, cached and interned as the same few route types are repeated for every route.
+
+    Args:
+        route_type (str): The route type (protocol or flags)
+        sub_type (str): NXOS route sub-type, such as inter or intra for OSPF
+    Returns:
+        str: The route type
+    """
+    if not sub_type:
+        return sys.intern(route_type.replace("A ", "").replace("A?", ""))
+    return sys.intern(f"{route_type} {sub_type}")
+
+
+class Route:
+    """A route with its next-hop and route type, stored as slots rather than a dict to keep large route tables compact.
+
+    Args:
+        nh (str | list[str]): Next-hop (or list of next-hops if ECMP)
+        rtype (str): The route type
+    """
+
+    __slots__ = ("nh", "rtype")
+
+    def __init__(self, nh: str, rtype: str) -> None:
+        self.nh: str | list[str] = nh
+        self.rtype = rtype
+
+    def add_nh(self, nh: str) -> None:
+        """Adds a next-hop to the route, the next-hop becomes a list if it is a different next-hop (ECMP).
+
+        Args:
+            nh (str): Next-hop IP address or interface
+        """
+        if isinstance(self.nh, list):
+            self.nh.append(nh)
+        elif self.nh != nh:
+            self.nh = [self.nh, nh]
+
+    def as_dict(self) -> dict[str, str | list[str]]:
+        """Converts the route into the route data structure.
+
+        Returns:
+            dict[str, str | list[str]]: {nh: y, rtype: x}
+        """
+        return {"nh": self.nh, "rtype": self.rtype}
+
+
+class RouteTable:
+    """Per-VRF route tables built one route at a time, converted to the route data structure on demand.
+
+    Next-hops and VRF names are interned so the many routes sharing the same next-hop share a single string.
     """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
+
+    __slots__ = ("vrfs",)
+
+    def __init__(self) -> None:
+        self.vrfs: dict[str, dict[str, Route]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(x) for x in self.vrfs.values())
+
+    def add(self, vrf: str, rte: str, nh: str, rtype: str) -> None:
+        """Adds a route to the VRF, if the route already exists the next-hop is added to it (ECMP).
+
+        Args:
+            vrf (str): VRF of the route (global for the global route table)
+            rte (str): The route in the format network/prefix_length
+            nh (str): Next-hop IP address or interface
+            rtype (str): The route type
+        """
+        vrf_routes = self.vrfs.get(vrf)
+        if vrf_routes is None:
+            vrf_routes = self.vrfs[sys.intern(vrf)] = {}
+        route = vrf_routes.get(rte)
+        if route is None:
+            vrf_routes[rte] = Route(sys.intern(nh), rtype)
+        else:
+            route.add_nh(sys.intern(nh))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Converts the route table into the route data structure.
+
+        Returns:
+            dict[str, Any]: {vrf: {route/prefix: {nh: y, rtype: x}}}
+        """
+        return {
+            vrf: {rte: route.as_dict() for rte, route in vrf_routes.items()}
+            for vrf, vrf_routes in self.vrfs.items()
+        }
 
 
 def format_vrf(output: list[dict[str, Any]]) -> dict[str | int, Any]:
@@ -94,7 +237,7 @@ def format_vrf(output: list[dict[str, Any]]) -> dict[str | int, Any]:
     """
     result: dict[str | int, list[str]] = {}
     for each_vrf in output:
-        vrf_name = _make_int(each_vrf["name"])
+        vrf_name = make_int(each_vrf["name"])
         if result.get(vrf_name) is None:
             try:
                 result[vrf_name] = each_vrf["interfaces"]
@@ -124,67 +267,267 @@ def format_rte_count(key: OsKeys, os_type: str, output: list[str]) -> dict[str,
             else:
                 tmp = each_item.replace("maximum-paths is", "name is default")
                 vrf = tmp.split()[5].replace('"', "").replace("default", "global")
-            result[vrf] = _make_int(output[idx + 1].split()[key.count_iter])
+            result[vrf] = make_int(output[idx + 1].split()[key.count_iter])
     return dict(result)
 
 
-def format_route(key: OsKeys, output: list[dict[str, Any]]) -> dict[str, Any]:
-    """Format table output into a structured route dictionary.
+def build_route_table(key: OsKeys, output: Iterable[dict[str, Any]]) -> RouteTable:
+    """Builds the compact route table streaming through the routes, each route is only looked at once.
 
     Args:
         key (OsKeys): Keys for the specific OS type to retrieve the output data
-        output (list[dict[str, Any]]): The command output from the device in ntc data structure
-
+        output (Iterable[dict[str, Any]]): The command output from the device in ntc data structure or NXOS generator
     Returns:
-        dict[str, Any]: {vrf: {route/prefix: type: x, nh: y}})
+        RouteTable: Routes per VRF
     """
-    result: dict[str, dict[str, dict[str, str | list[str]]]] = defaultdict(dict)
-
-    # Helper functions used only by this function
-    def _get_pfxlen(network: str, mask: str) -> str:
-        """Takes a network and a mask and returns the network/prefix length."""
-        ip_mask = network + "/" + mask
-        ip_pfxlen = ipaddress.IPv4Interface(ip_mask).with_prefixlen
-        return ip_pfxlen
-
-    def _select_next_hop(each_rte: dict[str, str]) -> str:
-        """Determine next-hop IP or interface."""
-        proto_regex = re.compile(r"^L$|^local$|^C$|^direct$|A C")
-        if proto_regex.search(each_rte[key.route_type]) or not each_rte[key.route_nhip]:
-            return each_rte[key.route_nhif]
-        return each_rte[key.route_nhip]
-
-    def _format_route_type(each_rte: dict[str, str]) -> str:
-        """Format route type string."""
-        return (
-            each_rte[key.route_type].replace("A ", "").replace("A?", "")
-            if not each_rte.get("type", "")
-            else f"{each_rte[key.route_type]} {each_rte['type']}"
-        )
-
+    table = RouteTable()
+    nhip, nhif, rtype_key, mask = (
+        key.route_nhip,
+        key.route_nhif,
+        key.route_type,
+        key.route_mask,
+    )
     for each_rte in output:
         if not isinstance(each_rte, dict):
             continue
         # VRF Handling
         vrf = each_rte.get("vrf", "global").replace("default", "global") or "global"
         # Route + Next-Hop
-        rte = _get_pfxlen(each_rte["network"], each_rte[key.route_mask])
-        nh = _select_next_hop(each_rte)
-        rte_type = _format_route_type(each_rte)
-
-        # Insert the above into result
-        vrf_routes = result.setdefault(vrf, {})
-        if rte not in vrf_routes:
-            # First time seeing this route
-            vrf_routes[rte] = {"nh": nh, "rtype": rte_type}
+        route_type = each_rte[rtype_key]
+        if _is_connected(route_type) or not each_rte[nhip]:
+            nh = each_rte[nhif]
         else:
-            existing_nh = vrf_routes[rte]["nh"]
-            if isinstance(existing_nh, list):
-                existing_nh.append(nh)
-            elif existing_nh != nh:
-                vrf_routes[rte]["nh"] = [existing_nh, nh]
+            nh = each_rte[nhip]
+        table.add(
+            vrf,
+            _route_pfx(each_rte["network"], each_rte[mask]),
+            nh,
+            _format_route_type(route_type, each_rte.get("type", "")),
+        )
+    return table
 
-    return dict(result)
+
+def format_route(key: OsKeys, output: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Format table output into a structured route dictionary.
+
+    Args:
+        key (OsKeys): Keys for the specific OS type to retrieve the output data
+        output (Iterable[dict[str, Any]]): The command output from the device in ntc data structure or NXOS generator
+
+    Returns:
+        dict[str, Any]: {vrf: {route/prefix: type: x, nh: y}})
+    """
+    return build_route_table(key, output).as_dict()
+
+
+# ----------------------------------------------------------------------------
+# LOOKUP: Longest-prefix-match of destinations against the route table using a radix trie
+# ----------------------------------------------------------------------------
+class _TrieNode:
+    """Node of the radix trie, a prefix (as an int) and the route if the prefix is in the route table.
+
+    Args:
+        pfx (int): Network address of the prefix as an int
+        pfxlen (int): Prefix length
+        route (tuple[str, Route] | None): The route/prefix and route, None if is only a branch point
+    """
+
+    __slots__ = ("children", "pfx", "pfxlen", "route")
+
+    def __init__(self, pfx: int, pfxlen: int, route: tuple[str, Route] | None) -> None:
+        self.pfx = pfx
+        self.pfxlen = pfxlen
+        self.route = route
+        self.children: list[_TrieNode | None] = [None, None]
+
+
+class RouteTrie:
+    """Path-compressed binary radix trie of the routes of an address family (one per VRF and IP version).
+
+    Nodes are only created for prefixes and branch points, so a lookup visits at most one node per prefix that
+    covers the destination rather than one per bit of the address.
+
+    Args:
+        width (int): Number of bits in the address, 32 for IPv4 and 128 for IPv6
+        prefixes (Iterable[tuple[int, int, tuple[str, Route]]]): Network address as an int, prefix length and the route
+    """
+
+    __slots__ = ("root", "width")
+
+    def __init__(
+        self, width: int, prefixes: Iterable[tuple[int, int, tuple[str, Route]]]
+    ) -> None:
+        self.width = width
+        self.root = _TrieNode(0, 0, None)
+        self._load(prefixes)
+
+    def _load(self, prefixes: Iterable[tuple[int, int, tuple[str, Route]]]) -> None:
+        """Builds the trie in one pass over the prefixes sorted by address then prefix length.
+
+        Sorted, the prefixes covered by a node are all added straight after it, so rather than walking down from the
+        root for every prefix the path from the root is kept as a stack and only unwound to the nearest covering node.
+
+        Args:
+            prefixes (Iterable[tuple[int, int, tuple[str, Route]]]): Network address as an int, prefix length and the route
+        """
+        width = self.width
+        stack = [self.root]
+        # Packing the prefix length into the key sorts on both without a tuple per prefix
+        for key, route in sorted(
+            (pfx << 8 | pfxlen, route) for pfx, pfxlen, route in prefixes
+        ):
+            pfx, pfxlen = key >> 8, key & 255
+            node = stack[-1]
+            shift = width - node.pfxlen
+            while node.pfxlen > pfxlen or pfx >> shift != node.pfx >> shift:
+                stack.pop()
+                node = stack[-1]
+                shift = width - node.pfxlen
+            if node.pfxlen == pfxlen:
+                node.route = route
+                continue
+            bit = (pfx >> (shift - 1)) & 1
+            child = node.children[bit]
+            new_node = _TrieNode(pfx, pfxlen, route)
+            # Neither covers the other (sorted), so a branch point is added where the child and new prefix diverge
+            if child is not None:
+                common = min(
+                    child.pfxlen, pfxlen, width - (child.pfx ^ pfx).bit_length()
+                )
+                branch = _TrieNode(
+                    pfx >> (width - common) << (width - common), common, None
+                )
+                branch.children[(child.pfx >> (width - 1 - common)) & 1] = child
+                branch.children[(pfx >> (width - 1 - common)) & 1] = new_node
+                node.children[bit] = branch
+                stack.append(branch)
+            else:
+                node.children[bit] = new_node
+            stack.append(new_node)
+
+    def lookup(self, addr: int, addrlen: int) -> tuple[str, Route] | None:
+        """Longest-prefix-match, the most specific route that covers the whole destination.
+
+        Args:
+            addr (int): Destination address (or network address of a destination prefix) as an int
+            addrlen (int): Prefix length of the destination, the address width for a host address
+        Returns:
+            tuple[str, Route] | None: The route/prefix and route, None if no route matches
+        """
+        width = self.width
+        match = None
+        node: _TrieNode | None = self.root
+        while node is not None and node.pfxlen <= addrlen:
+            shift = width - node.pfxlen
+            if addr >> shift != node.pfx >> shift:
+                break
+            if node.route is not None:
+                match = node.route
+            if not shift:
+                break
+            node = node.children[(addr >> (shift - 1)) & 1]
+        return match
+
+
+def _route_to_int(rte: str) -> tuple[int, int, int]:
+    """Converts a route/prefix into the IP version, network address as an int and prefix length.
+
+    Args:
+        rte (str): The route in the format network/prefix_length, IPv4 or IPv6
+    Returns:
+        tuple[int, int, int]: IP version, network address and prefix length
+    """
+    network, _, pfxlen = rte.partition("/")
+    if ":" in network:
+        version, width, addr = 6, 128, int(ipaddress.IPv6Address(network))
+    else:
+        # Much faster than ipaddress, matters when building the trie for a full Internet table
+        version, width, addr = 4, 32, int.from_bytes(socket.inet_aton(network), "big")
+    shift = width - int(pfxlen)
+    return version, addr >> shift << shift, int(pfxlen)
+
+
+def build_route_trie(
+    table: RouteTable, vrfs: Iterable[str] | None = None
+) -> dict[str, dict[int, RouteTrie]]:
+    """Builds a radix trie per VRF and IP version from the route table.
+
+    Args:
+        table (RouteTable): Routes per VRF
+        vrfs (Iterable[str] | None): Only build the tries for these VRFs, all VRFs if None
+    Returns:
+        dict[str, dict[int, RouteTrie]]: {vrf: {ip_version: RouteTrie}}
+    """
+    tries: dict[str, dict[int, RouteTrie]] = {}
+    for vrf in table.vrfs if vrfs is None else vrfs:
+        vrf_routes = table.vrfs.get(vrf)
+        if vrf_routes is None:
+            continue
+        prefixes: dict[int, list[tuple[int, int, tuple[str, Route]]]] = {4: [], 6: []}
+        for rte, route in vrf_routes.items():
+            version, addr, pfxlen = _route_to_int(rte)
+            prefixes[version].append((addr, pfxlen, (rte, route)))
+        tries[vrf] = {4: RouteTrie(32, prefixes[4]), 6: RouteTrie(128, prefixes[6])}
+    return tries
+
+
+def _parse_destination(dest: str) -> ipaddress.IPv4Network | ipaddress.IPv6Network:
+    """Converts a destination address or prefix into a network, a host address is a host prefix (/32 or /128).
+
+    Args:
+        dest (str): Destination IP address or prefix, IPv4 or IPv6
+    Raises:
+        ValueError: If the destination is not a valid IP address or prefix
+    Returns:
+        ipaddress.IPv4Network | ipaddress.IPv6Network: The destination network
+    """
+    try:
+        return ipaddress.ip_network(dest, strict=False)
+    except ValueError:
+        msg = f"Invalid route destination '{dest}', must be an IP address or prefix"
+        raise ValueError(msg) from None
+
+
+def format_route_lookup(
+    key: OsKeys,
+    output: Iterable[dict[str, Any]],
+    destinations: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Longest-prefix-match of each destination against the route table, the route used and its type & next-hops.
+
+    Only the destinations of the desired state are looked up, without them (such as creating a validation file) is empty
+    rather than building a trie of the whole route table just to look each route up against itself.
+
+    Args:
+        key (OsKeys): Keys for the specific OS type to retrieve the output data
+        output (Iterable[dict[str, Any]]): The command output from the device in ntc data structure or NXOS generator
+        destinations (dict[str, Any] | None): Desired state in the format vrf: destination: expected route
+    Returns:
+        dict[str, Any]: {vrf: {destination: {route: route/prefix, rtype: x, nh: y}}}, destinations with no route are omitted
+    """
+    if destinations is None:
+        return {}
+    table = build_route_table(key, output)
+    tries = build_route_trie(table, destinations)
+    result: dict[str, Any] = {}
+    for vrf, vrf_dests in destinations.items():
+        if str(vrf).startswith("_"):
+            continue
+        result[vrf] = {}
+        vrf_tries = tries.get(vrf)
+        for dest in vrf_dests:
+            if str(dest).startswith("_"):
+                continue
+            network = _parse_destination(str(dest))
+            match = None
+            if vrf_tries is not None:
+                match = vrf_tries[network.version].lookup(
+                    int(network.network_address), network.prefixlen
+                )
+            if match is not None:
+                rte, route = match
+                result[vrf][dest] = {"route": rte, **route.as_dict()}
+    return result
 
 
 # ----------------------------------------------------------------------------
@@ -207,7 +550,16 @@ def format_actual_state(
         dict[str, Any]: Returns cmd output formatted into the data structure of actual state or validation file
     """
     key = _set_keys(os_type)
-    raw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    raw_output, ntc_output = split_output(os_type, sub_feature, output)
+
+    # NXOS: Converts JSON output into the same data structure as the NTC templates
+    if bool(re.search("nxos", os_type)):
+        if sub_feature == "vrf":
+            ntc_output = _nxos_vrf_format(ntc_output)
+        elif sub_feature == "route":
+            return format_route(key, _nxos_route_format(ntc_output))
+        elif sub_feature == "route_lookup":
+            return format_route_lookup(key, _nxos_route_format(ntc_output))
 
     ### VRF: {vrf: [intfx, intfy]}
     if sub_feature == "vrf":
@@ -221,7 +573,40 @@ def format_actual_state(
     elif sub_feature == "route":
         return format_route(key, ntc_output)
 
+    ### ROUTE_LOOKUP: {vrf: {destination: {route: route/prefix, type: x, nh: y}}}
+    elif sub_feature == "route_lookup":
+        return format_route_lookup(key, ntc_output)
+
     ### CatchAll
     else:
         msg = f"Unsupported sub_feature: {sub_feature}"
         raise ValueError(msg)
+
+
+# ----------------------------------------------------------------------------
+# EVALUATE: Sub-features whose actual state depends on the desired state
+# ----------------------------------------------------------------------------
+def evaluate_actual_state(
+    os_type: str,
+    sub_feature: str,
+    output: list[str | dict[str, str]],
+    desired_state: dict[str, Any],
+) -> dict[str, Any] | None:
+    """Engine to create the actual state of sub-features evaluated against the desired state, such as route lookups.
+
+    Args:
+        os_type (str): The different Nornir platforms which are OS type of the device
+        sub_feature (str): The name of the sub-feature that is being validated
+        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str/int from raw) command output from the device
+        desired_state (dict[str, Any]): Desired state of the sub-feature without the cmds
+    Returns:
+        dict[str, Any] | None: The evaluated actual state, None if the sub-feature isn't evaluated against the desired state
+    """
+    if sub_feature != "route_lookup":
+        return None
+    key = _set_keys(os_type)
+    ntc_output = split_output(os_type, sub_feature, output)[1]
+    routes: Iterable[dict[str, Any]] = ntc_output
+    if bool(re.search("nxos", os_type)):
+        routes = _nxos_route_format(ntc_output)
+    return format_route_lookup(key, routes, desired_state)
@@ -1,6 +1,13 @@
 from collections import defaultdict
 from typing import Any, NamedTuple
 
+from nornir_validate.formatting import (
+    DeclaredFormatters,
+    FormatterSpec,
+    RowSchema,
+    split_output,
+)
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -12,70 +19,90 @@ class OsKeys(NamedTuple):
     bfd_nhbr: str
 
 
+# Precomputed keys per OS type, the engine passes the resolved OS type so is a straight lookup
+OS_KEYS = {
+    "ios": OsKeys("peer", "system_ip", "local_color", "system_ip"),
+    "viptela": OsKeys("peer", "system_ip", "remote_color", "system_ip"),
+}
+
+
 def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
+    Raises:
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
         OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    if "ios" in os_type:  # noqa: SIM114
-        return OsKeys("peer", "system_ip", "local_color", "system_ip")
-    elif "viptela" in os_type:
-        return OsKeys("peer", "system_ip", "remote_color", "system_ip")
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
+# SCHEMA: Field types of the command output rows, coerced in bulk before formatting
 # ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
-
-    Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
-    Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
-    Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
-    """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+CONTROL_CONN_SCHEMA = RowSchema({"site_id": "int_or_str"})
+OMP_SCHEMA = RowSchema(
+    {
+        "site_id": "int_or_str",
+        "routes_received": "int_or_str",
+        "routes_installed": "int_or_str",
+        "routes_sent": "int_or_str",
+    }
+)
+BFD_SESSION_SCHEMA = RowSchema({"site_id": "int_or_str"})
 
 
 # ----------------------------------------------------------------------------
-# DEF: Mini-functions used by the main function
+# DECLARED: Sub-features formatted by compiled declarations, the hand-written formatters are the fallback
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
-
-    Args:
-        input_data (str): The data to be converted to an integer
-    Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
-    """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
+FORMATTERS = DeclaredFormatters(
+    {
+        "control_conn": FormatterSpec(
+            key="system_ip",
+            fields={
+                "site_id": "site_id",
+                "color": {"ios": "local_color", "viptela": "remote_color"},
+                "state": "state",
+            },
+            schema=CONTROL_CONN_SCHEMA,
+            actual_only=("state",),
+        ),
+        "omp_peer": FormatterSpec(
+            key="peer",
+            fields={
+                "site_id": "site_id",
+                "routes_received": "routes_received",
+                "routes_installed": "routes_installed",
+                "routes_sent": "routes_sent",
+                "state": "state",
+            },
+            schema=OMP_SCHEMA,
+            actual_only=("state",),
+        ),
+        "bfd_session": FormatterSpec(
+            key="system_ip",
+            fields={
+                "site_id": "site_id",
+                "local_color": "local_color",
+                "remote_color": "remote_color",
+                "state": "state",
+            },
+            schema=BFD_SESSION_SCHEMA,
+            actual_only=("state",),
+        ),
+    }
+)
 
 
+# ----------------------------------------------------------------------------
+# DEF: Mini-functions used by the main function
+# ----------------------------------------------------------------------------
 def format_control_conn(
     val_file: bool, key: OsKeys, output: list[dict[str, str]]
 ) -> dict[str, Any]:
@@ -89,9 +116,9 @@ def format_control_conn(
         dict[str, dict[str, str | int]]: {nhbr: {site_id:x, color:x, state:x}} val file has no {state: x}
     """
     result: dict[str, dict[str, str | int]] = defaultdict(dict)
-    for entry in output:
+    for entry in CONTROL_CONN_SCHEMA.coerce(output):
         nhbr = entry[key.cntl_nhbr]
-        result[nhbr]["site_id"] = _make_int(entry["site_id"])
+        result[nhbr]["site_id"] = entry["site_id"]
         result[nhbr]["color"] = entry[key.cntl_color]
         # If is actual_state adds neighbor state
         if not val_file:
@@ -112,12 +139,12 @@ def format_omp(
         dict[str, dict[str, str | int]]: {peer: {site_id:x, routes_received:x, routes_installed:x:, routes_sent:x, state:x}} val file has no {state: x}
     """
     result: dict[str, dict[str, str | int]] = defaultdict(dict)
-    for entry in output:
+    for entry in OMP_SCHEMA.coerce(output):
         peer = entry[key.omp_peer]
-        result[peer]["site_id"] = _make_int(entry["site_id"])
-        result[peer]["routes_received"] = _make_int(entry["routes_received"])
-        result[peer]["routes_installed"] = _make_int(entry["routes_installed"])
-        result[peer]["routes_sent"] = _make_int(entry["routes_sent"])
+        result[peer]["site_id"] = entry["site_id"]
+        result[peer]["routes_received"] = entry["routes_received"]
+        result[peer]["routes_installed"] = entry["routes_installed"]
+        result[peer]["routes_sent"] = entry["routes_sent"]
         # If is actual_state adds peer state
         if not val_file:
             result[peer]["state"] = entry["state"]
@@ -137,9 +164,9 @@ def format_bfd_session(
         dict[str, dict[str, str | int]]: {nhbr: {site_id:x, local_color:x, remote_color:x, state:x}} val file has no {state: x}
     """
     result: dict[str, dict[str, str | int]] = defaultdict(dict)
-    for entry in output:
+    for entry in BFD_SESSION_SCHEMA.coerce(output):
         nhbr = entry[key.bfd_nhbr]
-        result[nhbr]["site_id"] = _make_int(entry["site_id"])
+        result[nhbr]["site_id"] = entry["site_id"]
         result[nhbr]["local_color"] = entry["local_color"]
         result[nhbr]["remote_color"] = entry["remote_color"]
         # If is actual_state adds neighbor state
@@ -167,8 +194,12 @@ def format_actual_state(
     Returns:
         dict[str, Any]: Returns cmd output formatted into the data structure of actual state or validation file
     """
+    # DECLARED: Sub-features with a formatter declaration, any others use the hand-written formatters
+    formatted = FORMATTERS.format(val_file, os_type, sub_feature, output)
+    if formatted is not None:
+        return formatted
     key = _set_keys(os_type)
-    raw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    raw_output, ntc_output = split_output(os_type, sub_feature, output)
 
     ### CONTROL_CONN: {nhbr: {site_id:x, color:x, state:x}}
     if sub_feature == "control_conn":
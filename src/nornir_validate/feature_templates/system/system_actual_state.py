@@ -1,9 +1,13 @@
+import functools
+import heapq
 import ipaddress
 import re
 import trace
 from collections import defaultdict
 from typing import Any, NamedTuple
 
+from nornir_validate.formatting import RowSchema, fix_nxos, make_int, split_output
+
 
 # ----------------------------------------------------------------------------
 # KEY: Set dictionary keys on a per-os_type basis
@@ -18,84 +22,48 @@ class OsKeys(NamedTuple):
     sla_state: str
 
 
+# Precomputed keys per OS type, the engine passes the resolved OS type so is a straight lookup
+OS_KEYS = {
+    "ios": OsKeys(
+        "version", "acl_name", "line_num", "interface", "name", "rtt", "status"
+    ),
+    "nxos": OsKeys("os", "name", "sn", "", "", "", ""),
+    "asa": OsKeys("version", "name", "sn", "", "", "", ""),
+    "wlc": OsKeys("product_version", "", "", "", "", "", ""),
+    "panos": OsKeys("os", "", "", "grp_name", "destination", "rtt_avg", "success_rate"),
+}
+
+
 def _set_keys(os_type: str) -> OsKeys:
-    """Based on the OS type set the set the dictionary keys when gleaning data from NTC data structures.
+    """Based on the OS type gets the dictionary keys used when gleaning data from NTC data structures.
 
     Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
+        os_type (str): The OS type resolved from the device platforms, such as ios, nxos or asa
+    Raises:
+        NotImplementedError: If the feature has no keys for the OS type
     Returns:
         OsKeys: Dictionary Keys for the specific OS type to retrieve the output data
     """
-    if "ios" in os_type:
-        return OsKeys(
-            "version", "acl_name", "line_num", "interface", "name", "rtt", "status"
-        )
-    elif "nxos" in os_type:
-        return OsKeys("os", "name", "sn", "", "", "", "")
-    elif "asa" in os_type:
-        return OsKeys("version", "name", "sn", "", "", "", "")
-    elif "wlc" in os_type:
-        return OsKeys("product_version", "", "", "", "", "", "")
-    elif "panos" in os_type:
-        return OsKeys(
-            "os", "", "", "grp_name", "destination", "rtt_avg", "success_rate"
-        )
-    # Fallback if nothing matched
-    msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
-    raise NotImplementedError(msg)
+    os_keys = OS_KEYS.get(os_type)
+    if os_keys is None:
+        msg = f"Error, '_set_keys' has no match for OS type: '{os_type}'"
+        raise NotImplementedError(msg)
+    return os_keys
 
 
 # ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
+# SCHEMA: Field types of the command output rows, coerced in bulk before formatting
 # ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
-
-    Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
-    Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
-    Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
-    """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+MODULE_SCHEMA = RowSchema({"module": "int_or_str"})
 
 
 # ----------------------------------------------------------------------------
 # DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
-
-    Args:
-        input_data (str): The data to be converted to an integer
-    Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
-    """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
-
-
 def _acl_format_into_dict(
     output: list[dict[str, str]], name: str
 ) -> dict[str, list[dict[str, str]]]:
-    """From a list of ACEs, removes the empty dicts and creates a dict of ACLs.
+    """From a list of ACEs, removes the empty dicts and creates a dict of ACLs (single pass, ACLs in the order first seen).
 
     Args:
         output (list[dict[str, str]]): List of ACE entries
@@ -103,24 +71,12 @@ def _acl_format_into_dict(
     Returns:
         dict[str, list[dict[str, str]]]: A dict of ACLs with the name of the ACL as the key and a list of ACEs as the value
     """
-    acl = {}
-    acl_names = set(item[name] for item in output)
-    for each_acl_name in acl_names:
-        tmp_acl_list = []
-        for each_ace in output:
-            if each_ace.get("line_num", "dummy") == "":
-                pass
-            else:
-                tmp_ace_dict = {}
-                for ace_key, ace_val in each_ace.items():
-                    # Add none blank ACE entries to dict of ACEs
-                    if len(ace_val) != 0:
-                        tmp_ace_dict[ace_key] = ace_val
-                # Add dict of all none blank ACE entries to list of ACLs
-                if each_acl_name == each_ace[name]:
-                    tmp_acl_list.append(tmp_ace_dict)
-            # Add all ACLs to dict of ACL names
-            acl[each_acl_name] = tmp_acl_list
+    acl: dict[str, list[dict[str, str]]] = {}
+    for each_ace in output:
+        tmp_acl_list = acl.setdefault(each_ace[name], [])
+        # ACL header (has no line number) only creates the ACL, the ACE entries only keep the none blank values
+        if each_ace.get("line_num", "dummy") != "":
+            tmp_acl_list.append({k: v for k, v in each_ace.items() if len(v) != 0})
     return acl
 
 
@@ -129,23 +85,29 @@ def _acl_remove_remark(
 ) -> dict[str, list[dict[str, str]]]:
     """Removes remark and reorders the seq number as NXOS gives remarks a sequence number (IOS doesnt).
 
+    The remaining ACEs take the sequence numbers of the ACL in order, so they are the same as if the remarks never existed.
+
     Args:
         acl (list[dict[str, str]]): Dictionary if ACLs
     Returns:
         dict[str, list[dict[str, str]]]: Same ACL dict but with remarks removed
     """
     for ace in acl.values():
-        while "remark" in str(ace):
-            ace_count = len(ace)
-            for idx, each_ace in enumerate(ace):
-                if each_ace["action"] == "remark":
-                    for x in reversed(range(idx + 1, ace_count)):
-                        ace[x]["sn"] = ace[x - 1]["sn"]
-                    del ace[idx]
-                    break
+        no_remark = [x for x in ace if x.get("action") != "remark"]
+        if len(no_remark) != len(ace):
+            all_seq = [x["sn"] for x in ace[: len(no_remark)]]
+            for each_ace, seq in zip(no_remark, all_seq, strict=True):
+                each_ace["sn"] = seq
+            ace[:] = no_remark
     return acl
 
 
+@functools.cache
+def _wildcard_to_pfx(address: str, mask: str) -> str:
+    """Converts an address and wildcard or subnet mask into address/prefix, cached as ACLs repeat the same networks."""
+    return ipaddress.IPv4Interface(f"{address}/{mask}").with_prefixlen
+
+
 def _acl_scr_dst(each_ace: dict[str, str], src_dst: str) -> str:
     """Converts the source or destination address of the ACE converted into address/prefix (IOS).
 
@@ -156,12 +118,33 @@ def _acl_scr_dst(each_ace: dict[str, str], src_dst: str) -> str:
         str: Returns either the host or network address with prefix rather than subnet mask (or "any" as catchall)
     """
     if each_ace.get(src_dst + "_network") is not None:
-        addr = each_ace[src_dst + "_network"] + "/" + each_ace[src_dst + "_wildcard"]
-        return ipaddress.IPv4Interface(addr).with_prefixlen
+        return _wildcard_to_pfx(
+            each_ace[src_dst + "_network"], each_ace[src_dst + "_wildcard"]
+        )
     elif each_ace.get(src_dst + "_host") is not None:
-        return ipaddress.IPv4Interface(each_ace[src_dst + "_host"]).with_prefixlen
+        return _wildcard_to_pfx(each_ace[src_dst + "_host"], "32")
+    elif each_ace.get(src_dst + "_network_object_group_name") is not None:
+        return "addrgroup " + each_ace[src_dst + "_network_object_group_name"]
     else:
-        return each_ace[src_dst + "_any"]
+        return each_ace.get(src_dst + "_any", "any")
+
+
+def _acl_port(each_ace: dict[str, str], src_dst: str) -> str:
+    """Gets the source or destination port match of the ACE, such as 'eq 22' or 'range 1024 2048'.
+
+    Args:
+        each_ace (dict[str, str]): Single ACL ACE with the blank values already removed
+        src_dst (str): Either is the source (src) or (destination (dst) port
+    Returns:
+        str: The port operator and port(s), an empty string if the ACE doesn't match on port
+    """
+    match = each_ace.get(f"{src_dst}_port_match")
+    if match is None:
+        return ""
+    if match == "range":
+        start = each_ace.get(f"{src_dst}_port_range_start", "")
+        return f"range {start} {each_ace.get(f'{src_dst}_port_range_end', '')}"
+    return f"{match} {each_ace.get(f'{src_dst}_port', '')}"
 
 
 def _acl_asa_format(output: list[str], name: str) -> list[dict[str, str]]:
@@ -191,6 +174,221 @@ def _acl_asa_format(output: list[str], name: str) -> list[dict[str, str]]:
     return asa_acl_list
 
 
+def _asa_acl_addr(each_ace: dict[str, str], src_dst: str) -> str:
+    """Converts the source or destination of an ASA ACE config line into address/prefix, any or the object it references.
+
+    Args:
+        each_ace (dict[str, str]): ASA ACE from the NTC template with the blank values already removed
+        src_dst (str): Either is the source (src) or destination (dst) address
+    Returns:
+        str: Address/prefix, any (any4, any6), 'object-group x', 'object x' or 'interface x'
+    """
+    for asa_key, ref in [("object_grp", "object-group"), ("object", "object")]:
+        if each_ace.get(f"{src_dst}_{asa_key}") is not None:
+            return f"{ref} {each_ace[f'{src_dst}_{asa_key}']}"
+    if each_ace.get(f"{src_dst}_intfc") is not None:
+        return f"interface {each_ace[f'{src_dst}_intfc']}"
+    if each_ace.get(f"{src_dst}_host") is not None:
+        return _wildcard_to_pfx(each_ace[f"{src_dst}_host"], "32")
+    if each_ace.get(f"{src_dst}_network") is not None:
+        return _wildcard_to_pfx(
+            each_ace[f"{src_dst}_network"], each_ace[f"{src_dst}_mask"]
+        )
+    if each_ace.get(f"{src_dst}_v6host") is not None:
+        return f"{each_ace[f'{src_dst}_v6host']}/128"
+    if each_ace.get(f"{src_dst}_v6network") is not None:
+        return f"{each_ace[f'{src_dst}_v6network']}/{each_ace[f'{src_dst}_v6mask']}"
+    return each_ace.get(f"{src_dst}_any", "any")
+
+
+def _asa_full_acl_format(output: list[dict[str, str]]) -> list[dict[str, str]]:
+    """Formats ASA 'show access-list x' config lines into the same data structure as the NTC template for full ACLs.
+
+    Unlike acl_flow the object-group lines are not replaced by their expanded entries (they share the line number),
+    the object-group (or object) name is used as the protocol, address or port.
+
+    Args:
+        output (list[dict[str, str]]): The command output from the device in ntc data structure
+    Returns:
+        list[dict[str, str]]: List of ACEs with the name, sequence number, action, protocol, source, destination and ports
+    """
+    asa_acl_list = []
+    for each_ace in output:
+        each_ace = {k: v for k, v in each_ace.items() if len(v) != 0}
+        # Skips the ACL header, remarks, inactive ACEs and the expanded entries of object-groups
+        if (
+            each_ace.get("action") is None
+            or each_ace.get("state") == "inactive"
+            or any(x.startswith("entry_") for x in each_ace)
+        ):
+            continue
+        asa_dict = dict(
+            name=each_ace["acl_name"],
+            sn=each_ace["line_num"],
+            action=each_ace["action"],
+            protocol=each_ace.get("protocol", "ip"),
+            source=_asa_acl_addr(each_ace, "src"),
+            destination=_asa_acl_addr(each_ace, "dst"),
+        )
+        if each_ace.get("svc_object_grp") is not None:
+            asa_dict["protocol"] = f"object-group {each_ace['svc_object_grp']}"
+        elif each_ace.get("svc_object") is not None:
+            asa_dict["protocol"] = f"object {each_ace['svc_object']}"
+        # Config lines only have destination ports
+        for asa_key, match in [
+            ("dst_port", "eq"),
+            ("dst_port_less_than", "lt"),
+            ("dst_port_greater_than", "gt"),
+            ("dst_port_grp", "object-group"),
+            ("dst_port_object", "object"),
+        ]:
+            if each_ace.get(asa_key) is not None:
+                asa_dict.update(dst_port_match=match, dst_port=each_ace[asa_key])
+        if each_ace.get("dst_port_range_start") is not None:
+            asa_dict.update(
+                dst_port_match="range",
+                dst_port_range_start=each_ace["dst_port_range_start"],
+                dst_port_range_end=each_ace["dst_port_range_end"],
+            )
+        asa_acl_list.append(asa_dict)
+    return asa_acl_list
+
+
+def _nxos_image_format(output: list[dict[str, Any]]) -> list[dict[str, str]]:
+    """Formats NXOS 'show version | json' into the same data structure as the NTC template.
+
+    Args:
+        output (list[dict[str, Any]]): The command output from the device in JSON format
+    Returns:
+        list[dict[str, str]]: Single item list with the software version as 'os'
+    """
+    ver = output[0]
+    image = ver.get(
+        "nxos_ver_str", ver.get("sys_ver_str", ver.get("kickstart_ver_str"))
+    )
+    return [dict(os=str(image))]
+
+
+def _nxos_acl_port(
+    each_ace: dict[str, Any], nxos_key: str, ntc_key: str
+) -> dict[str, str]:
+    """Converts the NXOS port operator and port(s) of an ACE into the same keys as the NTC template.
+
+    Args:
+        each_ace (dict[str, Any]): Single NXOS ACE from the JSON output
+        nxos_key (str): NXOS key prefix for the source (src) or destination (dest) port
+        ntc_key (str): NTC key prefix for the source (src) or destination (dst) port
+    Returns:
+        dict[str, str]: The port match and port (or range start and end), empty if the ACE doesn't match on port
+    """
+    match = each_ace.get(f"{nxos_key}_port_op")
+    if match is None:
+        return {}
+    port1 = each_ace.get(f"{nxos_key}_port1_str", each_ace.get(f"{nxos_key}_port1_num"))
+    if match == "range":
+        port2 = each_ace.get(
+            f"{nxos_key}_port2_str", each_ace.get(f"{nxos_key}_port2_num")
+        )
+        return {
+            f"{ntc_key}_port_match": "range",
+            f"{ntc_key}_port_range_start": str(port1),
+            f"{ntc_key}_port_range_end": str(port2),
+        }
+    return {f"{ntc_key}_port_match": str(match), f"{ntc_key}_port": str(port1)}
+
+
+# NXOS ACE JSON keys converted to the NTC template keys, any others are conditions (qualifiers) acl_flow can't evaluate
+NXOS_ACE_KEYS = frozenset(
+    [
+        "seqno",
+        "permitdeny",
+        "remark",
+        "proto",
+        "proto_str",
+        "ip",
+        "log",
+        "src_ip_prefix",
+        "src_addrgrp",
+        "src_any",
+        "dest_ip_prefix",
+        "dest_addrgrp",
+        "dest_any",
+        *(
+            f"{x}_{y}"
+            for x in ["src", "dest"]
+            for y in ["port_op", "port1_str", "port1_num", "port2_str", "port2_num"]
+        ),
+    ]
+)
+
+
+def _nxos_acl_format(output: list[dict[str, Any]]) -> list[dict[str, str]]:
+    """Formats NXOS 'show access-lists x | json' ACEs into the same data structure as the NTC template.
+
+    Args:
+        output (list[dict[str, Any]]): The command output from the device in JSON format, one dict per ACL cmd
+    Returns:
+        list[dict[str, str]]: List of dictionaries with the name, sequence number, action, and source for each ACE (same format as ACLs)
+    """
+    nxos_acl_list = []
+    for each_cmd in output:
+        for each_acl in fix_nxos(each_cmd, "TABLE_ip_ipv6_mac", "ROW_ip_ipv6_mac"):
+            for each_ace in fix_nxos(each_acl, "TABLE_seqno", "ROW_seqno"):
+                nxos_dict = dict(name=str(each_acl["acl_name"]))
+                nxos_dict["sn"] = str(each_ace["seqno"])
+                if each_ace.get("remark") is not None:
+                    nxos_dict["action"] = "remark"
+                    nxos_dict["source"] = str(each_ace["remark"])
+                else:
+                    nxos_dict["action"] = str(each_ace["permitdeny"])
+                    nxos_dict["source"] = str(
+                        each_ace.get(
+                            "src_ip_prefix",
+                            each_ace.get("src_addrgrp", each_ace.get("src_any", "any")),
+                        )
+                    )
+                    # Only used by full ACLs (acl), mgmt_acl only uses the source
+                    nxos_dict["protocol"] = str(
+                        each_ace.get(
+                            "proto_str", each_ace.get("ip", each_ace.get("proto", "ip"))
+                        )
+                    )
+                    nxos_dict["destination"] = str(
+                        each_ace.get(
+                            "dest_ip_prefix",
+                            each_ace.get(
+                                "dest_addrgrp", each_ace.get("dest_any", "any")
+                            ),
+                        )
+                    )
+                    nxos_dict.update(_nxos_acl_port(each_ace, "src", "src"))
+                    nxos_dict.update(_nxos_acl_port(each_ace, "dest", "dst"))
+                    # Any other match conditions (established, icmp types, dscp, etc) can't be evaluated by acl_flow
+                    qualifier = sorted(set(each_ace) - NXOS_ACE_KEYS)
+                    if qualifier:
+                        nxos_dict["qualifier"] = " ".join(qualifier)
+                nxos_acl_list.append(nxos_dict)
+    return nxos_acl_list
+
+
+def _nxos_module_format(output: list[dict[str, Any]]) -> list[dict[str, str]]:
+    """Formats NXOS 'show module | json' into the same data structure as the NTC template.
+
+    Args:
+        output (list[dict[str, Any]]): The command output from the device in JSON format
+    Returns:
+        list[dict[str, str]]: List of dictionaries with the module number, model and status of each module
+    """
+    return [
+        dict(
+            module=str(each_mod["modinf"]),
+            model=str(each_mod.get("model", "")),
+            status=str(each_mod.get("status", "")),
+        )
+        for each_mod in fix_nxos(output[0], "TABLE_modinfo", "ROW_modinfo")
+    ]
+
+
 def _acl_val_file(ace: list[dict[str, str]]) -> dict[str, list[dict[str, str]]]:
     """Creates a list of ace statements from an ACL for the validation file.
 
@@ -222,7 +420,7 @@ def _acl_actual_state(
     """
     ac_aces: defaultdict[int | str, dict[str, str]] = defaultdict(dict)
     for each_ace in ace:
-        seq = _make_int(each_ace[mgmt_acl_seq])
+        seq = make_int(each_ace[mgmt_acl_seq])
         ac_aces[seq]["action"] = each_ace["action"]
         ac_aces[seq]["protocol"] = "ip"
         ac_aces[seq]["dst"] = "any"
@@ -234,6 +432,25 @@ def _acl_actual_state(
     return dict(ac_aces)
 
 
+def _acl_full_ace(each_ace: dict[str, str]) -> dict[str, str]:
+    """Creates the actual state of an ACE for full ACLs, includes the protocol, destination and ports.
+
+    Args:
+        each_ace (dict[str, str]): Single ACL ACE with the blank values already removed
+    Returns:
+        dict[str, str]: ACE in the format {'action': x, 'protocol': y, 'src': address/pfx, 'dst': address/pfx, 'dst_port': 'eq 22'}
+    """
+    ace = dict(action=each_ace["action"], protocol=each_ace.get("protocol", "ip"))
+    # NXOS is already address/prefix, IOS needs to convert subnet mask
+    ace["src"] = each_ace.get("source") or _acl_scr_dst(each_ace, "src")
+    ace["dst"] = each_ace.get("destination") or _acl_scr_dst(each_ace, "dst")
+    for src_dst in ["src", "dst"]:
+        port = _acl_port(each_ace, src_dst)
+        if port:
+            ace[f"{src_dst}_port"] = port
+    return ace
+
+
 def _norm_ios_trk_grp(
     key: OsKeys, output: list[dict[str, str]]
 ) -> list[dict[str, str]]:
@@ -330,6 +547,29 @@ def format_acl(
     return result
 
 
+def format_full_acl(
+    key: OsKeys, output: list[dict[str, str]]
+) -> dict[str, dict[int | str, dict[str, str]]]:
+    """Format full ACLs into the data structure, is the same for the validation file and actual state.
+
+    Unlike mgmt_acl the sequence numbers are not renumbered, each ACE is kept under its actual sequence number.
+
+    Args:
+        key (OsKeys): Keys for the specific OS type to retrieve the output data
+        output (list[dict[str, str]]): The command output from the device
+    Returns:
+        dict[str, dict[int | str, dict[str, str]]]: {acl_name: {seq: {'action': x, 'protocol': y, 'src': address/pfx, 'dst': address/pfx, 'dst_port': 'eq 22'}}}
+    """
+    result: dict[str, dict[int | str, dict[str, str]]] = {}
+    for name, ace in _acl_format_into_dict(output, key.mgmt_acl_name).items():
+        result[name] = {
+            make_int(each_ace[key.mgmt_acl_seq]): _acl_full_ace(each_ace)
+            for each_ace in ace
+            if each_ace.get("action") != "remark"
+        }
+    return result
+
+
 def format_module(val_file: bool, output: list[dict[str, str]]) -> dict[str | int, Any]:
     """Format module into the data structure.
 
@@ -340,8 +580,8 @@ def format_module(val_file: bool, output: list[dict[str, str]]) -> dict[str | in
         dict[str | int, Any]:  {module_num: {model: xxx, status, ok}}, val_file is {module_num: {model: xxx}}
     """
     result: dict[int | str, dict[str, str]] = defaultdict(dict)
-    for each_mod in output:
-        mod = _make_int(each_mod["module"])
+    for each_mod in MODULE_SCHEMA.coerce(output):
+        mod = each_mod["module"]
         result[mod]["model"] = each_mod["model"]
         # If creating validation file
         if val_file:
@@ -382,7 +622,7 @@ def format_sla(
             result[probe[key.sla_grp]][probe[key.sla_dst]] = {"rtt": round(rtt_num)}
         except (ValueError, TypeError):
             result[probe[key.sla_grp]][probe[key.sla_dst]] = {
-                "rtt": _make_int(probe[key.sla_rtt])
+                "rtt": make_int(probe[key.sla_rtt])
             }
         # Add state if it is the actual state
         if not val_file:
@@ -397,6 +637,617 @@ def format_sla(
     return dict(result)
 
 
+# ----------------------------------------------------------------------------
+# FLOW: Compiles ACLs into an address index used to evaluate flows (acl_flow)
+# ----------------------------------------------------------------------------
+ALL_ADDR = 0xFFFFFFFF
+ALL_PORTS = ((0, 65535),)
+ANY_ADDR = (0, 0, 0, ALL_ADDR)
+# ACE match conditions that aren't evaluated (TCP flags, ICMP types, service object-groups, NXOS extras)
+ACL_QUALIFIERS = (
+    "tcp_flag",
+    "flags_match",
+    "icmp_type",
+    "service_object_group_name",
+    "qualifier",
+)
+# Protocol numbers, 'ip' (None) matches any protocol
+ACL_PROTOCOLS: dict[str, int | None] = {
+    "ip": None,
+    "icmp": 1,
+    "igmp": 2,
+    "ipinip": 4,
+    "tcp": 6,
+    "udp": 17,
+    "gre": 47,
+    "esp": 50,
+    "ahp": 51,
+    "ah": 51,
+    "eigrp": 88,
+    "ospf": 89,
+    "nos": 94,
+    "pim": 103,
+    "pcp": 108,
+    "sctp": 132,
+}
+# Name of each protocol number (first name if has more than one)
+ACL_PROTOCOL_NAMES = {
+    num: name for name, num in reversed(ACL_PROTOCOLS.items()) if num is not None
+}
+# Port names used by IOS, NXOS and ASA in place of the port number
+ACL_PORT_NAMES = {
+    "echo": 7,
+    "discard": 9,
+    "daytime": 13,
+    "chargen": 19,
+    "ftp-data": 20,
+    "ftp": 21,
+    "ssh": 22,
+    "telnet": 23,
+    "smtp": 25,
+    "time": 37,
+    "whois": 43,
+    "tacacs": 49,
+    "domain": 53,
+    "bootps": 67,
+    "bootpc": 68,
+    "tftp": 69,
+    "gopher": 70,
+    "finger": 79,
+    "www": 80,
+    "http": 80,
+    "kerberos": 88,
+    "hostname": 101,
+    "pop2": 109,
+    "pop3": 110,
+    "sunrpc": 111,
+    "ident": 113,
+    "nntp": 119,
+    "ntp": 123,
+    "netbios-ns": 137,
+    "netbios-dgm": 138,
+    "netbios-ss": 139,
+    "imap4": 143,
+    "snmp": 161,
+    "snmptrap": 162,
+    "xdmcp": 177,
+    "bgp": 179,
+    "irc": 194,
+    "dnsix": 195,
+    "ldap": 389,
+    "mobile-ip": 434,
+    "https": 443,
+    "pim-auto-rp": 496,
+    "isakmp": 500,
+    "biff": 512,
+    "exec": 512,
+    "login": 513,
+    "who": 513,
+    "cmd": 514,
+    "rsh": 514,
+    "syslog": 514,
+    "lpd": 515,
+    "talk": 517,
+    "rip": 520,
+    "uucp": 540,
+    "klogin": 543,
+    "kshell": 544,
+    "rtsp": 554,
+    "ldaps": 636,
+    "lotusnotes": 1352,
+    "citrix-ica": 1494,
+    "sqlnet": 1521,
+    "radius": 1645,
+    "radius-acct": 1646,
+    "h323": 1720,
+    "pptp": 1723,
+    "nfs": 2049,
+    "ctiqbe": 2748,
+    "cifs": 3020,
+    "non500-isakmp": 4500,
+    "sip": 5060,
+    "aol": 5190,
+    "pcanywhere-data": 5631,
+}
+
+
+class CompiledAce(NamedTuple):
+    """An ACE compiled into integers, addresses match if (addr & mask) == value and lo <= addr <= hi.
+
+    Args:
+        seq (int | str): Sequence number of the ACE
+        action (str): permit or deny
+        protocol (int | str | None): Protocol number, None for any (ip) or the name if it has no known number
+        src (tuple[int, int, int, int]): Source address in the format (value, mask, lo, hi)
+        dst (tuple[int, int, int, int]): Destination address in the format (value, mask, lo, hi)
+        src_port (tuple[tuple[int, int], ...] | None): Ranges of source ports (lo, hi), None for any port
+        dst_port (tuple[tuple[int, int], ...] | None): Ranges of destination ports (lo, hi), None for any port
+        exact (bool): False if some conditions couldn't be compiled (widened to any), a flow matching it is unknown
+    """
+
+    seq: int | str
+    action: str
+    protocol: int | str | None
+    src: tuple[int, int, int, int]
+    dst: tuple[int, int, int, int]
+    src_port: tuple[tuple[int, int], ...] | None
+    dst_port: tuple[tuple[int, int], ...] | None
+    exact: bool = True
+
+
+class Flow(NamedTuple):
+    """A flow to evaluate against an ACL, in the format 'src[:port] dst protocol[/port]'.
+
+    Args:
+        src (int): Source address as an integer
+        dst (int): Destination address as an integer
+        protocol (int | str | None): Protocol number, None for ip
+        src_port (int | None): Source port, None if the flow has no source port
+        dst_port (int | None): Destination port, None if the flow has no destination port
+    """
+
+    src: int
+    dst: int
+    protocol: int | str | None
+    src_port: int | None
+    dst_port: int | None
+
+
+def _acl_protocol(protocol: str) -> int | str | None:
+    """Gets the protocol number of an ACE or flow protocol, unknown names are kept as the name."""
+    if protocol.isdigit():
+        return int(protocol)
+    return ACL_PROTOCOLS.get(protocol, protocol)
+
+
+def _acl_port_num(port: str) -> int:
+    """Gets the port number of a port, raises ValueError if it is an unknown port name."""
+    if port.isdigit():
+        return int(port)
+    port_num = ACL_PORT_NAMES.get(port)
+    if port_num is None:
+        msg = f"Unknown ACL port name '{port}'"
+        raise ValueError(msg)
+    return port_num
+
+
+@functools.cache
+def _acl_addr_mask(
+    address: str, mask: str, wildcard: bool
+) -> tuple[int, int, int, int]:
+    """Compiles an address and subnet or wildcard mask (can be discontiguous) into (value, mask, lo, hi)."""
+    mask_int = int(ipaddress.IPv4Address(mask))
+    if wildcard:
+        mask_int = ALL_ADDR ^ mask_int
+    return (int(ipaddress.IPv4Address(address)) & mask_int, mask_int, 0, ALL_ADDR)
+
+
+@functools.cache
+def _acl_addr_prefix(prefix: str) -> tuple[int, int, int, int]:
+    """Compiles an address/prefix into (value, mask, lo, hi)."""
+    network = ipaddress.IPv4Network(prefix, strict=False)
+    return (int(network.network_address), int(network.netmask), 0, ALL_ADDR)
+
+
+def _acl_compile_addr(
+    each_ace: dict[str, str], src_dst: str
+) -> tuple[int, int, int, int] | None:
+    """Compiles the source or destination address of a normalised ACE (IOS NTC, NXOS or ASA keys).
+
+    Args:
+        each_ace (dict[str, str]): Single ACL ACE with the blank values already removed
+        src_dst (str): Either is the source (src) or destination (dst) address
+    Returns:
+        tuple[int, int, int, int] | None: Address as (value, mask, lo, hi), None if can't be compiled (object-groups, IPv6)
+    """
+    # NXOS is already address/prefix (or any), anything else is an address group
+    nxos_addr = each_ace.get("source" if src_dst == "src" else "destination")
+    if nxos_addr is not None:
+        if nxos_addr == "any":
+            return ANY_ADDR
+        return _acl_addr_prefix(nxos_addr) if "/" in nxos_addr else None
+    if each_ace.get(f"{src_dst}_host") is not None:
+        return _acl_addr_mask(each_ace[f"{src_dst}_host"], "255.255.255.255", False)
+    if each_ace.get(f"{src_dst}_wildcard") is not None:
+        addr, mask = each_ace[f"{src_dst}_network"], each_ace[f"{src_dst}_wildcard"]
+        return _acl_addr_mask(addr, mask, True)
+    if each_ace.get(f"{src_dst}_mask") is not None:
+        addr, mask = each_ace[f"{src_dst}_network"], each_ace[f"{src_dst}_mask"]
+        return _acl_addr_mask(addr, mask, False)
+    if each_ace.get(f"{src_dst}_range_start") is not None:
+        start = int(ipaddress.IPv4Address(each_ace[f"{src_dst}_range_start"]))
+        return (
+            0,
+            0,
+            start,
+            int(ipaddress.IPv4Address(each_ace[f"{src_dst}_range_end"])),
+        )
+    if each_ace.get(f"{src_dst}_any") in ["any", "any4"]:
+        return ANY_ADDR
+    return None
+
+
+def _acl_compile_port(
+    each_ace: dict[str, str], src_dst: str
+) -> tuple[tuple[int, int], ...] | None:
+    """Compiles the source or destination port match of a normalised ACE into port ranges.
+
+    Args:
+        each_ace (dict[str, str]): Single ACL ACE with the blank values already removed
+        src_dst (str): Either is the source (src) or destination (dst) port
+    Raises:
+        ValueError: If the port match operator isn't supported, such as precedence or tos
+    Returns:
+        tuple[tuple[int, int], ...] | None: Ranges of ports (lo, hi), None if the ACE doesn't match on port
+    """
+    match = each_ace.get(f"{src_dst}_port_match")
+    if match is None:
+        return None
+    if match == "range":
+        start = _acl_port_num(each_ace[f"{src_dst}_port_range_start"])
+        return ((start, _acl_port_num(each_ace[f"{src_dst}_port_range_end"])),)
+    # IOS can match multiple ports ('eq 22 23')
+    ports = [_acl_port_num(x) for x in each_ace[f"{src_dst}_port"].split()]
+    if match == "eq":
+        return tuple((x, x) for x in ports)
+    elif match == "gt":
+        return ((ports[0] + 1, 65535),)
+    elif match == "lt":
+        return ((0, ports[0] - 1),)
+    elif match == "neq":
+        return ((0, ports[0] - 1), (ports[0] + 1, 65535))
+    msg = f"Unsupported ACL port match '{match}'"
+    raise ValueError(msg)
+
+
+def _acl_compile_ace(each_ace: dict[str, str], seq: int | str) -> CompiledAce:
+    """Compiles a normalised ACE, conditions that can't be evaluated are widened to any and the ACE marked as not exact.
+
+    Is kept in the ACL (rather than dropped) so a flow that may match it isn't evaluated against the ACEs after it,
+    such as object-groups, IPv6, unknown port names, TCP flags (established) or ICMP types.
+
+    Args:
+        each_ace (dict[str, str]): Single ACL ACE with the blank values already removed
+        seq (int | str): Sequence number of the ACE
+    Returns:
+        CompiledAce: The compiled ACE, exact is False if any of its conditions couldn't be compiled
+    """
+    exact = not any(each_ace.get(x) is not None for x in ACL_QUALIFIERS)
+    src = _acl_compile_addr(each_ace, "src")
+    # IOS standard ACLs only match on the source
+    if each_ace.get("acl_type") == "Standard":
+        dst: tuple[int, int, int, int] | None = ANY_ADDR
+    else:
+        dst = _acl_compile_addr(each_ace, "dst")
+    if src is None or dst is None:
+        exact = False
+    ports: list[tuple[tuple[int, int], ...] | None] = []
+    for src_dst in ["src", "dst"]:
+        try:
+            ports.append(_acl_compile_port(each_ace, src_dst))
+        except (ValueError, KeyError, IndexError):
+            ports.append(None)
+            exact = False
+    protocol = _acl_protocol(each_ace.get("protocol", "ip"))
+    return CompiledAce(
+        seq,
+        each_ace["action"],
+        protocol,
+        src or ANY_ADDR,
+        dst or ANY_ADDR,
+        ports[0],
+        ports[1],
+        exact,
+    )
+
+
+def _parse_flow(flow: str) -> Flow:
+    """Parses a flow in the format 'src[:port] dst protocol[/port]', such as '10.1.1.1 10.2.0.5 tcp/22'.
+
+    Args:
+        flow (str): The flow from the validation file
+    Raises:
+        ValueError: If the flow is not in the correct format or the addresses aren't IPv4 addresses
+    Returns:
+        Flow: The flow with the addresses and ports as integers
+    """
+    try:
+        src, dst, protocol = str(flow).split()
+        src, _, src_port = src.partition(":")
+        protocol, _, dst_port = protocol.partition("/")
+        return Flow(
+            int(ipaddress.IPv4Address(src)),
+            int(ipaddress.IPv4Address(dst)),
+            _acl_protocol(protocol),
+            _acl_port_num(src_port) if src_port else None,
+            _acl_port_num(dst_port) if dst_port else None,
+        )
+    except ValueError as e:
+        msg = f"Invalid ACL flow '{flow}', must be in the format 'src[:port] dst protocol[/port]': {e}"
+        raise ValueError(msg) from e
+
+
+def _ace_match(ace: CompiledAce, flow: Flow) -> bool:
+    """Checks whether the flow matches all the conditions of the ACE."""
+    if ace.protocol is not None and ace.protocol != flow.protocol:
+        return False
+    value, mask, lo, hi = ace.src
+    if (flow.src & mask) != value or not lo <= flow.src <= hi:
+        return False
+    value, mask, lo, hi = ace.dst
+    if (flow.dst & mask) != value or not lo <= flow.dst <= hi:
+        return False
+    for ace_port, flow_port in [
+        (ace.src_port, flow.src_port),
+        (ace.dst_port, flow.dst_port),
+    ]:
+        if ace_port is not None and (
+            flow_port is None or not any(lo <= flow_port <= hi for lo, hi in ace_port)
+        ):
+            return False
+    return True
+
+
+class AclIndex:
+    """An ACL compiled into prefix indexes of the source and destination addresses to evaluate flows (first match wins).
+
+    The ACEs are bucketed by the prefix of their source and destination addresses, a flow only checks the ACEs
+    in the buckets its addresses fall into (from whichever of source or destination has the fewest) rather than
+    every ACE. ACEs with address ranges or discontiguous wildcards can't be bucketed so are checked for every flow.
+
+    Args:
+        aces (list[CompiledAce]): The compiled ACEs in ACL order
+    """
+
+    __slots__ = ("aces", "_index", "_results")
+
+    def __init__(self, aces: list[CompiledAce]) -> None:
+        self.aces = aces
+        self._results: dict[str, str] = {}
+        # Per address (src and dst) the {mask: {value: [ACE positions]}} and the positions that can't be bucketed
+        self._index: list[tuple[dict[int, dict[int, list[int]]], list[int]]] = []
+        for addr in ["src", "dst"]:
+            buckets: dict[int, dict[int, list[int]]] = {}
+            unbucketed: list[int] = []
+            for pos, ace in enumerate(aces):
+                value, mask, lo, hi = getattr(ace, addr)
+                # Contiguous masks (prefixes) that are not ranges can be bucketed
+                if (
+                    lo == 0
+                    and hi == ALL_ADDR
+                    and (ALL_ADDR ^ mask) & ((ALL_ADDR ^ mask) + 1) == 0
+                ):
+                    buckets.setdefault(mask, {}).setdefault(value, []).append(pos)
+                else:
+                    unbucketed.append(pos)
+            self._index.append((buckets, unbucketed))
+
+    def _candidates(self, addr_idx: int, addr: int) -> list[list[int]]:
+        """Gets the lists of ACE positions (each in ACL order) whose source or destination bucket matches the address."""
+        buckets, unbucketed = self._index[addr_idx]
+        candidates = [unbucketed] if unbucketed else []
+        for mask, values in buckets.items():
+            positions = values.get(addr & mask)
+            if positions:
+                candidates.append(positions)
+        return candidates
+
+    def match(self, flow: Flow) -> CompiledAce | None:
+        """Gets the first ACE that matches the flow.
+
+        Args:
+            flow (Flow): The flow to evaluate
+        Returns:
+            CompiledAce | None: The first matching ACE, None if the flow only matches the implicit deny
+        """
+        src_cand = self._candidates(0, flow.src)
+        dst_cand = self._candidates(1, flow.dst)
+        if sum(map(len, src_cand)) <= sum(map(len, dst_cand)):
+            candidates = src_cand
+        else:
+            candidates = dst_cand
+        for pos in heapq.merge(*candidates):
+            if _ace_match(self.aces[pos], flow):
+                return self.aces[pos]
+        return None
+
+    def evaluate(self, flow: str) -> str:
+        """Gets the action (permit or deny) the ACL takes on a flow, results are cached per flow.
+
+        Args:
+            flow (str): The flow in the format 'src[:port] dst protocol[/port]'
+        Returns:
+            str: The action of the first matching ACE, deny if only matches the implicit deny, unknown if first
+                reaches an ACE that couldn't be fully compiled (may or may not match) or invalid if the flow is malformed
+        """
+        action = self._results.get(flow)
+        if action is None:
+            # INVALID: A malformed flow fails on its own rather than stopping the other flows being evaluated
+            try:
+                parsed_flow = _parse_flow(flow)
+            except ValueError:
+                action = "invalid"
+            else:
+                ace = self.match(parsed_flow)
+                action = "deny" if ace is None else ace.action
+                if ace is not None and not ace.exact:
+                    action = "unknown"
+            self._results[flow] = action
+        return action
+
+
+def _flow_port(ports: tuple[tuple[int, int], ...] | None) -> int | None:
+    """Gets a port within the port ranges of an ACE used for the representative flow."""
+    return ports[0][0] if ports is not None else None
+
+
+def _acl_flow_repr(ace: CompiledAce) -> str:
+    """Creates the representative flow of an ACE, the first address and port that match the ACE.
+
+    Args:
+        ace (CompiledAce): The compiled ACE
+    Returns:
+        str: Flow in the format 'src[:port] dst protocol[/port]'
+    """
+    src = str(ipaddress.IPv4Address(ace.src[0] | ace.src[2]))
+    dst = str(ipaddress.IPv4Address(ace.dst[0] | ace.dst[2]))
+    src_port, dst_port = _flow_port(ace.src_port), _flow_port(ace.dst_port)
+    if src_port is not None:
+        src = f"{src}:{src_port}"
+    if ace.protocol is None:
+        protocol = "ip"
+    elif isinstance(ace.protocol, int):
+        protocol = ACL_PROTOCOL_NAMES.get(ace.protocol, str(ace.protocol))
+    else:
+        protocol = ace.protocol
+    if dst_port is not None:
+        protocol = f"{protocol}/{dst_port}"
+    return f"{src} {dst} {protocol}"
+
+
+def _asa_acl_entry(each_ace: dict[str, str], prefix: str) -> dict[str, str]:
+    """Converts the addresses and ports of an ASA ACE (config line or an expanded entry) into the IOS NTC keys.
+
+    Args:
+        each_ace (dict[str, str]): ASA ACE from the NTC template with the blank values already removed
+        prefix (str): Key prefix, 'entry_' for the expanded entries of object-groups or '' for a config line
+    Returns:
+        dict[str, str]: The protocol, addresses and ports in the same format as IOS (mask rather than wildcard)
+    """
+    ace = {
+        "protocol": each_ace.get(
+            f"{prefix}protocol", each_ace.get("entry_protocol_icmp", "ip")
+        )
+    }
+    for src_dst in ["src", "dst"]:
+        asa = f"{prefix}{src_dst}"
+        for ace_key in ["host", "network", "mask", "any", "range_start", "range_end"]:
+            if each_ace.get(f"{asa}_{ace_key}") is not None:
+                ace[f"{src_dst}_{ace_key}"] = each_ace[f"{asa}_{ace_key}"]
+    # ICMP types can't be evaluated by acl_flow so are kept to mark the ACE as not exact
+    if each_ace.get(f"{prefix}icmp_type") is not None:
+        ace["icmp_type"] = each_ace[f"{prefix}icmp_type"]
+    # Config lines only have destination ports, the entry destination port has no dst_ in the name
+    ports = {"src": f"{prefix}src_port", "dst": "entry_port" if prefix else "dst_port"}
+    for src_dst, asa in ports.items():
+        if each_ace.get(asa) is not None:
+            ace.update(
+                {f"{src_dst}_port_match": "eq", f"{src_dst}_port": each_ace[asa]}
+            )
+        elif each_ace.get(f"{asa}_less_than") is not None:
+            ace.update(
+                {
+                    f"{src_dst}_port_match": "lt",
+                    f"{src_dst}_port": each_ace[f"{asa}_less_than"],
+                }
+            )
+        elif each_ace.get(f"{asa}_greater_than") is not None:
+            ace.update(
+                {
+                    f"{src_dst}_port_match": "gt",
+                    f"{src_dst}_port": each_ace[f"{asa}_greater_than"],
+                }
+            )
+        elif each_ace.get(f"{asa}_range_start") is not None:
+            ace[f"{src_dst}_port_match"] = "range"
+            ace[f"{src_dst}_port_range_start"] = each_ace[f"{asa}_range_start"]
+            ace[f"{src_dst}_port_range_end"] = each_ace[f"{asa}_range_end"]
+    return ace
+
+
+def _asa_acl_format(output: list[dict[str, str]]) -> list[dict[str, str]]:
+    """Formats ASA 'show access-list x' ACEs into the IOS NTC keys, object-group lines are replaced by their expanded entries.
+
+    Args:
+        output (list[dict[str, str]]): The command output from the device in ntc data structure
+    Returns:
+        list[dict[str, str]]: List of ACEs with the name, sequence number, action, protocol, addresses and ports
+    """
+    object_keys = [
+        "svc_object_grp",
+        "svc_object",
+        "src_intfc",
+        "src_object_grp",
+        "src_object",
+        "dst_intfc",
+        "dst_object_grp",
+        "dst_object",
+        "dst_port_grp",
+        "dst_port_object",
+    ]
+    asa_acl_list = []
+    for each_ace in output:
+        each_ace = {k: v for k, v in each_ace.items() if len(v) != 0}
+        # Skips the ACL header, remarks and inactive ACEs
+        if each_ace.get("action") is None or "inactive" in [
+            each_ace.get("state"),
+            each_ace.get("entry_state"),
+        ]:
+            continue
+        asa_dict = dict(
+            name=each_ace["acl_name"],
+            sn=each_ace["line_num"],
+            action=each_ace["action"],
+        )
+        if any(x.startswith("entry_") for x in each_ace):
+            asa_dict.update(_asa_acl_entry(each_ace, "entry_"))
+        # Object-group config lines are evaluated using their expanded entries
+        elif not any(each_ace.get(x) is not None for x in object_keys):
+            asa_dict.update(_asa_acl_entry(each_ace, ""))
+        else:
+            continue
+        asa_acl_list.append(asa_dict)
+    return asa_acl_list
+
+
+def compile_acl(key: OsKeys, output: list[dict[str, str]]) -> dict[str, AclIndex]:
+    """Compiles each ACL of the normalised command output into an index used to evaluate flows.
+
+    Args:
+        key (OsKeys): Keys for the specific OS type to retrieve the output data
+        output (list[dict[str, str]]): The command output normalised to the IOS NTC keys, NXOS and ASA already converted
+    Returns:
+        dict[str, AclIndex]: {acl_name: AclIndex}
+    """
+    result = {}
+    for name, ace in _acl_format_into_dict(output, key.mgmt_acl_name).items():
+        compiled = []
+        for each_ace in ace:
+            if each_ace.get("action") in ["permit", "deny"]:
+                compiled.append(
+                    _acl_compile_ace(each_ace, make_int(each_ace[key.mgmt_acl_seq]))
+                )
+        result[name] = AclIndex(compiled)
+    return result
+
+
+def format_acl_flow(
+    key: OsKeys, output: list[dict[str, str]], flows: dict[str, Any] | None = None
+) -> dict[str, dict[str, str]]:
+    """Format ACL flows into the data structure, evaluating each flow against the compiled ACL.
+
+    Without flows (validation file or no desired state) the flows are one representative flow per ACE,
+    the first source and destination address (and port) that match the ACE (ACEs that aren't exact are skipped).
+
+    Args:
+        key (OsKeys): Keys for the specific OS type to retrieve the output data
+        output (list[dict[str, str]]): The command output normalised to the IOS NTC keys (NXOS and ASA already converted)
+        flows (dict[str, Any] | None): Flows of the desired state in the format acl_name: flow: action
+    Returns:
+        dict[str, dict[str, str]]: {acl_name: {'src[:port] dst protocol[/port]': permit/deny/unknown/invalid}}
+    """
+    result: dict[str, dict[str, str]] = {}
+    for name, acl_index in compile_acl(key, output).items():
+        if flows is None:
+            acl_flows = list(
+                dict.fromkeys(_acl_flow_repr(x) for x in acl_index.aces if x.exact)
+            )
+        else:
+            acl_flows = [x for x in flows.get(name) or {} if not str(x).startswith("_")]
+        result[name] = {flow: acl_index.evaluate(flow) for flow in acl_flows}
+    return result
+
+
 # ----------------------------------------------------------------------------
 # ACTUAL_STATE: Engine use to create sub-feature actual state or validation file
 # ----------------------------------------------------------------------------
@@ -417,7 +1268,16 @@ def format_actual_state(
         str | dict[Any, Any]: Returns cmd output formatted into the data structure of actual state or validation file
     """
     key = _set_keys(os_type)
-    raw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    raw_output, ntc_output = split_output(os_type, sub_feature, output)
+
+    # NXOS: Converts JSON output into the same data structure as the NTC templates
+    if bool(re.search("nxos", os_type)):
+        if sub_feature == "image":
+            ntc_output = _nxos_image_format(ntc_output)
+        elif sub_feature in ["mgmt_acl", "acl"]:
+            ntc_output = _nxos_acl_format(ntc_output)
+        elif sub_feature == "module":
+            ntc_output = _nxos_module_format(ntc_output)
 
     ### IMAGE: {image: code_number}
     if sub_feature == "image":
@@ -430,6 +1290,16 @@ def format_actual_state(
             ntc_output.extend(_acl_asa_format(raw_output, "http"))
         return format_acl(val_file, key, ntc_output)
 
+    ### ACL: {acl_name: seq_num: {action: permit/deny, protocol: ip/tcp/udp, src: src_ip, dst: dst_ip, src_port: port, dst_port: port}}
+    elif sub_feature == "acl":
+        if bool(re.search("asa", os_type)):
+            ntc_output = _asa_full_acl_format(ntc_output)
+        return format_full_acl(key, ntc_output)
+
+    ### ACL_FLOW: {acl_name: {flow: permit/deny/unknown/invalid}}
+    elif sub_feature == "acl_flow":
+        return format_acl_flow(key, _acl_flow_format(os_type, ntc_output))
+
     ### MODULE: {module_num: {model: xxx, status, ok}}
     elif sub_feature == "module":
         return format_module(val_file, ntc_output)
@@ -442,3 +1312,47 @@ def format_actual_state(
     else:
         msg = f"Unsupported sub_feature: {sub_feature}"
         raise ValueError(msg)
+
+
+# ----------------------------------------------------------------------------
+# EVALUATE: Sub-features whose actual state depends on the desired state
+# ----------------------------------------------------------------------------
+def _acl_flow_format(
+    os_type: str, output: list[dict[str, str]]
+) -> list[dict[str, str]]:
+    """Converts NXOS JSON and ASA NTC ACL output into the same keys as the IOS NTC template.
+
+    Args:
+        os_type (str): The different Nornir platforms which are OS type of the device
+        output (list[dict[str, str]]): The command output from the device
+    Returns:
+        list[dict[str, str]]: ACEs normalised to the IOS NTC keys (IOS is returned unchanged)
+    """
+    if bool(re.search("nxos", os_type)):
+        return _nxos_acl_format(output)
+    elif bool(re.search("asa", os_type)):
+        return _asa_acl_format(output)
+    return output
+
+
+def evaluate_actual_state(
+    os_type: str,
+    sub_feature: str,
+    output: list[str | dict[str, str]],
+    desired_state: dict[str, Any],
+) -> dict[str, Any] | None:
+    """Engine to create the actual state of sub-features evaluated against the desired state, such as ACL flows.
+
+    Args:
+        os_type (str): The different Nornir platforms which are OS type of the device
+        sub_feature (str): The name of the sub-feature that is being validated
+        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str/int from raw) command output from the device
+        desired_state (dict[str, Any]): Desired state of the sub-feature without the cmds
+    Returns:
+        dict[str, Any] | None: The evaluated actual state, None if the sub-feature isn't evaluated against the desired state
+    """
+    if sub_feature != "acl_flow":
+        return None
+    key = _set_keys(os_type)
+    ntc_output = split_output(os_type, sub_feature, output)[1]
+    return format_acl_flow(key, _acl_flow_format(os_type, ntc_output), desired_state)
@@ -2,24 +2,12 @@ import re
 from collections import defaultdict
 from typing import Any
 
+from nornir_validate.formatting import make_int
+
 
 # ----------------------------------------------------------------------------
 # DEF: Mini-functions used by the main function
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
-
-    Args:
-        input_data (str): The data to be converted to an integer
-    Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
-    """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
-
-
 def format_sts_peer(
     val_file: bool,
     os_type: str,
@@ -101,7 +89,7 @@ def format_vpn_count(
     for each_line in output:
         if isinstance(each_line, str):
             if "Number of lines which match regexp" in each_line:
-                result["sts"] = _make_int(each_line.split()[-1])
+                result["sts"] = make_int(each_line.split()[-1])
         else:
             for each_vpn, active_sess in zip(
                 each_line["vpn_session_name"],
@@ -109,7 +97,7 @@ def format_vpn_count(
                 strict=False,
             ):
                 if each_vpn == "AnyConnect Client":
-                    result["ac"] = _make_int(active_sess)
+                    result["ac"] = make_int(active_sess)
     return result
 
 
@@ -1,54 +1,64 @@
-from collections import defaultdict
+import re
+from collections import Counter, defaultdict
+from collections.abc import Collection, Iterable
 from typing import Any
 
+from nornir_validate.formatting import (
+    DeclaredFormatters,
+    FormatterSpec,
+    RowSchema,
+    make_int,
+    split_output,
+)
 
 # ----------------------------------------------------------------------------
-# OUTPUT: Creates str or ntc output dictionaries based on device command output
+# SCHEMA: Field types of the command output rows, coerced in bulk before formatting
 # ----------------------------------------------------------------------------
-def _format_output(
-    os_type: str, sub_feature: str, output: list[str | dict[str, str]]
-) -> tuple[list[str], list[dict[str, str]]]:
-    """Screen scraping return different data structures, they need defining to make function typing easier.
-
-    Args:
-        os_type (str): A list of strings that are the OS types of the devices in the inventory
-        sub_feature (str): The name of the sub-feature that is being validated
-        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
-    Raises:
-        ValueError: Errors if the new output variable doesn't match the input as not meant to be changing it, just defining it for MYPY
-    Returns:
-        tuple[list[str], list[dict[str, str]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
-    """
-    raw_output = [o for o in output if isinstance(o, str)]
-    ntc_output = [o for o in output if isinstance(o, dict)]
-    if (
-        len(raw_output) != 0
-        and output != raw_output
-        or len(ntc_output) != 0
-        and output != ntc_output
-    ):
-        msg = f"{os_type} {sub_feature} _format_output is malformed"
-        raise ValueError(msg)
-    return raw_output, ntc_output
+WLAN_SCHEMA = RowSchema({"wlanid": "int_or_str"})
+AP_SCHEMA = RowSchema({"clients": "int_or_str"})
+FLEXCONNECT_SCHEMA = RowSchema({"ap_count": "int_or_str"})
+# Rows of clients in 'show client summary' start with the client MAC address
+CLIENT_ROW = re.compile(r"[0-9a-fA-F]{2}(?::[0-9a-fA-F]{2}){5}\s")
+INTF_GRP_SCHEMA = RowSchema(
+    {
+        "total_ap_groups": "int_or_str",
+        "total_interfaces": "int_or_str",
+        "total_wlans": "int_or_str",
+    }
+)
 
 
 # ----------------------------------------------------------------------------
-# DEF: Mini-functions used by the main function
+# DECLARED: Sub-features formatted by compiled declarations, the hand-written formatters are the fallback
 # ----------------------------------------------------------------------------
-def _make_int(input_data: str) -> int | str:
-    """Takes a string and returns an integer if it can, otherwise it returns the original string.
-
-    Args:
-        input_data (str): The data to be converted to an integer
-    Returns:
-        int | str: The input_data as a integer if possible, if not as the original string
-    """
-    try:
-        return int(input_data)
-    except ValueError:
-        return input_data
+FORMATTERS = DeclaredFormatters(
+    {
+        "ap": FormatterSpec(
+            key="ap_name",
+            fields={"model": "ap_model", "ip": "ip_address", "client_count": "clients"},
+            schema=AP_SCHEMA,
+        ),
+        "flexconnect": FormatterSpec(
+            key="flexconnect_group_name",
+            fields={"ap_count": "ap_count"},
+            schema=FLEXCONNECT_SCHEMA,
+        ),
+        "intf_grp": FormatterSpec(
+            key="interface_group_name",
+            fields={
+                "ap_grp_count": "total_ap_groups",
+                "intf_count": "total_interfaces",
+                "wlan_count": "total_wlans",
+            },
+            schema=INTF_GRP_SCHEMA,
+        ),
+    }
+)
 
 
+# ----------------------------------------------------------------------------
+# DEF: Mini-functions used by the main function
+# ----------------------------------------------------------------------------
 def format_wlan(val_file: bool, output: list[dict[str, str]]) -> dict[str | int, Any]:
     """Format WLANs into the data structure.
 
@@ -59,8 +69,8 @@ def format_wlan(val_file: bool, output: list[dict[str, str]]) -> dict[str | int,
         dict[str | int, Any]: {wlan_id: {intf: x, ssid: xy, status: Enabled}}, if val_file is {wlan_id: {interface: x, ssid: xy}}
     """
     result: dict[str | int, dict[str, str]] = defaultdict(dict)
-    for each_wlan in output:
-        wlanid = _make_int(each_wlan["wlanid"])
+    for each_wlan in WLAN_SCHEMA.coerce(output):
+        wlanid = each_wlan["wlanid"]
         result[wlanid]["ssid"] = each_wlan["ssid"]
         # If creating actual state (replace(none) needed as long names merge next column (PIMIPv6))
         if not val_file:
@@ -74,48 +84,110 @@ def format_wlan(val_file: bool, output: list[dict[str, str]]) -> dict[str | int,
     return dict(result)
 
 
-def format_ap(output: list[dict[str, str]]) -> dict[str, Any]:
-    """Format APs into the data structure.
+def format_ap(
+    output: Iterable[dict[str, str]], ap_names: Collection[str] | None = None
+) -> dict[str, Any]:
+    """Format APs into the data structure, each AP row is formatted as it is streamed.
 
     Args:
-        output (list[dict[str, str]]): The command output from the device in ntc data structure
+        output (Iterable[dict[str, str]]): The command output from the device in ntc data structure
+        ap_names (Collection[str] | None): Only the APs named (such as in the desired state) are formatted, all APs if None
     Returns:
-        dict[str, Any]: {ap_name: {model: x, ip: x, clients: x}}}
+        dict[str, Any]: {ap_name: {model: x, ip: x, client_count: x}}}
     """
-    result: dict[str, dict[str, str | int]] = defaultdict(dict)
+    result: dict[str, dict[str, str | int]] = {}
     for each_ap in output:
-        result[each_ap["ap_name"]]["model"] = each_ap["ap_model"]
-        result[each_ap["ap_name"]]["ip"] = each_ap["ip_address"]
-        result[each_ap["ap_name"]]["client_count"] = _make_int(each_ap["clients"])
-    return dict(result)
+        ap_name = each_ap["ap_name"]
+        if ap_names is None or ap_name in ap_names:
+            result[ap_name] = {
+                "model": each_ap["ap_model"],
+                "ip": each_ap["ip_address"],
+                "client_count": make_int(each_ap["clients"]),
+            }
+    return result
+
+
+def format_ap_model(output: Iterable[dict[str, str]]) -> dict[str, Any]:
+    """Format the number of APs and clients of each AP model into the data structure, counted in a single pass of the APs.
+
+    Args:
+        output (Iterable[dict[str, str]]): The command output from the device in ntc data structure
+    Returns:
+        dict[str, Any]: {model: {ap_count: x, client_count: x}}
+    """
+    result: dict[str, dict[str, int]] = {}
+    for each_ap in output:
+        counts = result.get(each_ap["ap_model"])
+        if counts is None:
+            counts = result[each_ap["ap_model"]] = {"ap_count": 0, "client_count": 0}
+        counts["ap_count"] += 1
+        clients = make_int(each_ap["clients"])
+        if isinstance(clients, int):
+            counts["client_count"] += clients
+    return result
 
 
 def format_client_count(output: list[str]) -> dict[str, str | int]:
-    """Format client count into the data structure.
+    """Format client count into the data structure, the output is scanned once.
+
+    The count of each WLAN is the first client count after the invalid WLAN (999 + WLAN ID) error that marks the start of its output.
 
     Args:
         output (list[str]): The command output from the device in raw data structure
     Returns:
         dict[str, str | int]: {total_count: x, wlxx_count: x}
     """
-    result = {}
-    tmp_output = []
-    # Gathers AP count from raw screen scrapped output
+    result: dict[str, str | int] = {}
+    wlan_name = None
     for each_line in output:
-        if "Number of Cl" in each_line or "Invalid WLAN ID 999" in each_line:
-            tmp_output.append(each_line)
-    # Formats client count from the slimmed down data
-    if len(tmp_output) != 0:
-        for idx, each_line in enumerate(tmp_output):
-            if "Invalid WLAN ID 999" in each_line:
-                name = f"wl{each_line.split()[4].replace('999', '')}_count"
-                result[name] = _make_int(tmp_output[idx + 1].split()[-1])
-                tmp_output[idx + 1] = ""
-            elif "Number of Cl" in each_line:
-                result["total_count"] = _make_int(each_line.split()[-1])
+        # Line after the invalid WLAN error is the count of that WLAN
+        if wlan_name is not None:
+            if "Number of Cl" in each_line or "Invalid WLAN ID 999" in each_line:
+                result[wlan_name] = make_int(each_line.split()[-1])
+                wlan_name = None
+        elif "Invalid WLAN ID 999" in each_line:
+            wlan_name = f"wl{each_line.split()[4].replace('999', '')}_count"
+        elif "Number of Cl" in each_line:
+            result["total_count"] = make_int(each_line.split()[-1])
     return result
 
 
+def _table_column(header: str, dashes: str, name: str) -> slice | None:
+    """Gets the position of a column in a raw table from the header and the dashes under it, None if there is no column of that name.
+
+    Rows can be offset from the header so the column spans from the end of the previous column to the start of the next.
+    """
+    spans = [x.span() for x in re.finditer("-+", dashes)]
+    for idx, (start, end) in enumerate(spans):
+        if header[start:end].strip() == name:
+            col_start = spans[idx - 1][1] if idx > 0 else 0
+            col_end = spans[idx + 1][0] if idx + 1 < len(spans) else None
+            return slice(col_start, col_end)
+    return None
+
+
+def format_wlan_client(output: list[str]) -> dict[str | int, Any]:
+    """Format the number of clients on each WLAN into the data structure, counted in a single pass of the client summary.
+
+    Args:
+        output (list[str]): The command output from the device in raw data structure
+    Returns:
+        dict[str | int, Any]: {wlan_id: {client_count: x}}
+    """
+    counts: Counter[str] = Counter()
+    header, wlan_col = "", None
+    for each_line in output:
+        if each_line.startswith("MAC Address"):
+            header = each_line
+        elif header and each_line.startswith("---"):
+            wlan_col = _table_column(header, each_line, "WLAN")
+            header = ""
+        elif wlan_col is not None and CLIENT_ROW.match(each_line):
+            counts[each_line[wlan_col].strip()] += 1
+    # WLAN IDs made integers once per WLAN rather than for every client
+    return {make_int(wlan): {"client_count": cnt} for wlan, cnt in counts.items()}
+
+
 def format_flexconnect(output: list[dict[str, str]]) -> dict[str, Any]:
     """Format flexconnect groups into the data structure.
 
@@ -125,9 +197,9 @@ def format_flexconnect(output: list[dict[str, str]]) -> dict[str, Any]:
         dict[str, Any]: {grp_name: {ap_count: x}}}
     """
     result: dict[str, dict[str, str | int]] = defaultdict(dict)
-    for each_grp in output:
+    for each_grp in FLEXCONNECT_SCHEMA.coerce(output):
         name = each_grp["flexconnect_group_name"]
-        result[name]["ap_count"] = _make_int(each_grp["ap_count"])
+        result[name]["ap_count"] = each_grp["ap_count"]
     return dict(result)
 
 
@@ -140,11 +212,11 @@ def format_intf_grp(output: list[dict[str, str]]) -> dict[str, Any]:
         dict[str, Any]: {ap_count: x, intf_count: x, wlan_count: x}}}
     """
     result: dict[str, dict[str, str | int]] = defaultdict(dict)
-    for each_grp in output:
+    for each_grp in INTF_GRP_SCHEMA.coerce(output):
         name = each_grp["interface_group_name"]
-        result[name]["ap_grp_count"] = _make_int(each_grp["total_ap_groups"])
-        result[name]["intf_count"] = _make_int(each_grp["total_interfaces"])
-        result[name]["wlan_count"] = _make_int(each_grp["total_wlans"])
+        result[name]["ap_grp_count"] = each_grp["total_ap_groups"]
+        result[name]["intf_count"] = each_grp["total_interfaces"]
+        result[name]["wlan_count"] = each_grp["total_wlans"]
     return dict(result)
 
 
@@ -153,7 +225,7 @@ def format_intf_grp(output: list[dict[str, str]]) -> dict[str, Any]:
 # ----------------------------------------------------------------------------
 def format_actual_state(
     val_file: bool,
-    os_type: str,  # noqa: ARG001
+    os_type: str,
     sub_feature: str,
     output: list[str | dict[str, str]],
 ) -> dict[Any, Any]:
@@ -167,7 +239,11 @@ def format_actual_state(
     Returns:
         dict[str, Any]: Returns cmd output formatted into the data structure of actual state or validation file
     """
-    raw_output, ntc_output = _format_output(os_type, sub_feature, output)
+    # DECLARED: Sub-features with a formatter declaration, any others use the hand-written formatters
+    formatted = FORMATTERS.format(val_file, os_type, sub_feature, output)
+    if formatted is not None:
+        return formatted
+    raw_output, ntc_output = split_output(os_type, sub_feature, output)
     ### WLAN: {wlan_id: {intf: x, ssid: xy, status: Enabled}}}, if val_file is {wlan_id: {interface: x, ssid: xy}}
     if sub_feature == "wlan":
         return format_wlan(val_file, ntc_output)
@@ -176,10 +252,18 @@ def format_actual_state(
     elif sub_feature == "ap":
         return format_ap(ntc_output)
 
+    ### AP_MODEL: {model: {ap_count: x, client_count: x}}
+    elif sub_feature == "ap_model":
+        return format_ap_model(ntc_output)
+
     ### CLIENT_COUNT: {total_count: x, wlxx_count: x}
     elif sub_feature == "client_count":
         return format_client_count(raw_output)
 
+    ### WLAN_CLIENT: {wlan_id: {client_count: x}}
+    elif sub_feature == "wlan_client":
+        return format_wlan_client(raw_output)
+
     ### FLEXCONN: {grp_name: {ap_count: x}}}
     elif sub_feature == "flexconnect":
         return format_flexconnect(ntc_output)
@@ -192,3 +276,31 @@ def format_actual_state(
     else:
         msg = f"Unsupported sub_feature: {sub_feature}"
         raise ValueError(msg)
+
+
+# ----------------------------------------------------------------------------
+# EVALUATE: Engine used to create the actual state of sub-features that only need what the desired state names
+# ----------------------------------------------------------------------------
+def evaluate_actual_state(
+    os_type: str,
+    sub_feature: str,
+    output: list[str | dict[str, str]],
+    desired_state: dict[str, Any],
+) -> dict[str, Any] | None:
+    """Engine to create the actual state of sub-features from only the entries named in the desired state, such as APs.
+
+    Large controllers have thousands of APs but a validation file normally names a few of them, only those are formatted.
+
+    Args:
+        os_type (str): The different Nornir platforms which are OS type of the device
+        sub_feature (str): The name of the sub-feature that is being validated
+        output (list[str | dict[str, str]]): The structured (dict from NTC template) or unstructured (str/int from raw) command output from the device
+        desired_state (dict[str, Any]): Desired state of the sub-feature without the cmds
+    Returns:
+        dict[str, Any] | None: The actual state of the named entries, None if the sub-feature needs all the entries
+    """
+    # STRICT: Needs all the APs to find any extra so is formatted as normal
+    if sub_feature != "ap" or "strict" in str(desired_state.get("_mode", "")).split():
+        return None
+    ntc_output = split_output(os_type, sub_feature, output)[1]
+    return format_ap(ntc_output, desired_state.keys())
@@ -0,0 +1,391 @@
+import re
+from collections.abc import Callable, Iterable, Sequence
+from itertools import repeat
+from typing import Any, Literal, NamedTuple, cast
+
+
+# ----------------------------------------------------------------------------
+# OUTPUT: Splits the command output into str (raw) or dict (ntc) output, shared by all features
+# ----------------------------------------------------------------------------
+def split_output(
+    os_type: str,
+    sub_feature: str,
+    output: list[Any],
+    int_as_str: bool = False,
+) -> tuple[list[str], list[dict[str, Any]]]:
+    """Screen scraping return different data structures, they need defining to make function typing easier.
+
+    The type of the first item decides the type the output should be, checking stops at the first item that doesn't
+    match. If all the items match the output list is returned as is rather than copying it.
+
+    Args:
+        os_type (str): The OS type of the device, used in the error message
+        sub_feature (str): The name of the sub-feature that is being validated, used in the error message
+        output (list[Any]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
+        int_as_str (bool): Raw output can also be integers, these are converted to strings
+    Raises:
+        ValueError: If the output is a mix of raw, NTC or other types
+    Returns:
+        tuple[list[str], list[dict[str, Any]]]: Returns either RAW list[str] or NTC list[dict], the other non-matched one will be empty
+    """
+    if not output:
+        return [], []
+    raw_types: type | tuple[type, ...] = (str, int) if int_as_str else str
+    # NTC: Most output is parsed, all are dicts
+    if isinstance(output[0], dict):
+        if all(map(isinstance, output, repeat(dict))):
+            return [], cast("list[dict[str, Any]]", output)
+    # RAW: All are strings, or strings and integers if are converted
+    elif isinstance(output[0], raw_types):
+        if all(map(isinstance, output, repeat(str))):
+            return cast("list[str]", output), []
+        if int_as_str and all(map(isinstance, output, repeat(raw_types))):
+            return [str(o) for o in output], []
+    # OTHER: Output that is neither (such as JSON lists) is not used, unless is mixed with raw or NTC output
+    elif not any(isinstance(o, (str, dict)) for o in output):
+        return [], []
+    msg = f"{os_type} {sub_feature} output is malformed"
+    raise ValueError(msg)
+
+
+def fix_nxos(
+    main_dict: dict[str, Any], parent_name: str, child_name: str
+) -> list[dict[str, Any]]:
+    """NXOS JSON makes dict rather than list if only 1 item in output. If the child_dict is a dict this methods convert it to a list.
+
+    Args:
+        main_dict (dict[str, Any]): The dictionary of the command output
+        parent_name (str): The parent dictionary key name (e.g. TABLE_xx)
+        child_name (str): The key of the dictionary that you want to fix, for example ROW_xx
+    Returns:
+        list[dict[str, Any]]: A list of dictionaries (empty if the table is not in the output)
+    """
+    child_dict_value: list[dict[str, Any]] | dict[str, Any] = main_dict.get(
+        parent_name, {}
+    ).get(child_name, [])
+    if isinstance(child_dict_value, dict):
+        child_dict_value = [child_dict_value]
+    return child_dict_value
+
+
+# ----------------------------------------------------------------------------
+# COERCE: Converts field values to the type declared by the sub-feature schema, checks rather than catching exceptions
+# ----------------------------------------------------------------------------
+# Strings int() accepts that aren't just digits, such as '-1', ' 10 ' or '1_000' (\d is any unicode decimal like int())
+_INT_STR = re.compile(r"\s*[+-]?\d+(?:_\d+)*\s*")
+
+FieldType = Literal["int_or_str"]
+
+
+def make_int(input_data: str) -> int | str:
+    """Takes a string and returns an integer if it can, otherwise it returns the original string.
+
+    Same result as int() in a try/except but without raising and catching an exception for every non-numeric value.
+
+    Args:
+        input_data (str): The data to be converted to an integer, JSON output can already be an integer
+    Returns:
+        int | str: The input_data as a integer if possible, if not as the original string
+    """
+    if type(input_data) is str:
+        if input_data.isdecimal() or _INT_STR.fullmatch(input_data):
+            return int(input_data)
+        return input_data
+    if type(input_data) is int:
+        return input_data
+    # Anything else (floats, bytes, etc) is rare so left to int()
+    try:
+        return int(input_data)
+    except ValueError:
+        return input_data
+
+
+_COERCE: dict[FieldType, Callable[[Any], Any]] = {"int_or_str": make_int}
+
+
+class RowSchema:
+    """Types of the fields of command output rows (NTC or NXOS JSON), the rows are coerced in bulk.
+
+    The converter for each field is looked up once when the schema is created rather than for every row,
+    fields not in a row are skipped.
+
+    Args:
+        fields (dict[str, FieldType]): Field name and its type, int_or_str (int if numeric, otherwise the string)
+    """
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: dict[str, FieldType]) -> None:
+        self.fields = tuple((name, _COERCE[kind]) for name, kind in fields.items())
+
+    def coerce(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Converts the schema fields of every row to their declared type, the command output rows are not changed.
+
+        The output can be shared by sub-features that run the same command, so each row is copied before converting.
+
+        Args:
+            rows (list[dict[str, Any]]): Command output rows
+        Returns:
+            list[dict[str, Any]]: New rows with the fields converted
+        """
+        fields = self.fields
+        coerced = []
+        for row in rows:
+            new_row = dict(row)
+            for name, convert in fields:
+                if name in new_row:
+                    new_row[name] = convert(new_row[name])
+            coerced.append(new_row)
+        return coerced
+
+
+# ----------------------------------------------------------------------------
+# COMPACT: Actual state entries held as tuples, converted to the nested dicts only when needed
+# ----------------------------------------------------------------------------
+class RecordTable:
+    """Compact form of a {key: {field: value}} actual state, each entry is a tuple of values sharing the field names.
+
+    A tuple takes a fraction of the memory of a dict, large actual states (thousands of APs or MACs) are held like
+    this through formatting and the entries only converted to dicts when compared or reported on.
+
+    Args:
+        fields (tuple[str, ...]): Field names of the entries, in the order of the values in each record
+        records (dict[Any, tuple[Any, ...]]): Entry key and its field values
+    """
+
+    __slots__ = ("fields", "records")
+
+    def __init__(
+        self, fields: tuple[str, ...], records: dict[Any, tuple[Any, ...]]
+    ) -> None:
+        self.fields = fields
+        self.records = records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.records
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, RecordTable):
+            return self.fields == other.fields and self.records == other.records
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def get(self, key: Any) -> dict[str, Any] | None:  # noqa: ANN401
+        """Gets an entry as a dict, None if there is no entry for the key."""
+        record = self.records.get(key)
+        return None if record is None else dict(zip(self.fields, record, strict=True))
+
+    def as_dict(self) -> dict[Any, dict[str, Any]]:
+        """Converts all entries into the nested dict data structure of the actual state."""
+        fields = self.fields
+        return {
+            key: dict(zip(fields, record, strict=True))
+            for key, record in self.records.items()
+        }
+
+    def subset(self, keys: Iterable[Any]) -> dict[Any, dict[str, Any]]:
+        """Converts only the entries of the keys into the nested dict data structure, keys without an entry are skipped.
+
+        Args:
+            keys (Iterable[Any]): The entry keys to convert, such as those named by the desired state
+        Returns:
+            dict[Any, dict[str, Any]]: Nested dict of the entries for the keys
+        """
+        fields, records = self.fields, self.records
+        return {
+            key: dict(zip(fields, records[key], strict=True))
+            for key in keys
+            if key in records
+        }
+
+
+# ----------------------------------------------------------------------------
+# DECLARATIVE: Sub-feature formatting declared as data and compiled into a function when the feature is imported
+# ----------------------------------------------------------------------------
+# Row field the value is taken from, if it differs per OS type a dict of {os_type: field}
+FieldSource = str | dict[str, str]
+CompiledFormatter = Callable[[bool, list[dict[str, Any]]], dict[Any, Any]]
+CompactFormatter = Callable[[list[dict[str, Any]]], dict[Any, tuple[Any, ...]]]
+
+
+class FormatterSpec(NamedTuple):
+    """How NTC rows are formatted into the {key: {field: value}} data structure of a sub-feature.
+
+    Rows with the same key are merged, like the defaultdict(dict) used by the hand-written formatters.
+
+    Args:
+        key (FieldSource): Row field whose value is the key of each entry
+        fields (dict[str, FieldSource]): Entry field name and the row field its value is taken from
+        schema (RowSchema | None): Types of the row fields, the values are converted as each row is formatted
+        actual_only (tuple[str, ...]): Entry fields only in the actual state, not the validation file (such as state)
+        transforms (dict[str, Callable[[Any], Any]] | None): Entry field name and function applied to its (converted) value
+        key_format (str): Format string the entry key is rendered into, for example 'switch{}'
+    """
+
+    key: FieldSource
+    fields: dict[str, FieldSource]
+    schema: RowSchema | None = None
+    actual_only: tuple[str, ...] = ()
+    transforms: dict[str, Callable[[Any], Any]] | None = None
+    key_format: str = "{}"
+
+
+def _spec_os_types(spec: FormatterSpec) -> Sequence[str | None]:
+    """Gets the OS types a spec is compiled for, all of the per OS type sources must have the OS type (None is any OS type)."""
+    per_os = [x for x in (spec.key, *spec.fields.values()) if isinstance(x, dict)]
+    if not per_os:
+        return [None]
+    return sorted(set.intersection(*(set(x) for x in per_os)))
+
+
+def _compile_spec(
+    sub_feature: str, spec: FormatterSpec, os_type: str | None
+) -> tuple[CompiledFormatter, CompactFormatter]:
+    """Generates the source of the formatters specialised to the spec and OS type and compiles them.
+
+    The row fields, converters and entry fields are fixed so are written into the function (like dataclasses does)
+    rather than looked up for every row, each entry is built by a single dict display (or tuple if compact).
+
+    Args:
+        sub_feature (str): The name of the sub-feature, used as the filename of the compiled code
+        spec (FormatterSpec): Declaration of how the rows are formatted
+        os_type (str | None): The OS type to take per OS type row fields from, None if the spec has none
+    Returns:
+        tuple[CompiledFormatter, CompactFormatter]: Function that formats the NTC rows into the data structure and one into RecordTable records
+    """
+    converters = dict(spec.schema.fields) if spec.schema else {}
+    transforms = spec.transforms or {}
+    namespace: dict[str, Any] = {}
+
+    def _value(source: FieldSource, transform: Callable[[Any], Any] | None) -> str:
+        field = source if isinstance(source, str) else source[cast("str", os_type)]
+        expr = f"row[{field!r}]"
+        for func in (converters.get(field), transform):
+            if func is not None:
+                name = f"_f{len(namespace)}"
+                namespace[name] = func
+                expr = f"{name}({expr})"
+        return expr
+
+    key_expr = _value(spec.key, None)
+    if spec.key_format != "{}":
+        namespace["_key_format"] = spec.key_format.format
+        key_expr = f"_key_format({key_expr})"
+    values = {
+        name: _value(source, transforms.get(name))
+        for name, source in spec.fields.items()
+    }
+    actual = ", ".join(f"{name!r}: {expr}" for name, expr in values.items())
+    val = ", ".join(
+        f"{name!r}: {expr}"
+        for name, expr in values.items()
+        if name not in spec.actual_only
+    )
+    fields_expr = (
+        f"{{{val}}} if val_file else {{{actual}}}" if val != actual else f"{{{actual}}}"
+    )
+    source = "\n".join(
+        [
+            "def _format(val_file, output):",
+            "    result = {}",
+            "    for row in output:",
+            f"        key = {key_expr}",
+            f"        fields = {fields_expr}",
+            "        entry = result.get(key)",
+            "        if entry is None:",
+            "            result[key] = fields",
+            "        else:",
+            "            entry.update(fields)",
+            "    return result",
+            "def _compact(output):",
+            "    records = {}",
+            "    for row in output:",
+            f"        records[{key_expr}] = ({', '.join(values.values())},)",
+            "    return records",
+        ]
+    )
+    exec(compile(source, f"<formatter {sub_feature}>", "exec"), namespace)
+    return (
+        cast("CompiledFormatter", namespace["_format"]),
+        cast("CompactFormatter", namespace["_compact"]),
+    )
+
+
+class DeclaredFormatters:
+    """The compiled formatters of the sub-features a feature declares, the hand-written formatter is the fallback.
+
+    Each spec is compiled once per OS type it supports when the feature module is imported.
+
+    Args:
+        specs (dict[str, FormatterSpec]): Sub-feature name and the declaration of how its rows are formatted
+    """
+
+    __slots__ = ("_compiled", "_fields")
+
+    def __init__(self, specs: dict[str, FormatterSpec]) -> None:
+        self._compiled: dict[
+            tuple[str, str | None], tuple[CompiledFormatter, CompactFormatter]
+        ] = {}
+        self._fields = {name: tuple(spec.fields) for name, spec in specs.items()}
+        for sub_feature, spec in specs.items():
+            for os_type in _spec_os_types(spec):
+                self._compiled[(sub_feature, os_type)] = _compile_spec(
+                    sub_feature, spec, os_type
+                )
+
+    def _ntc_rows(
+        self, os_type: str, sub_feature: str, output: list[Any]
+    ) -> tuple[CompiledFormatter, CompactFormatter, list[dict[str, Any]]] | None:
+        """Gets the compiled formatters of the sub-feature and its NTC rows, None if either don't exist."""
+        compiled = self._compiled.get((sub_feature, os_type)) or self._compiled.get(
+            (sub_feature, None)
+        )
+        if compiled is None:
+            return None
+        ntc_output = split_output(os_type, sub_feature, output)[1]
+        if not ntc_output:
+            return None
+        return (*compiled, ntc_output)
+
+    def format(
+        self, val_file: bool, os_type: str, sub_feature: str, output: list[Any]
+    ) -> dict[Any, Any] | None:
+        """Formats the output with the sub-feature's compiled formatter.
+
+        Args:
+            val_file (bool): Used to identify if creating validation file as sometimes need implicit values
+            os_type (str): The OS type of the device
+            sub_feature (str): The name of the sub-feature that is being validated
+            output (list[Any]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
+        Returns:
+            dict[Any, Any] | None: Formatted output, None if the sub-feature or OS type isn't declared or the output isn't NTC rows
+        """
+        ntc_rows = self._ntc_rows(os_type, sub_feature, output)
+        if ntc_rows is None:
+            return None
+        compiled, _, ntc_output = ntc_rows
+        return compiled(val_file, ntc_output)
+
+    def format_compact(
+        self, os_type: str, sub_feature: str, output: list[Any]
+    ) -> RecordTable | None:
+        """Formats the output into the compact actual state of the sub-feature, a tuple per entry rather than a dict.
+
+        Args:
+            os_type (str): The OS type of the device
+            sub_feature (str): The name of the sub-feature that is being validated
+            output (list[Any]): The structured (dict from NTC template) or unstructured (str from raw) command output from the device
+        Returns:
+            RecordTable | None: Compact actual state, None if the sub-feature or OS type isn't declared or the output isn't NTC rows
+        """
+        ntc_rows = self._ntc_rows(os_type, sub_feature, output)
+        if ntc_rows is None:
+            return None
+        _, compact, ntc_output = ntc_rows
+        return RecordTable(self._fields[sub_feature], compact(ntc_output))
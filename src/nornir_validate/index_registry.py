@@ -0,0 +1,137 @@
+import hashlib
+import threading
+from collections.abc import Mapping
+from importlib.resources import files
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any
+
+import yaml
+
+from . import json_codec
+
+# Index files shipped with the package, precompiled JSON files are written alongside the YAML
+INDEX_DIR = Path(str(files("nornir_validate").joinpath("index_files")))
+# Use the libyaml C parser if PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+# ----------------------------------------------------------------------------
+# FREEZE: Converts between the immutable (shared) and mutable (rendered) forms of an index
+# ----------------------------------------------------------------------------
+def _freeze(obj: Any) -> Any:  # noqa: ANN401
+    """Recursively converts dicts to read-only mappings and lists to tuples so a shared index cannot be changed."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(x) for x in obj)
+    return obj
+
+
+def _thaw(obj: Any) -> Any:  # noqa: ANN401
+    """Recursively converts read-only mappings and tuples back to dicts and lists (the templates check for list and dict)."""
+    if isinstance(obj, Mapping):
+        return {k: _thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return [_thaw(x) for x in obj]
+    return obj
+
+
+# ----------------------------------------------------------------------------
+# REGISTRY: Loads each index file once per process
+# ----------------------------------------------------------------------------
+class IndexRegistry:
+    """Lazily loaded, read-only cache of the index files.
+
+    Each index is parsed the first time it is requested and then shared (immutable) for the life of the process.
+    If a precompiled '<name>_index.json' exists alongside the YAML and was built from the same YAML content
+    (sha256 of the YAML stored in the JSON) it is loaded instead of parsing the YAML, a stale JSON file is ignored.
+
+    Args:
+        index_dir (Path): Directory holding the '<name>_index.yml' files, defaults to the package index_files
+    """
+
+    def __init__(self, index_dir: Path = INDEX_DIR) -> None:
+        self.index_dir = index_dir
+        self._lock = threading.Lock()
+        self._indexes: dict[str, Mapping[str, Any]] = {}
+
+    def _load(self, index_name: str) -> Any:  # noqa: ANN401
+        """Loads the index from the precompiled JSON file if it is up to date, otherwise from the YAML file."""
+        yml_data = self.index_dir.joinpath(f"{index_name}_index.yml").read_bytes()
+        json_file = self.index_dir.joinpath(f"{index_name}_index.json")
+        if json_file.exists():
+            try:
+                compiled = json_codec.loads(json_file.read_bytes())
+                if compiled["source_sha256"] == hashlib.sha256(yml_data).hexdigest():
+                    return compiled["index"]
+            except (ValueError, KeyError, TypeError):
+                pass
+        return yaml.load(yml_data, Loader=YAML_LOADER)
+
+    def get(self, index_name: str) -> Mapping[str, Any]:
+        """Gets the full index (including example data) in read-only form, loading it if not already cached.
+
+        Args:
+            index_name (str): Name of the index file without the '_index.yml' suffix, for example 'all' or 'cisco_nxos'
+        Returns:
+            Mapping[str, Any]: Read-only index of {all: {feature: (sub_feat, sub_feat)}}
+        """
+        with self._lock:
+            if index_name not in self._indexes:
+                self._indexes[index_name] = _freeze(self._load(index_name))
+            return self._indexes[index_name]
+
+    def validations(
+        self, index_name: str, example_data: bool = False
+    ) -> dict[str, dict[str, list[Any]]]:
+        """Gets a mutable copy of the index that can be changed or rendered without affecting the cached index.
+
+        Args:
+            index_name (str): Name of the index file without the '_index.yml' suffix, for example 'all' or 'cisco_nxos'
+            example_data (bool): Keep example data (dicts) such as route table VRF names, otherwise only sub-feature names
+        Returns:
+            dict[str, dict[str, list[Any]]]: Validation DM of {all: {feature: [sub_feat, sub_feat]}}
+        """
+        validations: dict[str, dict[str, list[Any]]] = _thaw(self.get(index_name))
+        if not example_data:
+            for feat, sub_feats in validations["all"].items():
+                validations["all"][feat] = [
+                    list(x.keys())[0] if isinstance(x, dict) else x for x in sub_feats
+                ]
+        return validations
+
+    def clear(self) -> None:
+        """Empties the cache so the index files are reloaded on next use (such as after an index file is updated)."""
+        with self._lock:
+            self._indexes.clear()
+
+
+# ----------------------------------------------------------------------------
+# COMPILE: Writes the precompiled JSON index files
+# ----------------------------------------------------------------------------
+def compile_index_files(index_dir: Path = INDEX_DIR) -> list[Path]:
+    """Creates a '<name>_index.json' file for every '<name>_index.yml' file, these are loaded faster than the YAML.
+
+    Args:
+        index_dir (Path): Directory holding the '<name>_index.yml' files, defaults to the package index_files
+    Returns:
+        list[Path]: The JSON files that were written
+    """
+    compiled = []
+    for yml_file in sorted(index_dir.glob("*_index.yml")):
+        yml_data = yml_file.read_bytes()
+        index = {
+            "source_sha256": hashlib.sha256(yml_data).hexdigest(),
+            "index": yaml.load(yml_data, Loader=YAML_LOADER),
+        }
+        json_file = yml_file.with_suffix(".json")
+        json_file.write_bytes(json_codec.dumps(index))
+        compiled.append(json_file)
+    return compiled
+
+
+# ----------------------------------------------------------------------------
+# SHARED: One registry per process used by val_file_builder and the feature_builder script
+# ----------------------------------------------------------------------------
+index_registry = IndexRegistry()
@@ -0,0 +1,207 @@
+import math
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from nornir.core.task import AggregatedResult
+
+# Phases recorded by validate and val_file_builder, in the order they run
+PHASES = ("render", "command", "parse", "format", "compare")
+
+
+# ----------------------------------------------------------------------------
+# RECORD: Timing of a single phase, optionally for a feature, sub-feature and command
+# ----------------------------------------------------------------------------
+@dataclass(slots=True)
+class PhaseTiming:
+    """The duration (monotonic clock) of one phase of a run.
+
+    Args:
+        phase (str): One of render, command, parse, format or compare
+        seconds (float): How long the phase took
+        feature (str): The feature the phase was run for, empty if for all features
+        sub_feature (str): The sub-feature the phase was run for, empty if for all sub-features
+        command (str): The command the phase was run for, only set for the command and parse phases
+        size (int): Characters of raw output for the command phase or rows of structured output for the parse phase
+    """
+
+    phase: str
+    seconds: float = 0.0
+    feature: str = ""
+    sub_feature: str = ""
+    command: str = ""
+    size: int = 0
+
+
+# ----------------------------------------------------------------------------
+# TIMINGS: Per-host collection of phase timings, attached to the Result as 'timings'
+# ----------------------------------------------------------------------------
+@dataclass(slots=True)
+class Timings:
+    """Records the timings of each phase for one host.
+
+    Args:
+        platform (str): Nornir platform of the host, used to group command statistics across hosts
+        records (list[PhaseTiming]): The recorded phase timings in the order they finished
+    """
+
+    platform: str = ""
+    records: list[PhaseTiming] = field(default_factory=list)
+
+    @contextmanager
+    def measure(
+        self, phase: str, feature: str = "", sub_feature: str = "", command: str = ""
+    ) -> Iterator[PhaseTiming]:
+        """Times the block of code, the yielded record can be used to set the output size.
+
+        Args:
+            phase (str): One of render, command, parse, format or compare
+            feature (str): The feature the phase is run for
+            sub_feature (str): The sub-feature the phase is run for
+            command (str): The command the phase is run for
+        Yields:
+            PhaseTiming: The record that is added once the block finishes (even if it raises an exception)
+        """
+        record = PhaseTiming(phase, 0.0, feature, sub_feature, command)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            self.records.append(record)
+
+    def totals(self) -> dict[str, float]:
+        """Gets the total seconds spent in each phase.
+
+        Returns:
+            dict[str, float]: {phase: seconds}
+        """
+        totals: dict[str, float] = defaultdict(float)
+        for record in self.records:
+            totals[record.phase] += record.seconds
+        return dict(totals)
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Gets the records as dictionaries, such as for saving to file.
+
+        Returns:
+            list[dict[str, Any]]: List of {phase, seconds, feature, sub_feature, command, size}
+        """
+        return [asdict(record) for record in self.records]
+
+
+# ----------------------------------------------------------------------------
+# AGGREGATE: Combines the timings of all hosts in a run
+# ----------------------------------------------------------------------------
+def host_timings(result: AggregatedResult) -> dict[str, Timings]:
+    """Gets the timings of each host from the result of nr.run(task=validate) or nr.run(task=val_file_builder).
+
+    Args:
+        result (AggregatedResult): The nornir result of the run
+    Returns:
+        dict[str, Timings]: {hostname: timings}, hosts that failed before returning a result are not included
+    """
+    all_timings = {}
+    for host, multi_result in result.items():
+        timings = getattr(multi_result[0], "timings", None) if multi_result else None
+        if isinstance(timings, Timings):
+            all_timings[host] = timings
+    return all_timings
+
+
+def aggregate_timings(
+    result: AggregatedResult, group_by: str = "phase"
+) -> dict[str, dict[str, float]]:
+    """Sums the timings of all hosts grouped by a PhaseTiming field.
+
+    Args:
+        result (AggregatedResult): The nornir result of the run
+        group_by (str): The PhaseTiming field to group by, such as phase, feature, sub_feature or command
+    Returns:
+        dict[str, dict[str, float]]: {group: {count: x, seconds: x, max: x, size: x}}
+    """
+    totals: dict[str, dict[str, float]] = defaultdict(
+        lambda: {"count": 0, "seconds": 0.0, "max": 0.0, "size": 0}
+    )
+    for timings in host_timings(result).values():
+        for record in timings.records:
+            group = totals[getattr(record, group_by)]
+            group["count"] += 1
+            group["seconds"] += record.seconds
+            group["max"] = max(group["max"], record.seconds)
+            group["size"] += record.size
+    return dict(totals)
+
+
+# ----------------------------------------------------------------------------
+# CMD_STATS: Per platform and command statistics, used to find slow commands and large outputs
+# ----------------------------------------------------------------------------
+@dataclass(slots=True)
+class CommandStats:
+    """Statistics of a command across all hosts of the same platform.
+
+    Args:
+        platform (str): Nornir platform of the hosts the command was run on
+        command (str): The command
+        count (int): Number of times the command was run
+        p50 (float): Median seconds to run the command
+        p95 (float): 95th percentile seconds to run the command
+        max (float): Slowest seconds to run the command
+        seconds (float): Total seconds running the command
+        bytes (int): Total characters of raw output returned
+        parse_seconds (float): Total seconds parsing the output, TextFSM or JSON
+    """
+
+    platform: str
+    command: str
+    count: int = 0
+    p50: float = 0.0
+    p95: float = 0.0
+    max: float = 0.0
+    seconds: float = 0.0
+    bytes: int = 0
+    parse_seconds: float = 0.0
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    """Gets the percentile of already sorted values using the nearest-rank method."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def command_stats(result: AggregatedResult) -> list[CommandStats]:
+    """Gets the statistics of every distinct command per platform ranked by total time (running and parsing), slowest first.
+
+    Args:
+        result (AggregatedResult): The nornir result of the run
+    Returns:
+        list[CommandStats]: Statistics per platform and command
+    """
+    latencies: dict[tuple[str, str], list[float]] = defaultdict(list)
+    all_stats: dict[tuple[str, str], CommandStats] = {}
+    for timings in host_timings(result).values():
+        for record in timings.records:
+            if record.phase not in ("command", "parse"):
+                continue
+            key = (timings.platform, record.command)
+            stats = all_stats.setdefault(key, CommandStats(*key))
+            if record.phase == "command":
+                latencies[key].append(record.seconds)
+                stats.bytes += record.size
+            else:
+                stats.parse_seconds += record.seconds
+    for key, stats in all_stats.items():
+        cmd_latency = sorted(latencies[key])
+        stats.count = len(cmd_latency)
+        stats.seconds = sum(cmd_latency)
+        stats.p50 = _percentile(cmd_latency, 50)
+        stats.p95 = _percentile(cmd_latency, 95)
+        stats.max = cmd_latency[-1] if cmd_latency else 0.0
+    return sorted(
+        all_stats.values(), key=lambda x: x.seconds + x.parse_seconds, reverse=True
+    )
@@ -0,0 +1,86 @@
+import functools
+import re
+
+# ----------------------------------------------------------------------------
+# TYPES: Interface types by their full name and the abbreviations (lowercase) used by the different OS types and commands
+# ----------------------------------------------------------------------------
+INTF_TYPES: dict[str, tuple[str, ...]] = {
+    "FastEthernet": ("fa", "fas"),
+    "GigabitEthernet": ("gi", "gig"),
+    "TwoGigabitEthernet": ("tw", "two"),
+    "FiveGigabitEthernet": ("fi", "fiv"),
+    "TenGigabitEthernet": ("te", "ten"),
+    "TwentyFiveGigE": ("twe",),
+    "FortyGigabitEthernet": ("fo", "for"),
+    "HundredGigE": ("hu", "hun"),
+    "Ethernet": ("et", "eth"),
+    "Port-channel": ("po", "portchannel"),
+    "Loopback": ("lo",),
+    "Vlan": ("vl",),
+    "Tunnel": ("tu",),
+    "Serial": ("se",),
+    "BDI": ("bd",),
+    "Dialer": ("di",),
+    "Multilink": ("mu",),
+    "Virtual-Access": ("vi",),
+    "Management": ("ma", "mgmt"),
+}
+_ABBREVIATIONS = {
+    abbr: full for full, abbrs in INTF_TYPES.items() for abbr in (*abbrs, full.lower())
+}
+# Interface type (letters and hyphens) followed by the number, such as Gi1/0/1, Port-channel10 or 'GigabitEthernet 0/1'
+_INTF_TYPE_NUM = re.compile(r"^([A-Za-z][A-Za-z-]*?)\s*(\d.*)$")
+
+# NXOS JSON uses full names, these are the abbreviations used by the NTC templates of the equivalent commands
+STATUS_ABBR = (("Ethernet", "Eth"), ("port-channel", "Po"), ("loopback", "Lo"))
+CDP_ABBR = (
+    ("TenGigabitEthernet", "Ten"),
+    ("GigabitEthernet", "Gig"),
+    ("FastEthernet", "Fas"),
+    ("Ethernet", "Eth"),
+    ("port-channel", "Po"),
+)
+
+
+# ----------------------------------------------------------------------------
+# NAME: Memoised as the same few hundred interface names are seen in every command of a device
+# ----------------------------------------------------------------------------
+@functools.cache
+def canonical_intf(intf: str) -> str:
+    """Converts a short or long interface name into the full name, used as the key to join outputs that name interfaces differently.
+
+    An unknown type is matched as an abbreviation of one of the full names (like the CLI does), if is not unique
+    the name is returned unchanged.
+
+    Args:
+        intf (str): Interface name, for example Gi1/0/1, GigabitEthernet1/0/1 or Po10
+    Returns:
+        str: The full interface name, for example GigabitEthernet1/0/1 or Port-channel10
+    """
+    match = _INTF_TYPE_NUM.match(intf)
+    if match is None:
+        return intf
+    intf_type, intf_num = match.groups()
+    full = _ABBREVIATIONS.get(intf_type.lower())
+    if full is None:
+        full_names = [x for x in INTF_TYPES if x.lower().startswith(intf_type.lower())]
+        if len(full_names) != 1:
+            return intf
+        full = full_names[0]
+    return f"{full}{intf_num}"
+
+
+@functools.cache
+def abbreviate_intf(intf: str, abbreviations: tuple[tuple[str, str], ...]) -> str:
+    """Shortens a full interface name to the abbreviation used by a command, such as NXOS JSON to NTC template names.
+
+    Args:
+        intf (str): The full interface name, for example Ethernet1/1
+        abbreviations (tuple[tuple[str, str], ...]): Full name and its abbreviation, the first that the interface starts with is used
+    Returns:
+        str: The abbreviated interface name, for example Eth1/1
+    """
+    for long_name, short_name in abbreviations:
+        if intf.startswith(long_name):
+            return intf.replace(long_name, short_name, 1)
+    return intf
@@ -0,0 +1,56 @@
+import json
+from typing import Any
+
+# OPTIONAL: orjson is used if installed (pip install nornir-validate[fast]), otherwise falls back to the stdlib json module
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None  # type: ignore[assignment]
+
+
+# ----------------------------------------------------------------------------
+# BACKEND: Name of the JSON library used to decode and encode
+# ----------------------------------------------------------------------------
+def backend() -> str:
+    """Returns the name of the JSON library that is being used for decoding and encoding.
+
+    Returns:
+        str: Either 'orjson' or 'json' (stdlib)
+    """
+    return "orjson" if orjson is not None else "json"
+
+
+# ----------------------------------------------------------------------------
+# DECODE: Loads JSON from a string or bytes (NXOS '| json' cmd output, report files)
+# ----------------------------------------------------------------------------
+def loads(data: str | bytes) -> Any:  # noqa: ANN401
+    """Deserialise a JSON document using orjson if installed, otherwise the stdlib json module.
+
+    Args:
+        data (str | bytes): The JSON document
+    Raises:
+        ValueError: If the data is not valid JSON, orjson.JSONDecodeError and json.JSONDecodeError are both subclasses
+    Returns:
+        Any: The deserialised python object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# ----------------------------------------------------------------------------
+# ENCODE: Dumps an object to UTF-8 JSON bytes so can be written straight to a file opened in binary mode
+# ----------------------------------------------------------------------------
+def dumps(obj: Any) -> bytes:  # noqa: ANN401
+    """Serialise an object to JSON bytes using orjson if installed, otherwise the stdlib json module.
+
+    Non-string dictionary keys (such as module or ACE sequence numbers) are converted to strings by both backends.
+
+    Args:
+        obj (Any): The python object to serialise
+    Returns:
+        bytes: UTF-8 encoded JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode("utf-8")
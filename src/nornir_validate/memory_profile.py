@@ -0,0 +1,167 @@
+import sys
+import threading
+import tracemalloc
+import weakref
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+# Allocations made by tracemalloc and the import system are not of interest
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+# tracemalloc is process wide, it is started by the first host profiling and stopped by the last
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_started_tracing = False
+
+
+def _start_tracing() -> None:
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_users += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+# ----------------------------------------------------------------------------
+# SIZE: Deep size of containers (dicts, lists, etc) such as the actual state of a feature
+# ----------------------------------------------------------------------------
+_slot_names: dict[type, tuple[str, ...]] = {}
+
+
+def _get_slot_names(obj_type: type) -> tuple[str, ...]:
+    """Gets the __slots__ attribute names of a class and its parents (cached per class), such as the records of a RecordTable."""
+    names = _slot_names.get(obj_type)
+    if names is None:
+        names = tuple(
+            name
+            for each_cls in obj_type.__mro__
+            for slots in [each_cls.__dict__.get("__slots__", ())]
+            for name in ((slots,) if isinstance(slots, str) else slots)
+            if name not in ("__dict__", "__weakref__")
+        )
+        _slot_names[obj_type] = names
+    return names
+
+
+def deep_sizeof(obj: Any) -> int:  # noqa: ANN401
+    """Gets the size in bytes of an object and everything it contains, objects referenced more than once are counted once.
+
+    Args:
+        obj (Any): The object, normally nested dicts, lists and strings of command output or state, slotted objects such as RecordTable are walked too
+    Returns:
+        int: Size in bytes
+    """
+    seen: set[int] = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        each_obj = stack.pop()
+        if id(each_obj) in seen:
+            continue
+        seen.add(id(each_obj))
+        size += sys.getsizeof(each_obj)
+        if isinstance(each_obj, dict):
+            stack.extend(each_obj.keys())
+            stack.extend(each_obj.values())
+        elif isinstance(each_obj, list | tuple | set | frozenset):
+            stack.extend(each_obj)
+        else:
+            # Slotted objects have no __dict__ so their attributes are walked, unset slots are skipped
+            stack.extend(
+                getattr(each_obj, name)
+                for name in _get_slot_names(type(each_obj))
+                if hasattr(each_obj, name)
+            )
+    return size
+
+
+# ----------------------------------------------------------------------------
+# PROFILE: tracemalloc snapshots at the phase boundaries of validate
+# ----------------------------------------------------------------------------
+@dataclass(slots=True)
+class PhaseMemory:
+    """Memory at the end of a phase.
+
+    Args:
+        phase (str): The phase that finished, one of render, collect, format or compare
+        current (int): Bytes allocated (process wide) at the end of the phase
+        peak (int): Highest bytes allocated (process wide) since profiling started
+        top (list[tuple[str, int]]): Top allocators of the phase as (file:line, bytes allocated during the phase)
+    """
+
+    phase: str
+    current: int
+    peak: int
+    top: list[tuple[str, int]] = field(default_factory=list)
+
+
+class MemoryProfiler:
+    """Opt-in memory profiling of a host (validate(profile_memory=True)), takes a tracemalloc snapshot at each phase boundary.
+
+    tracemalloc is process wide so allocations of other hosts running at the same time are included,
+    run with a single worker (runner num_workers=1) to attribute the allocators to one host.
+
+    Args:
+        top (int): Number of top allocators to record per phase
+    """
+
+    def __init__(self, top: int = 10) -> None:
+        self.top = top
+        self.phases: list[PhaseMemory] = []
+        self.retained: dict[str, Any] = {}
+        _start_tracing()
+        # Stops tracing even if validate raises an exception before stop is called
+        self._finalizer = weakref.finalize(self, _stop_tracing)
+        self._last = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    def checkpoint(self, phase: str) -> None:
+        """Records the memory allocated and top allocators since the last checkpoint.
+
+        Args:
+            phase (str): The phase that just finished
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        top_stats = snapshot.compare_to(self._last, "lineno")
+        # Frees (negative diffs) are removed before taking the top so they don't use up the slots
+        top = [
+            (str(stat.traceback[0]), stat.size_diff)
+            for stat in top_stats
+            if stat.size_diff > 0
+        ][: self.top]
+        current, peak = tracemalloc.get_traced_memory()
+        self.phases.append(PhaseMemory(phase, current, peak, top))
+        self._last = snapshot
+
+    def retain(self, name: str, data: dict[str, Any]) -> None:
+        """Records the retained size of each feature of the data, such as the command output or actual state.
+
+        Args:
+            name (str): Name the sizes are recorded under
+            data (dict[str, Any]): Data in the format {feature: {sub_feature: data}}
+        """
+        self.retained[name] = {feat: deep_sizeof(value) for feat, value in data.items()}
+
+    def stop(self) -> dict[str, Any]:
+        """Stops profiling (tracemalloc is stopped once no other host is profiling) and gets the report.
+
+        Returns:
+            dict[str, Any]: {phases: [{phase, current, peak, top}], retained: {name: {feature: bytes}}}
+        """
+        self._finalizer()
+        return {
+            "phases": [asdict(each_phase) for each_phase in self.phases],
+            "retained": self.retained,
+        }
@@ -0,0 +1,228 @@
+import bisect
+import os
+import threading
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any
+
+from nornir.core.task import AggregatedResult
+
+from .instrumentation import Timings, host_timings
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Histogram upper bounds in seconds (command and phase durations)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Name, type and help text of each metric in the order they are exposed
+METRICS = {
+    "nornir_validate_hosts_total": ("counter", "Hosts validated by compliance result"),
+    "nornir_validate_subfeatures_total": (
+        "counter",
+        "Sub-features validated by result (passed, failed or skipped)",
+    ),
+    "nornir_validate_command_seconds": (
+        "histogram",
+        "Time to run each command on a device",
+    ),
+    "nornir_validate_command_bytes_total": (
+        "counter",
+        "Characters of command output returned by devices",
+    ),
+    "nornir_validate_phase_seconds": (
+        "histogram",
+        "Time spent in each phase of validating a host",
+    ),
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _fmt_labels(labels: Labels, extra: str = "") -> str:
+    """Formats the labels as {name="value",...} escaping backslashes, quotes and newlines in the values."""
+    escaped = []
+    for name, value in labels:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{name}="{value}"')
+    if extra:
+        escaped.append(extra)
+    return "{" + ",".join(escaped) + "}" if escaped else ""
+
+
+# ----------------------------------------------------------------------------
+# METRICS: Run-level counters and histograms exposed in Prometheus text format
+# ----------------------------------------------------------------------------
+class Metrics:
+    """Thread-safe run-level metrics of validation runs, updated as each host finishes.
+
+    Args:
+        buckets (tuple[float, ...]): Upper bounds (seconds) of the histogram buckets
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[Labels, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        # Per labels holds [count per bucket, sum, count]
+        self._histograms: dict[str, dict[Labels, list[Any]]] = defaultdict(dict)
+
+    def _inc(self, name: str, labels: Labels, value: float = 1) -> None:
+        self._counters[name][labels] += value
+
+    def _observe(self, name: str, labels: Labels, value: float) -> None:
+        hist = self._histograms[name].setdefault(
+            labels, [[0] * len(self.buckets), 0.0, 0]
+        )
+        idx = bisect.bisect_left(self.buckets, value)
+        if idx < len(self.buckets):
+            hist[0][idx] += 1
+        hist[1] += value
+        hist[2] += 1
+
+    def observe_host(
+        self, timings: Timings, report: dict[str, Any] | None, failed: bool
+    ) -> None:
+        """Records the timings and compliance report of a validated host.
+
+        Args:
+            timings (Timings): The timings returned in the host's Result
+            report (dict[str, Any] | None): The compliance report returned in the host's Result
+            failed (bool): True if the host did not comply
+        """
+        with self._lock:
+            self._inc(
+                "nornir_validate_hosts_total",
+                (("status", "failed" if failed else "passed"),),
+            )
+            for sub_feat in (report or {}).values():
+                if not isinstance(sub_feat, dict):
+                    continue
+                if sub_feat.get("skipped"):
+                    status = "skipped"
+                else:
+                    status = "passed" if sub_feat.get("complies") else "failed"
+                self._inc("nornir_validate_subfeatures_total", (("result", status),))
+            platform = (("platform", timings.platform),)
+            for record in timings.records:
+                phase = (("phase", record.phase),)
+                self._observe("nornir_validate_phase_seconds", phase, record.seconds)
+                if record.phase == "command":
+                    self._observe(
+                        "nornir_validate_command_seconds", platform, record.seconds
+                    )
+                    self._inc(
+                        "nornir_validate_command_bytes_total", platform, record.size
+                    )
+
+    def observe_result(self, result: AggregatedResult) -> None:
+        """Records all hosts of a run, for use when metrics were not enabled (set_metrics) before the run.
+
+        Args:
+            result (AggregatedResult): The nornir result of nr.run(task=validate)
+        """
+        for host, timings in host_timings(result).items():
+            host_result = result[host][0]
+            self.observe_host(
+                timings, getattr(host_result, "report", None), host_result.failed
+            )
+
+    def exposition(self) -> str:
+        """Gets the metrics in Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, one sample per line
+        """
+        lines = []
+        with self._lock:
+            for name, (metric_type, help_text) in METRICS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                if metric_type == "counter":
+                    for labels, value in sorted(self._counters[name].items()):
+                        lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+                    continue
+                for labels, (bucket_counts, total, count) in sorted(
+                    self._histograms[name].items()
+                ):
+                    cumulative = 0
+                    for upper, bucket_count in zip(
+                        self.buckets, bucket_counts, strict=True
+                    ):
+                        cumulative += bucket_count
+                        le = _fmt_labels(labels, f'le="{upper:g}"')
+                        lines.append(f"{name}_bucket{le} {cumulative}")
+                    le = _fmt_labels(labels, 'le="+Inf"')
+                    lines.append(f"{name}_bucket{le} {count}")
+                    lines.append(f"{name}_sum{_fmt_labels(labels)} {total:g}")
+                    lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, filename: str) -> None:
+        """Writes the metrics to file (via a temp file so is never left half written), such as for the node_exporter textfile collector.
+
+        Args:
+            filename (str): The file to write the metrics to
+        """
+        filename = os.path.expanduser(filename)
+        tmp_file = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.exposition())
+        os.replace(tmp_file, filename)
+
+    def serve(self, port: int = 9464, addr: str = "127.0.0.1") -> "ThreadingHTTPServer":
+        """Serves the metrics over HTTP in a background thread so they can be scraped during long runs.
+
+        Args:
+            port (int): The port to listen on, 0 picks a free port (see server.server_address)
+            addr (str): The address to listen on, defaults to localhost only
+        Returns:
+            ThreadingHTTPServer: The running server, call shutdown() to stop it
+        """
+        # Only imported if used as http.server imports a lot of the stdlib
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                body = metrics.exposition().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002, ANN401
+                pass
+
+        server = ThreadingHTTPServer((addr, port), _Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server
+
+
+# ----------------------------------------------------------------------------
+# GLOBAL: The metrics updated by validate, None (disabled) unless set
+# ----------------------------------------------------------------------------
+_metrics: Metrics | None = None
+
+
+def set_metrics(metrics: Metrics | None) -> None:
+    """Sets the metrics updated by validate as each host finishes, None disables metrics.
+
+    Args:
+        metrics (Metrics | None): The metrics object or None
+    """
+    global _metrics
+    _metrics = metrics
+
+
+def get_metrics() -> Metrics | None:
+    """Gets the metrics updated by validate.
+
+    Returns:
+        Metrics | None: The metrics set with set_metrics or None if disabled
+    """
+    return _metrics
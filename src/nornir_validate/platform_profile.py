@@ -0,0 +1,120 @@
+import functools
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from nornir.core.inventory import Host
+
+# Tokens of the nornir, netmiko, napalm and scrapli platform names (split on non-alphanumerics) that map to an OS type
+PLATFORM_TOKENS = {
+    "ios": "ios",
+    "iosxe": "ios",
+    "xe": "ios",
+    "nxos": "nxos",
+    "asa": "asa",
+    "wlc": "wlc",
+    "panos": "panos",
+    "viptela": "viptela",
+}
+# Per-platform index file of each OS type, any other OS type uses the all_index file
+OS_INDEX_FILES = {
+    "ios": "cisco_ios",
+    "nxos": "cisco_nxos",
+    "asa": "cisco_asa",
+    "wlc": "cisco_wlc",
+    "panos": "paloalto_panos",
+    "viptela": "cisco_viptela",
+}
+
+
+# ----------------------------------------------------------------------------
+#  OS_TYPE: Gets os_type from host_var OS types (platform) and then removes duplicates and None
+# ----------------------------------------------------------------------------
+def merge_os_types(host: Host) -> list[str]:
+    """For a Nornir host object gathers the connection handlers name for the different connection plugins.
+
+    Args:
+        host (Host): Nornir inventory host object, holds the hosts attributes
+    Returns:
+        list[str]: List of the connection handlers for the different connection plugins
+    """
+    tmp_os_type: list[str | None] = []
+    tmp_os_type.append(host.platform)
+    tmp_os_type.append(host.get_connection_parameters("scrapli").platform)
+    tmp_os_type.append(host.get_connection_parameters("netmiko").platform)
+    tmp_os_type.append(host.get_connection_parameters("napalm").platform)
+    set_os_type = set(tmp_os_type)
+    os_type = [x for x in set_os_type if x is not None]
+    os_type.sort()
+    return os_type
+
+
+# ----------------------------------------------------------------------------
+# RESOLVE: Gets the OS type from the platform names
+# ----------------------------------------------------------------------------
+@functools.cache
+def _resolve(platforms: str) -> str:
+    """Matches whole tokens so platforms such as 'iosxr' or 'cisco_xr' do not match 'ios' (results cached)."""
+    for token in re.findall(r"[a-z0-9]+", platforms.lower()):
+        if token in PLATFORM_TOKENS:
+            return PLATFORM_TOKENS[token]
+    return ""
+
+
+def resolve_os_type(os_type: Iterable[str] | str) -> str:
+    """Gets the OS type used by the templates and actual_state modules from the platform names.
+
+    Args:
+        os_type (Iterable[str] | str): Platform names, such as the result of merge_os_types or a single netmiko platform
+    Returns:
+        str: The OS type (ios, nxos, asa, wlc, panos or viptela), an empty string if the platform is not supported
+    """
+    if isinstance(os_type, str):
+        return _resolve(os_type)
+    return _resolve(" ".join(os_type))
+
+
+# ----------------------------------------------------------------------------
+# PROFILE: Resolved once per host and cached on the host
+# ----------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class PlatformProfile:
+    """The platform details of a host used for rendering templates, formatting actual state and choosing the index file.
+
+    Args:
+        platforms (tuple[str, ...]): Platform names of the host's connection plugins (the result of merge_os_types)
+        os_type (str): The resolved OS type, an empty string if the platform is not supported
+        index_name (str): Name of the per-platform index file (cisco_nxos, paloalto_panos, etc), 'all' if no match
+    """
+
+    platforms: tuple[str, ...]
+    os_type: str
+    index_name: str
+
+    @classmethod
+    def from_platforms(cls, platforms: Iterable[str]) -> "PlatformProfile":
+        """Creates the profile from the platform names.
+
+        Args:
+            platforms (Iterable[str]): Platform names of the host's connection plugins
+        Returns:
+            PlatformProfile: The resolved platform profile
+        """
+        platforms = tuple(platforms)
+        os_type = resolve_os_type(platforms)
+        return cls(platforms, os_type, OS_INDEX_FILES.get(os_type, "all"))
+
+
+def platform_profile(host: Host) -> PlatformProfile:
+    """Gets the host's platform profile, it is created on first use and stored in the host data ('platform_profile').
+
+    Args:
+        host (Host): Nornir inventory host object, holds the hosts attributes
+    Returns:
+        PlatformProfile: The resolved platform profile of the host
+    """
+    profile = host.data.get("platform_profile")
+    if not isinstance(profile, PlatformProfile):
+        profile = PlatformProfile.from_platforms(merge_os_types(host))
+        host.data["platform_profile"] = profile
+    return profile
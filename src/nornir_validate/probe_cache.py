@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+
+from nornir.core.inventory import Host
+
+from . import json_codec
+
+# Used as the software version if the host has no 'os_version' in its inventory data
+ANY_VERSION = "any"
+
+
+# ----------------------------------------------------------------------------
+# PROBE_CACHE: Persistent record of commands a platform/version does not support
+# ----------------------------------------------------------------------------
+class ProbeCache:
+    """Persistent cache of commands that returned an invalid command error when building a validation file.
+
+    Entries are keyed by (platform, software version, command) and are stored in a JSON file so subsequent runs of
+    val_file_builder can skip those commands up front. Entries older than the TTL are ignored and purged on save.
+    One instance is shared between all hosts (nornir threads) using the same cache file, see get_probe_cache.
+
+    Args:
+        filename (str): The JSON file the cache is loaded from and saved to (created if does not exist)
+        ttl (int): Number of seconds a cached entry is valid for
+    """
+
+    def __init__(self, filename: str, ttl: int) -> None:
+        self.filename = os.path.expanduser(filename)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, dict[str, float]]] = self._load()
+
+    # Cache is stored as {platform: {version: {cmd: timestamp}}}
+    def _load(self) -> dict[str, dict[str, dict[str, float]]]:
+        """Loads the cache file, an unreadable or missing file is treated as an empty cache."""
+        try:
+            with open(self.filename, "rb") as cache_file:
+                entries: dict[str, dict[str, dict[str, float]]] = json_codec.loads(
+                    cache_file.read()
+                )
+        except (OSError, ValueError):
+            return {}
+        return entries
+
+    def _expired(self, timestamp: float) -> bool:
+        """Returns True if the entry timestamp is older than the TTL."""
+        return time.time() - timestamp > self.ttl
+
+    def is_unsupported(self, platform: str, version: str, cmd: str) -> bool:
+        """Checks if a command is cached (and not expired) as unsupported for the platform and software version.
+
+        Args:
+            platform (str): The nornir platform of the host
+            version (str): The software version of the host
+            cmd (str): The command to be run
+        Returns:
+            bool: True if the command should be skipped
+        """
+        with self._lock:
+            timestamp = self._entries.get(platform, {}).get(version, {}).get(cmd)
+        return timestamp is not None and not self._expired(timestamp)
+
+    def record(self, platform: str, version: str, cmds: list[str]) -> None:
+        """Records commands as unsupported for the platform and software version.
+
+        Args:
+            platform (str): The nornir platform of the host
+            version (str): The software version of the host
+            cmds (list[str]): The commands that returned an invalid command error
+        """
+        now = time.time()
+        with self._lock:
+            version_entries = self._entries.setdefault(platform, {}).setdefault(
+                version, {}
+            )
+            for each_cmd in cmds:
+                version_entries[each_cmd] = now
+
+    def invalidate(
+        self,
+        platform: str | None = None,
+        version: str | None = None,
+        cmd: str | None = None,
+    ) -> None:
+        """Removes entries from the cache and saves it, without any arguments the whole cache is cleared.
+
+        Args:
+            platform (str | None): Only remove entries for this platform
+            version (str | None): Only remove entries for this software version
+            cmd (str | None): Only remove entries for this command
+        """
+        with self._lock:
+            for each_pltfm, pltfm_entries in list(self._entries.items()):
+                if platform is not None and each_pltfm != platform:
+                    continue
+                for each_ver, ver_entries in list(pltfm_entries.items()):
+                    if version is not None and each_ver != version:
+                        continue
+                    if cmd is None:
+                        del pltfm_entries[each_ver]
+                    else:
+                        ver_entries.pop(cmd, None)
+        self.save()
+
+    def save(self) -> None:
+        """Purges expired and empty entries and writes the cache to file (via a temp file so is never left half written)."""
+        with self._lock:
+            cleaned: dict[str, dict[str, dict[str, float]]] = {}
+            for platform, pltfm_entries in self._entries.items():
+                for version, ver_entries in pltfm_entries.items():
+                    valid = {
+                        cmd: ts
+                        for cmd, ts in ver_entries.items()
+                        if not self._expired(ts)
+                    }
+                    if valid:
+                        cleaned.setdefault(platform, {})[version] = valid
+            self._entries = cleaned
+            directory = os.path.dirname(self.filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_file = f"{self.filename}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as cache_file:
+                cache_file.write(json_codec.dumps(cleaned))
+            os.replace(tmp_file, self.filename)
+
+
+# ----------------------------------------------------------------------------
+# SHARED: One ProbeCache object per cache file per process (all nornir host threads use the same one)
+# ----------------------------------------------------------------------------
+_probe_caches: dict[str, ProbeCache] = {}
+_probe_caches_lock = threading.Lock()
+
+
+def get_probe_cache(filename: str, ttl: int) -> ProbeCache:
+    """Returns the shared ProbeCache for the cache file, creating (loading) it if it does not already exist.
+
+    Args:
+        filename (str): The JSON file the cache is loaded from and saved to
+        ttl (int): Number of seconds a cached entry is valid for
+    Returns:
+        ProbeCache: The cache object shared by all hosts using this file
+    """
+    cache_key = os.path.abspath(os.path.expanduser(filename))
+    with _probe_caches_lock:
+        if cache_key not in _probe_caches:
+            _probe_caches[cache_key] = ProbeCache(filename, ttl)
+        probe_cache = _probe_caches[cache_key]
+        probe_cache.ttl = ttl
+    return probe_cache
+
+
+def host_version(host: Host) -> str:
+    """Gets the software version used in the cache key from the host inventory data ('os_version').
+
+    Args:
+        host (Host): The nornir host, os_version can be set at host, group or defaults level
+    Returns:
+        str: The software version or 'any' if not defined
+    """
+    return str(host.get("os_version") or ANY_VERSION)
@@ -0,0 +1,207 @@
+import functools
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from typing import Any, ParamSpec, Protocol, TypeVar
+
+from . import json_codec
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+# ----------------------------------------------------------------------------
+# API: Subset of the OpenTelemetry tracer API used, so an OTel tracer can be plugged straight in
+# ----------------------------------------------------------------------------
+class Span(Protocol):
+    """A span as used by nornir_validate, opentelemetry.trace.Span satisfies this."""
+
+    def set_attribute(self, key: str, value: Any) -> None: ...  # noqa: ANN401, D102
+
+
+class Tracer(Protocol):
+    """A tracer as used by nornir_validate, opentelemetry.trace.Tracer satisfies this."""
+
+    def start_as_current_span(  # noqa: D102
+        self, name: str, attributes: dict[str, Any] | None = None
+    ) -> AbstractContextManager[Span]: ...
+
+
+# ----------------------------------------------------------------------------
+# NOOP: Default tracer, does nothing so tracing has no cost unless enabled
+# ----------------------------------------------------------------------------
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:  # noqa: ANN401
+        pass
+
+
+class NoopTracer:
+    """Tracer that records nothing, used unless set_tracer is called."""
+
+    _span = _NoopSpan()
+
+    @contextmanager
+    def start_as_current_span(
+        self,
+        name: str,  # noqa: ARG002
+        attributes: dict[str, Any] | None = None,  # noqa: ARG002
+    ) -> Iterator[Span]:
+        """Yields a span that discards any attributes.
+
+        Args:
+            name (str): Name of the span
+            attributes (dict[str, Any] | None): Attributes of the span
+        Yields:
+            Span: A span that does nothing
+        """
+        yield self._span
+
+
+# ----------------------------------------------------------------------------
+# LOCAL: Records spans in memory and exports them as a Chrome trace (chrome://tracing, ui.perfetto.dev)
+# ----------------------------------------------------------------------------
+class _LocalSpan:
+    __slots__ = ("attributes",)
+
+    def __init__(self, attributes: dict[str, Any]) -> None:
+        self.attributes = attributes
+
+    def set_attribute(self, key: str, value: Any) -> None:  # noqa: ANN401
+        self.attributes[key] = value
+
+
+class LocalTracer:
+    """Tracer that records spans in memory (thread-safe) so they can be written to a local trace file.
+
+    Each nornir worker thread is shown as a separate row in the trace viewer, showing concurrency and stalls across hosts.
+
+    Args:
+        filename (str | None): If set the trace file export writes to when called without a filename
+    """
+
+    def __init__(self, filename: str | None = None) -> None:
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._events: list[dict[str, Any]] = []
+        self._threads: dict[int, str] = {}
+
+    @contextmanager
+    def start_as_current_span(
+        self, name: str, attributes: dict[str, Any] | None = None
+    ) -> Iterator[Span]:
+        """Records the start time and duration of the block of code as a span.
+
+        Args:
+            name (str): Name of the span
+            attributes (dict[str, Any] | None): Attributes of the span, more can be added with span.set_attribute
+        Yields:
+            Span: The span being recorded
+        """
+        span = _LocalSpan(dict(attributes or {}))
+        thread = threading.current_thread()
+        start = time.perf_counter_ns()
+        try:
+            yield span
+        finally:
+            end = time.perf_counter_ns()
+            # Complete event ('X'), times are in microseconds
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": (end - start) / 1000,
+                "pid": os.getpid(),
+                "tid": thread.ident,
+                "args": {k: str(v) for k, v in span.attributes.items()},
+            }
+            with self._lock:
+                self._events.append(event)
+                self._threads.setdefault(thread.ident or 0, thread.name)
+
+    def spans(self) -> list[dict[str, Any]]:
+        """Gets a copy of the recorded spans.
+
+        Returns:
+            list[dict[str, Any]]: Spans in Chrome trace event format ({name, ph, ts, dur, pid, tid, args})
+        """
+        with self._lock:
+            return list(self._events)
+
+    def export(self, filename: str | None = None) -> str:
+        """Writes the recorded spans to a Chrome trace file (JSON), it can be opened in chrome://tracing or Perfetto.
+
+        Args:
+            filename (str | None): File to write to, defaults to the filename the tracer was created with
+        Raises:
+            ValueError: If no filename is given either here or when the tracer was created
+        Returns:
+            str: The file written to
+        """
+        filename = filename or self.filename
+        if filename is None:
+            msg = "A filename must be specified to export the trace to"
+            raise ValueError(msg)
+        with self._lock:
+            thread_names = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+                for tid, name in self._threads.items()
+            ]
+            trace = {"traceEvents": thread_names + self._events}
+        with open(os.path.expanduser(filename), "wb") as trace_file:
+            trace_file.write(json_codec.dumps(trace))
+        return filename
+
+
+# ----------------------------------------------------------------------------
+# GLOBAL: The tracer used by nornir_validate
+# ----------------------------------------------------------------------------
+_tracer: Tracer = NoopTracer()
+
+
+def set_tracer(tracer: Tracer | None) -> None:
+    """Sets the tracer used for all nornir_validate spans, None resets it to the no-op tracer.
+
+    Args:
+        tracer (Tracer | None): A LocalTracer, an OpenTelemetry tracer (trace.get_tracer('nornir_validate')) or None
+    """
+    global _tracer
+    _tracer = tracer if tracer is not None else NoopTracer()
+
+
+def get_tracer() -> Tracer:
+    """Gets the tracer used for all nornir_validate spans.
+
+    Returns:
+        Tracer: The tracer set with set_tracer or the no-op tracer
+    """
+    return _tracer
+
+
+def traced(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator that runs the function in a span, if the first argument is a nornir Task the host is added as an attribute.
+
+    Args:
+        name (str): Name of the span
+    Returns:
+        Callable[[Callable[P, R]], Callable[P, R]]: The decorator
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            host = getattr(args[0], "host", None) if args else None
+            attributes = {"host": str(host)} if host is not None else {}
+            with _tracer.start_as_current_span(name, attributes=attributes):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -4,17 +4,61 @@ Use test_validations.py to test the different os_type command validations (desir
 """
 
 import os
+import subprocess
+import sys
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import pytest
 from nornir import InitNornir
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, MultiResult, Result
 
+from nornir_validate import core, json_codec
+from nornir_validate.compliance_report import (
+    generate_validate_report,
+    materialise_actual_state,
+    save_report_to_file,
+)
 from nornir_validate.core import (
+    actual_state_engine,
+    create_val_dm,
     merge_os_types,
+    print_command_report,
     remove_cmds_desired_state,
     return_feature_desired_data,
+    return_index_name,
     return_yaml_desired_state,
     strip_empty_feat,
+    task_desired_state,
+    task_template,
+    val_file_builder,
+)
+from nornir_validate.feature_registry import FeatureRegistry, validation_features
+from nornir_validate.formatting import (
+    DeclaredFormatters,
+    FormatterSpec,
+    RecordTable,
+    RowSchema,
+    fix_nxos,
+    make_int,
+    split_output,
+)
+from nornir_validate.index_registry import IndexRegistry, compile_index_files
+from nornir_validate.instrumentation import (
+    PhaseTiming,
+    Timings,
+    aggregate_timings,
+    command_stats,
 )
+from nornir_validate.intf_name import CDP_ABBR, abbreviate_intf, canonical_intf
+from nornir_validate.memory_profile import MemoryProfiler, deep_sizeof
+from nornir_validate.metrics import Metrics
+from nornir_validate.platform_profile import platform_profile, resolve_os_type
+from nornir_validate.probe_cache import ProbeCache
+from nornir_validate.tracing import LocalTracer, get_tracer, set_tracer
 
 # ----------------------------------------------------------------------------
 # Directory that holds inventory files
@@ -44,6 +88,44 @@ def test_merge_os_types() -> None:
     assert actual_output == desired_output, err_msg
 
 
+# PLATFORM_PROFILE: Tests OS type is resolved from whole platform name tokens and the profile is cached on the host
+@pytest.mark.parametrize(
+    ("platforms", "os_type"),
+    [
+        (["cisco_ios", "cisco_iosxe", "ios"], "ios"),
+        (["cisco_xe"], "ios"),
+        (["cisco_nxos", "nxos_ssh"], "nxos"),
+        ("['cisco_asa']", "asa"),
+        (["paloalto_panos"], "panos"),
+        (["cisco_xr", "iosxr"], ""),
+        ([], ""),
+    ],
+)
+def test_resolve_os_type(platforms: list[str] | str, os_type: str) -> None:
+    err_msg = "❌ resolve_os_type: Function testing failed"
+    assert resolve_os_type(platforms) == os_type, err_msg
+
+
+def test_platform_profile() -> None:
+    err_msg = "❌ platform_profile: Function testing failed"
+    nr = InitNornir(
+        inventory={
+            "plugin": "SimpleInventory",
+            "options": {
+                "host_file": os.path.join(test_inventory, "hosts.yml"),
+                "group_file": os.path.join(test_inventory, "groups.yml"),
+            },
+        },
+        logging={"enabled": False},
+    )
+    host = nr.inventory.hosts["TEST_HOST"]
+    profile = platform_profile(host)
+    assert profile.platforms == ("cisco_ios", "cisco_iosxe", "ios"), err_msg
+    assert profile.os_type == "ios", err_msg
+    assert profile.index_name == "cisco_ios", err_msg
+    assert platform_profile(host) is profile, err_msg
+
+
 # DESIRED_STATE_DATA: Tests creating data structure for desired state templating (combines features, sub-features and feature_path)
 def test_return_feature_desired_data() -> None:
     err_msg = "❌ return_feature_desired_data: Function testing failed"
@@ -127,3 +209,928 @@ def test_remove_cmds_desired_state() -> None:
         },
     }
     assert actual_output == desired_output, err_msg
+
+
+# JSON_CODEC: Tests decoding and encoding with orjson (if installed) and the stdlib json fallback
+@pytest.mark.parametrize("use_stdlib", [True, False])
+def test_json_codec(monkeypatch: pytest.MonkeyPatch, use_stdlib: bool) -> None:
+    err_msg = "❌ json_codec: Function testing failed"
+    if use_stdlib:
+        monkeypatch.setattr(json_codec, "orjson", None)
+    elif json_codec.orjson is None:
+        pytest.skip("orjson is not installed")
+    input_data = '{"TABLE_intf": {"ROW_intf": {"intf-name": "Eth1/1", "iod": 87}}}'
+    actual_output = json_codec.loads(input_data)
+    assert actual_output == {
+        "TABLE_intf": {"ROW_intf": {"intf-name": "Eth1/1", "iod": 87}}
+    }, err_msg
+    assert json_codec.loads(input_data.encode()) == actual_output, err_msg
+    # Non-string keys (module or ACE sequence numbers) are written as strings
+    encoded = json_codec.dumps({"module": {1: {"model": "N7K-SUP1"}}})
+    assert isinstance(encoded, bytes), err_msg
+    assert json_codec.loads(encoded) == {"module": {"1": {"model": "N7K-SUP1"}}}, (
+        err_msg
+    )
+
+
+# REPORT_FILE: Tests report file is written as JSON and merged if already exists
+def test_save_report_to_file(tmp_path: Path) -> None:
+    err_msg = "❌ save_report_to_file: Function testing failed"
+    report = {
+        "system.image": {"complies": True, "present": {}, "missing": [], "extra": []}
+    }
+    save_report_to_file("TEST_HOST", str(tmp_path), report, True, [])
+    report1 = {
+        "system.module": {"complies": False, "present": {}, "missing": [], "extra": []}
+    }
+    save_report_to_file("TEST_HOST", str(tmp_path), report1, False, [])
+    report_file = next(tmp_path.glob("TEST_HOST_compliance_report_*.json"))
+    actual_output = json_codec.loads(report_file.read_bytes())
+    desired_output = {"complies": False, "skipped": [], **report, **report1}
+    assert actual_output == desired_output, err_msg
+
+
+# PROBE_CACHE: Tests unsupported cmds are persisted per platform/version, expire after the TTL and can be invalidated
+def test_probe_cache(tmp_path: Path) -> None:
+    err_msg = "❌ probe_cache: Function testing failed"
+    cache_file = str(tmp_path / "probe_cache.json")
+    cache = ProbeCache(cache_file, ttl=3600)
+    cache.record("cisco_ios", "15.2(7)E2", ["show nve vni", "show nve peers"])
+    cache.record("cisco_nxos", "any", ["show hsrp | json"])
+    cache.save()
+    # Loaded from file by a new instance, only matches the same platform and version
+    cache = ProbeCache(cache_file, ttl=3600)
+    assert cache.is_unsupported("cisco_ios", "15.2(7)E2", "show nve vni"), err_msg
+    assert not cache.is_unsupported("cisco_ios", "17.3.1", "show nve vni"), err_msg
+    assert not cache.is_unsupported("cisco_ios", "15.2(7)E2", "show version"), err_msg
+    # Invalidate a single cmd and then everything for a platform
+    cache.invalidate(platform="cisco_ios", cmd="show nve vni")
+    assert not cache.is_unsupported("cisco_ios", "15.2(7)E2", "show nve vni"), err_msg
+    assert cache.is_unsupported("cisco_ios", "15.2(7)E2", "show nve peers"), err_msg
+    cache.invalidate(platform="cisco_ios")
+    assert not cache.is_unsupported("cisco_ios", "15.2(7)E2", "show nve peers"), err_msg
+    assert cache.is_unsupported("cisco_nxos", "any", "show hsrp | json"), err_msg
+    # Expired entries are ignored and purged when saved
+    cache.ttl = -1
+    assert not cache.is_unsupported("cisco_nxos", "any", "show hsrp | json"), err_msg
+    cache.save()
+    assert json_codec.loads(Path(cache_file).read_bytes()) == {}, err_msg
+
+
+# PROBE_CACHE_BUILDER: Tests only rejected (invalid) cmds are cached, empty output (not configured) is still run on later hosts
+def test_probe_cache_val_file_builder(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    err_msg = "❌ probe_cache val_file_builder: Function testing failed"
+    sent_cmds: list[str] = []
+
+    # Replaces netmiko, the args are (task, cmd, timings, feature, sub_feature)
+    def run_command(*args: object) -> list[str]:
+        cmd = str(args[1])
+        sent_cmds.append(cmd)
+        return (
+            ["% Invalid input detected at '^' marker."] if cmd == "show version" else []
+        )
+
+    monkeypatch.setattr(core, "run_command", run_command)
+    nr = InitNornir(
+        inventory={
+            "plugin": "SimpleInventory",
+            "options": {
+                "host_file": os.path.join(test_inventory, "hosts.yml"),
+                "group_file": os.path.join(test_inventory, "groups.yml"),
+            },
+        },
+        logging={"enabled": False},
+    )
+    cache_file = tmp_path / "probe_cache.json"
+    validations = {"all": {"system": ["image"], "route_protocol": ["ospf_intf_nbr"]}}
+    ospf_cmds = ["show ip ospf interface brief", "show ip ospf neighbor"]
+    # Hosts without a platform don't use the cache
+    nr.run(
+        task=val_file_builder,
+        input_data=validations,
+        directory=str(tmp_path),
+        probe_cache=str(cache_file),
+    )
+    assert not cache_file.exists(), err_msg
+    nr.inventory.hosts["TEST_HOST"].platform = "cisco_ios"
+    for expected_cmds in [["show version", *ospf_cmds], ospf_cmds]:
+        sent_cmds.clear()
+        result = nr.run(
+            task=val_file_builder,
+            input_data=validations,
+            directory=str(tmp_path),
+            probe_cache=str(cache_file),
+        )
+        assert sent_cmds == expected_cmds, err_msg
+        assert result["TEST_HOST"][0].not_used_subfeat == [
+            "image",
+            "ospf_intf_nbr",
+        ], err_msg
+    assert list(json_codec.loads(cache_file.read_bytes())["cisco_ios"]["any"]) == [
+        "show version"
+    ], err_msg
+
+
+# CMD_DEDUPE: Tests sub-features that share a command (ap and ap_model) only send it once per host
+def test_cmd_dedupe(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    err_msg = "❌ cmd_dedupe: Function testing failed"
+    sent_cmds: list[str] = []
+
+    # Replaces netmiko, the args are (task, cmd, timings, feature, sub_feature)
+    def run_command(*args: object) -> list[str]:
+        sent_cmds.append(str(args[1]))
+        return []
+
+    monkeypatch.setattr(core, "run_command", run_command)
+    nr = InitNornir(
+        inventory={
+            "plugin": "SimpleInventory",
+            "options": {
+                "host_file": os.path.join(test_inventory, "hosts_validations.yml"),
+                "group_file": os.path.join(test_inventory, "groups.yml"),
+            },
+        },
+        logging={"enabled": False},
+    )
+    validations = {
+        "all": {"wifi": ["ap", "ap_model", "wlan_client", {"client_count": []}]}
+    }
+    nr = nr.filter(name="wlc_host")
+    nr.run(task=val_file_builder, input_data=validations, directory=str(tmp_path))
+    assert sent_cmds == ["show ap summary", "show client summary"], err_msg
+
+
+# VAL_DM: Tests the per-platform index file is used for the validation DM (example data removed), all_index if unknown
+def test_create_val_dm() -> None:
+    err_msg = "❌ create_val_dm: Function testing failed"
+    assert (
+        return_index_name(["cisco_nxos", "cisco_nxos_ssh", "nxos_ssh"]) == "cisco_nxos"
+    ), err_msg
+    assert return_index_name(["cisco_iosxe", "cisco_xe", "ios"]) == "cisco_ios", err_msg
+    assert return_index_name(["paloalto_panos"]) == "paloalto_panos", err_msg
+    assert return_index_name(["checkpoint_gaia_ssh"]) == "all", err_msg
+    assert return_index_name(["cisco_xr", "iosxr"]) == "all", err_msg
+    nxos_val_dm = create_val_dm(["cisco_nxos", "cisco_nxos_ssh", "nxos_ssh"])
+    assert nxos_val_dm["all"]["system"] == [
+        "image",
+        "mgmt_acl",
+        "acl",
+        "acl_flow",
+        "module",
+    ], err_msg
+    assert "sdwan" not in nxos_val_dm["all"], err_msg
+    assert "sdwan" in create_val_dm()["all"], err_msg
+    # Index is cached, so each call must return a separate copy
+    nxos_val_dm["all"]["system"].append("dummy")
+    assert "dummy" not in create_val_dm(["cisco_nxos"])["all"]["system"], err_msg
+
+
+# INDEX_REGISTRY: Tests the index is loaded once, read-only and from an up to date precompiled file
+def test_index_registry(tmp_path: Path) -> None:
+    err_msg = "❌ index_registry: Function testing failed"
+    index_file = tmp_path / "cisco_nxos_index.yml"
+    index_file.write_text(
+        "all:\n  system: [image]\n  route_table:\n  - vrf\n  - route: [BLU]\n"
+    )
+    registry = IndexRegistry(tmp_path)
+    index = registry.get("cisco_nxos")
+    assert registry.get("cisco_nxos") is index, err_msg
+    with pytest.raises(TypeError):
+        index["all"]["system"] = ["module"]  # type: ignore[index]
+    assert registry.validations("cisco_nxos") == {
+        "all": {"system": ["image"], "route_table": ["vrf", "route"]}
+    }, err_msg
+    assert registry.validations("cisco_nxos", example_data=True)["all"][
+        "route_table"
+    ] == ["vrf", {"route": ["BLU"]}], err_msg
+    # Precompiled JSON is used if built from the current YAML, ignored once the YAML changes
+    assert compile_index_files(tmp_path) == [tmp_path / "cisco_nxos_index.json"], (
+        err_msg
+    )
+    json_file = tmp_path / "cisco_nxos_index.json"
+    json_file.write_bytes(json_file.read_bytes().replace(b"image", b"compiled"))
+    registry.clear()
+    assert registry.validations("cisco_nxos")["all"]["system"] == ["compiled"], err_msg
+    index_file.write_text("all:\n  system: [module]\n")
+    registry.clear()
+    assert registry.validations("cisco_nxos")["all"]["system"] == ["module"], err_msg
+
+
+# FEATURE_REGISTRY: Tests the format_actual_state function of a feature is resolved once and shared between threads
+def test_feature_registry() -> None:
+    err_msg = "❌ feature_registry: Function testing failed"
+    input_data = {
+        "hosts": {"HME-SWI-VSS01": {"system": {"image": "16.9"}}},
+        "groups": {"ios": {"interface": {"intf": {}}}},
+        "all": {"neighbor": {"cdp": {}}},
+    }
+    desired_features = {"system", "interface", "neighbor"}
+    assert validation_features(input_data) == desired_features, err_msg
+    registry = FeatureRegistry()
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        formatters = list(executor.map(registry.get, ["system"] * 20))
+    assert len({id(x) for x in formatters}) == 1, err_msg
+    assert formatters[0].__name__ == "format_actual_state", err_msg
+    registry.warm(validation_features(input_data))
+    assert set(registry._formatters) == desired_features, err_msg
+    with pytest.raises(ImportError):
+        registry.get("not_a_feature")
+
+
+# IMPORT_TIME: Tests heavy dependencies are imported lazily, the import time budget is checked by scripts/benchmark.py
+LAZY_IMPORTS = ["napalm", "netmiko", "nornir_rich", "nornir_jinja2", "nornir_utils"]
+
+
+def test_import_time() -> None:
+    err_msg = "❌ import_time: Function testing failed"
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import nornir_validate"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    # Each line is 'import time: self [us] | cumulative | imported package'
+    modules = [line.split("|")[2].strip() for line in output.splitlines()[1:]]
+    assert "nornir_validate" in modules, err_msg
+    assert not [x for x in modules if x.split(".")[0] in LAZY_IMPORTS], err_msg
+
+
+# TIMINGS: Tests phase timings are recorded per sub-feature and aggregated across hosts
+def test_timings() -> None:
+    err_msg = "❌ timings: Function testing failed"
+    timings = Timings(platform="cisco_nxos")
+    cmd_output = {"system": {"image": [{"os": "9.3(5)"}]}}
+    actual_state = actual_state_engine(False, ["cisco_nxos"], cmd_output, timings)
+    desired_state = {"system": {"image": "9.3(5)"}}
+    generate_validate_report(desired_state, actual_state, "hst", None, timings)
+    with timings.measure("command", "system", "image", "show version | json") as rec:
+        rec.size = 1024
+    assert [x.phase for x in timings.records] == ["format", "compare", "command"], (
+        err_msg
+    )
+    assert timings.records[0].feature == "system", err_msg
+    assert timings.records[0].sub_feature == "image", err_msg
+    assert set(timings.totals()) == {"format", "compare", "command"}, err_msg
+    # Aggregated across all hosts of the run
+    result = AggregatedResult("validate")
+    for name in ["hst1", "hst2"]:
+        result[name] = MultiResult("validate")
+        result[name].append(Result(host=Host(name), timings=timings))
+    aggr = aggregate_timings(result)
+    assert aggr["command"]["count"] == 2, err_msg
+    assert aggr["command"]["size"] == 2048, err_msg
+    assert aggr["format"]["max"] == timings.records[0].seconds, err_msg
+    assert set(aggregate_timings(result, "sub_feature")) == {"image"}, err_msg
+
+
+# TRACING: Tests spans are recorded per host (nornir thread) when a tracer is set and exported as a Chrome trace
+def test_tracing(tmp_path: Path) -> None:
+    err_msg = "❌ tracing: Function testing failed"
+    nr = InitNornir(
+        inventory={
+            "plugin": "SimpleInventory",
+            "options": {
+                "host_file": os.path.join(test_inventory, "hosts.yml"),
+                "group_file": os.path.join(test_inventory, "groups.yml"),
+            },
+        },
+        logging={"enabled": False},
+    )
+    tracer = LocalTracer(str(tmp_path / "trace.json"))
+    set_tracer(tracer)
+    try:
+        nr.run(
+            task=task_desired_state,
+            validations={"all": {"system": {"image": "16.9"}}},
+            task_template=task_template,
+        )
+        actual_state_engine(False, "ios", {"system": {"image": [{"version": "16.9"}]}})
+    finally:
+        set_tracer(None)
+    spans = tracer.spans()
+    assert [x["name"] for x in spans] == [
+        "task_desired_state",
+        "actual_state_engine",
+    ], err_msg
+    assert spans[0]["args"] == {"host": "TEST_HOST"}, err_msg
+    assert spans[0]["tid"] != spans[1]["tid"], err_msg
+    trace = json_codec.loads(Path(tracer.export()).read_bytes())
+    assert {x["ph"] for x in trace["traceEvents"]} == {"M", "X"}, err_msg
+    # Nothing is recorded once reset to the no-op tracer
+    actual_state_engine(False, "ios", {"system": {"image": [{"version": "16.9"}]}})
+    assert len(tracer.spans()) == 2, err_msg
+    assert type(get_tracer()).__name__ == "NoopTracer", err_msg
+
+
+# CMD_STATS: Tests command statistics are per platform, have the correct percentiles and are ranked slowest first
+def test_command_stats(capsys: pytest.CaptureFixture[str]) -> None:
+    err_msg = "❌ command_stats: Function testing failed"
+    result = AggregatedResult("validate")
+    for idx, platform in enumerate(["nxos", "nxos", "ios"]):
+        name = f"hst{idx}"
+        timings = Timings(platform=platform)
+        for seconds in [0.1, 0.2, 0.3, 0.4, 2.0]:
+            timings.records.append(
+                PhaseTiming("command", seconds, "system", "image", "show ver", 100)
+            )
+        timings.records.append(PhaseTiming("parse", 0.5, command="show ver"))
+        timings.records.append(PhaseTiming("command", 0.1, command="show clock"))
+        result[name] = MultiResult("validate")
+        result[name].append(Result(host=Host(name), timings=timings))
+    stats = command_stats(result)
+    assert [(x.platform, x.command) for x in stats] == [
+        ("nxos", "show ver"),
+        ("ios", "show ver"),
+        ("nxos", "show clock"),
+        ("ios", "show clock"),
+    ], err_msg
+    nxos_ver = stats[0]
+    assert nxos_ver.count == 10, err_msg
+    assert (nxos_ver.p50, nxos_ver.p95, nxos_ver.max) == (0.3, 2.0, 2.0), err_msg
+    assert nxos_ver.bytes == 1000, err_msg
+    assert nxos_ver.parse_seconds == 1.0, err_msg
+    print_command_report(result, top=1)
+    output = capsys.readouterr().out
+    assert "Slowest commands: nxos" in output, err_msg
+    assert "show clock" not in output, err_msg
+
+
+# METRICS: Tests counters and histograms are exposed in Prometheus text format, written to file and served over HTTP
+def test_metrics(tmp_path: Path) -> None:
+    err_msg = "❌ metrics: Function testing failed"
+    metrics = Metrics(buckets=(0.1, 1.0))
+    timings = Timings(platform="cisco_nxos")
+    timings.records.append(PhaseTiming("command", 0.5, command="show ver", size=300))
+    timings.records.append(PhaseTiming("command", 2.0, command="show ip route"))
+    report = {
+        "system.image": {"complies": True},
+        "route_table.route": {"complies": False},
+        "fhr": {"skipped": True, "reason": "NotImplemented"},
+        "complies": False,
+        "skipped": ["fhr"],
+    }
+    metrics.observe_host(timings, report, failed=True)
+    output = metrics.exposition()
+    for line in [
+        "# TYPE nornir_validate_command_seconds histogram",
+        'nornir_validate_hosts_total{status="failed"} 1',
+        'nornir_validate_subfeatures_total{result="failed"} 1',
+        'nornir_validate_subfeatures_total{result="passed"} 1',
+        'nornir_validate_subfeatures_total{result="skipped"} 1',
+        'nornir_validate_command_bytes_total{platform="cisco_nxos"} 300',
+        'nornir_validate_command_seconds_bucket{platform="cisco_nxos",le="0.1"} 0',
+        'nornir_validate_command_seconds_bucket{platform="cisco_nxos",le="1"} 1',
+        'nornir_validate_command_seconds_bucket{platform="cisco_nxos",le="+Inf"} 2',
+        'nornir_validate_command_seconds_sum{platform="cisco_nxos"} 2.5',
+        'nornir_validate_phase_seconds_count{phase="command"} 2',
+    ]:
+        assert line in output.splitlines(), err_msg
+    metrics_file = tmp_path / "nornir_validate.prom"
+    metrics.write(str(metrics_file))
+    assert metrics_file.read_text() == output, err_msg
+    server = metrics.serve(port=0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as resp:
+            assert resp.read().decode() == output, err_msg
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# MEM_PROFILE: Tests memory snapshots per phase, retained sizes per feature and that tracemalloc is stopped
+def test_memory_profile() -> None:
+    err_msg = "❌ memory_profile: Function testing failed"
+    shared = "x" * 1000
+    assert deep_sizeof([shared, shared]) == sys.getsizeof(
+        [shared, shared]
+    ) + sys.getsizeof(shared), err_msg
+    profiler = MemoryProfiler(top=5)
+    assert tracemalloc.is_tracing(), err_msg
+    cmd_output = {"system": {"image": [{"os": "9.3(5)"}] * 100}}
+    profiler.checkpoint("collect")
+    profiler.retain("cmd_output", cmd_output)
+    actual_state = actual_state_engine(False, "nxos", cmd_output)
+    profiler.checkpoint("format")
+    profiler.retain("actual_state", actual_state)
+    report = profiler.stop()
+    assert not tracemalloc.is_tracing(), err_msg
+    assert [x["phase"] for x in report["phases"]] == ["collect", "format"], err_msg
+    assert all(len(x["top"]) <= 5 for x in report["phases"]), err_msg
+    assert report["phases"][1]["peak"] >= report["phases"][1]["current"], err_msg
+    assert set(report["retained"]["actual_state"]) == {"system"}, err_msg
+    assert report["retained"]["cmd_output"]["system"] == deep_sizeof(
+        cmd_output["system"]
+    ), err_msg
+    # Frees are bigger than the phase's allocations but don't push the allocators out of the top
+    profiler = MemoryProfiler(top=1)
+    freed = ["x" * 100 for _ in range(10000)]
+    profiler.checkpoint("collect")
+    del freed
+    allocated = ["y" * 100 for _ in range(100)]
+    profiler.checkpoint("format")
+    report = profiler.stop()
+    assert len(allocated) == 100, err_msg
+    assert len(report["phases"][1]["top"]) == 1, err_msg
+    assert report["phases"][1]["top"][0][1] > 0, err_msg
+
+
+# EVALUATE: Tests sub-features evaluated against the desired state (ACL flows), first match wins with an implicit deny
+def test_evaluate_actual_state() -> None:
+    err_msg = "❌ evaluate_actual_state: Function testing failed"
+    assert FeatureRegistry().get_evaluator("interface") is None, err_msg
+    acl = [
+        {"acl_name": "DATA", "line_num": ""},
+        {
+            "acl_name": "DATA",
+            "line_num": "10",
+            "action": "deny",
+            "protocol": "tcp",
+            "src_host": "10.1.1.1",
+            "dst_any": "any",
+            "dst_port_match": "eq",
+            "dst_port": "telnet",
+        },
+        {
+            "acl_name": "DATA",
+            "line_num": "20",
+            "action": "permit",
+            "protocol": "tcp",
+            "src_network": "10.1.0.0",
+            "src_wildcard": "0.0.255.255",
+            "dst_network": "10.2.0.0",
+            "dst_wildcard": "0.0.255.255",
+            "dst_port_match": "range",
+            "dst_port_range_start": "22",
+            "dst_port_range_end": "23",
+        },
+        {
+            "acl_name": "DATA",
+            "line_num": "30",
+            "action": "permit",
+            "protocol": "udp",
+            "src_any": "any",
+            "src_port_match": "gt",
+            "src_port": "1023",
+            "dst_network": "10.0.0.5",
+            "dst_wildcard": "0.255.0.0",
+        },
+    ]
+    flows = {
+        "10.1.1.1 10.2.0.5 tcp/22": "permit",
+        "10.1.1.1 10.2.0.5 tcp/23": "deny",
+        "10.1.9.9 10.2.0.5 tcp/23": "permit",
+        "10.1.9.9 10.3.0.5 tcp/22": "deny",
+        "10.9.9.9:2000 10.77.0.5 udp/53": "permit",
+        "10.9.9.9:53 10.77.0.5 udp/53": "deny",
+        "10.9.9.9 10.77.0.5 udp/53": "deny",
+        "10.1.1.1 10.2.0.5 ip": "deny",
+    }
+    cmd_output = {"system": {"acl_flow": acl}}
+    desired_state = {"system": {"acl_flow": {"DATA": flows}}}
+    actual_state = actual_state_engine(False, "ios", cmd_output, None, desired_state)
+    assert actual_state["system"]["acl_flow"] == {"DATA": flows}, err_msg
+    # Without the desired state each ACE gets a representative flow
+    assert actual_state_engine(False, "ios", cmd_output)["system"]["acl_flow"] == {
+        "DATA": {
+            "10.1.1.1 0.0.0.0 tcp/23": "deny",
+            "10.1.0.0 10.2.0.0 tcp/22": "permit",
+            "0.0.0.0:1024 10.0.0.5 udp": "permit",
+        }
+    }, err_msg
+    # Malformed flows are invalid, the other flows are still evaluated
+    bad_flows = {"10.1.1.1 tcp/22": "deny", "10.1.1.1 10.2.0.5 tcp/https2": "deny"}
+    desired_state = {"system": {"acl_flow": {"DATA": {**bad_flows, **flows}}}}
+    actual_state = actual_state_engine(False, "ios", cmd_output, None, desired_state)
+    assert actual_state["system"]["acl_flow"] == {
+        "DATA": {**dict.fromkeys(bad_flows, "invalid"), **flows}
+    }, err_msg
+    # ACEs that can't be fully compiled (object-group, established) aren't skipped, a flow that may match them is unknown
+    acl = [
+        {
+            "acl_name": "OBJ",
+            "line_num": "10",
+            "action": "deny",
+            "protocol": "tcp",
+            "src_network_object_group_name": "BLOCKED",
+            "dst_any": "any",
+        },
+        {
+            "acl_name": "OBJ",
+            "line_num": "20",
+            "action": "permit",
+            "protocol": "tcp",
+            "src_any": "any",
+            "dst_host": "10.2.2.2",
+            "tcp_flag": "established",
+        },
+        {
+            "acl_name": "OBJ",
+            "line_num": "30",
+            "action": "permit",
+            "protocol": "ip",
+            "src_any": "any",
+            "dst_any": "any",
+        },
+    ]
+    flows = {
+        "10.1.1.1 10.2.2.2 tcp/22": "unknown",
+        "10.1.1.1 10.2.2.2 udp/53": "permit",
+    }
+    cmd_output = {"system": {"acl_flow": acl}}
+    desired_state = {"system": {"acl_flow": {"OBJ": flows}}}
+    actual_state = actual_state_engine(False, "ios", cmd_output, None, desired_state)
+    assert actual_state["system"]["acl_flow"] == {"OBJ": flows}, err_msg
+    assert actual_state_engine(False, "ios", cmd_output)["system"]["acl_flow"] == {
+        "OBJ": {"0.0.0.0 0.0.0.0 ip": "permit"}
+    }, err_msg
+
+
+# ROUTE_TABLE: Tests routes (IPv4 masks and IPv6) are built into the route table with ECMP next-hops as a list
+def test_route_table() -> None:
+    err_msg = "❌ route_table: Function testing failed"
+    routes = [
+        ("10.1.0.0", "255.255.0.0", "10.0.0.1", "O"),
+        ("10.1.0.0", "255.255.0.0", "10.0.0.2", "O"),
+        ("10.2.0.0", "255.255.255.0", "10.0.0.1", "O"),
+        ("10.2.0.0", "255.255.255.0", "10.0.0.1", "O"),
+        ("2001:db8:0:0::", "64", "fe80::1", "S"),
+        ("2001:db8:1::", "64", "", "C"),
+    ]
+    cmd_output = {
+        "route_table": {
+            "route": [
+                dict(
+                    network=net,
+                    netmask=mask,
+                    nexthopip=nh,
+                    nexthopif="inside",
+                    protocol=rtype,
+                )
+                for net, mask, nh, rtype in routes
+            ]
+        }
+    }
+    actual_state = actual_state_engine(False, "asa", cmd_output)
+    assert actual_state["route_table"]["route"] == {
+        "global": {
+            "10.1.0.0/16": {"nh": ["10.0.0.1", "10.0.0.2"], "rtype": "O"},
+            "10.2.0.0/24": {"nh": "10.0.0.1", "rtype": "O"},
+            "2001:db8::/64": {"nh": "fe80::1", "rtype": "S"},
+            "2001:db8:1::/64": {"nh": "inside", "rtype": "C"},
+        }
+    }, err_msg
+
+
+# ROUTE_LOOKUP: Tests destinations (address or prefix, IPv4 or IPv6) are matched to the longest covering route per VRF
+def test_route_lookup() -> None:
+    err_msg = "❌ route_lookup: Function testing failed"
+    routes = [
+        ("", "0.0.0.0", "0", "10.0.0.254", "S"),
+        ("", "10.0.0.0", "8", "10.0.0.1", "O"),
+        ("", "10.1.0.0", "16", "10.0.0.2", "B"),
+        ("", "10.1.0.0", "16", "10.0.0.3", "B"),
+        ("", "10.1.1.0", "24", "", "C"),
+        ("", "2001:db8::", "32", "fe80::1", "S"),
+        ("", "2001:db8:1::", "48", "fe80::2", "O"),
+        ("BLU", "10.1.1.0", "24", "10.9.9.9", "O"),
+    ]
+    cmd_output = {
+        "route_table": {
+            "route_lookup": [
+                dict(
+                    vrf=vrf,
+                    network=net,
+                    prefix_length=pfxlen,
+                    nexthop_ip=nh,
+                    nexthop_if="Vlan10",
+                    protocol=rtype,
+                )
+                for vrf, net, pfxlen, nh, rtype in routes
+            ]
+        }
+    }
+    desired_state = {
+        "route_table": {
+            "route_lookup": {
+                "global": {
+                    "10.1.1.1": {"nh": "Vlan10"},
+                    "10.1.2.1": {},
+                    "10.1.0.0/20": {},
+                    "10.2.0.0/16": {},
+                    "192.168.1.1": {},
+                    "2001:db8:1:2::1": {},
+                    "2001:db8:2::/64": {},
+                    "2001:db9::1": {},
+                },
+                "BLU": {"10.1.1.1": {}, "10.1.2.1": {}},
+                "RED": {"10.1.1.1": {}},
+            }
+        }
+    }
+    actual_state = actual_state_engine(False, "ios", cmd_output, None, desired_state)
+    assert actual_state["route_table"]["route_lookup"] == {
+        "global": {
+            "10.1.1.1": {"route": "10.1.1.0/24", "nh": "Vlan10", "rtype": "C"},
+            "10.1.2.1": {
+                "route": "10.1.0.0/16",
+                "nh": ["10.0.0.2", "10.0.0.3"],
+                "rtype": "B",
+            },
+            "10.1.0.0/20": {
+                "route": "10.1.0.0/16",
+                "nh": ["10.0.0.2", "10.0.0.3"],
+                "rtype": "B",
+            },
+            "10.2.0.0/16": {"route": "10.0.0.0/8", "nh": "10.0.0.1", "rtype": "O"},
+            "192.168.1.1": {"route": "0.0.0.0/0", "nh": "10.0.0.254", "rtype": "S"},
+            "2001:db8:1:2::1": {
+                "route": "2001:db8:1::/48",
+                "nh": "fe80::2",
+                "rtype": "O",
+            },
+            "2001:db8:2::/64": {
+                "route": "2001:db8::/32",
+                "nh": "fe80::1",
+                "rtype": "S",
+            },
+        },
+        "BLU": {"10.1.1.1": {"route": "10.1.1.0/24", "nh": "10.9.9.9", "rtype": "O"}},
+        "RED": {},
+    }, err_msg
+    # Without the desired state (validation file) there are no destinations to look up
+    actual_state = actual_state_engine(False, "ios", cmd_output)
+    assert actual_state["route_table"]["route_lookup"] == {}, err_msg
+    desired_state = {"route_table": {"route_lookup": {"global": {"10.1.1": {}}}}}
+    with pytest.raises(ValueError, match="Invalid route destination"):
+        actual_state_engine(False, "ios", cmd_output, None, desired_state)
+
+
+# INTF_NAME: Tests short and long interface names have the same canonical name and full names are abbreviated per command
+def test_intf_name() -> None:
+    err_msg = "❌ intf_name: Function testing failed"
+    for intf in [
+        "Gi1/0/1",
+        "GigabitEthernet1/0/1",
+        "gig1/0/1",
+        "GigabitEthernet 1/0/1",
+    ]:
+        assert canonical_intf(intf) == "GigabitEthernet1/0/1", err_msg
+    assert canonical_intf("Te1/0/1") == "TenGigabitEthernet1/0/1", err_msg
+    assert canonical_intf("Po10.100") == "Port-channel10.100", err_msg
+    assert canonical_intf("port-channel10") == "Port-channel10", err_msg
+    assert canonical_intf("Vl10") == canonical_intf("Vlan10"), err_msg
+    assert canonical_intf("mgmt0") == "Management0", err_msg
+    # Unique abbreviations (like the CLI) are expanded, unknown types and names without a number are unchanged
+    assert canonical_intf("Gigabit1/0/1") == "GigabitEthernet1/0/1", err_msg
+    assert canonical_intf("T1/0/1") == "T1/0/1", err_msg
+    assert canonical_intf("inside") == "inside", err_msg
+    assert abbreviate_intf("TenGigabitEthernet1/1", CDP_ABBR) == "Ten1/1", err_msg
+    assert abbreviate_intf("port-channel1", CDP_ABBR) == "Po1", err_msg
+    assert abbreviate_intf("Vlan10", CDP_ABBR) == "Vlan10", err_msg
+
+
+# SPLIT_OUTPUT: Tests output is split into raw or NTC output without copying, mixed output raises an error
+def test_split_output() -> None:
+    err_msg = "❌ split_output: Function testing failed"
+    ntc_output = [{"intf": "Gi1"}, {"intf": "Gi2"}]
+    assert split_output("ios", "x", ntc_output)[1] is ntc_output, err_msg
+    raw_output = ["Total Mac Addresses: 10"]
+    assert split_output("ios", "x", raw_output) == (raw_output, []), err_msg
+    assert split_output("ios", "x", []) == ([], []), err_msg
+    assert split_output("ios", "x", [["json"]]) == ([], []), err_msg
+    assert split_output("ios", "x", [10, "20"], int_as_str=True) == (
+        ["10", "20"],
+        [],
+    ), err_msg
+    for output in [
+        ["x", {"intf": "Gi1"}],
+        [{"intf": "Gi1"}, "x"],
+        [10, "20"],
+        [["json"], "x"],
+    ]:
+        with pytest.raises(ValueError, match="ios x output is malformed"):
+            split_output("ios", "x", output)
+
+
+# FIX_NXOS: Tests a single NXOS JSON row (dict) is returned as a list, as are multiple rows and no table
+def test_fix_nxos() -> None:
+    err_msg = "❌ fix_nxos: Function testing failed"
+    row = {"intf": "Eth1/1"}
+    assert fix_nxos({"TABLE_x": {"ROW_x": row}}, "TABLE_x", "ROW_x") == [row], err_msg
+    rows = [row, {"intf": "Eth1/2"}]
+    assert fix_nxos({"TABLE_x": {"ROW_x": rows}}, "TABLE_x", "ROW_x") == rows, err_msg
+    assert fix_nxos({}, "TABLE_x", "ROW_x") == [], err_msg
+
+
+# COERCE: Tests make_int gives the same result as int() without exceptions and schemas coerce rows in bulk
+def test_coerce() -> None:
+    err_msg = "❌ coerce: Function testing failed"
+    for value in ["10", " 10 ", "-1", "+7", "1_000", "٣", "", "1.5", "1-10", "_1", "x"]:
+        try:
+            expected: int | str = int(value)
+        except ValueError:
+            expected = value
+        assert make_int(value) == expected, err_msg
+        assert type(make_int(value)) is type(expected), err_msg
+    assert make_int(20) == 20, err_msg  # type: ignore[arg-type]
+    schema = RowSchema({"vlan": "int_or_str", "id": "int_or_str"})
+    rows = [{"vlan": "10", "id": "x"}, {"vlan": "20", "other": "7"}]
+    expected_rows = [{"vlan": 10, "id": "x"}, {"vlan": 20, "other": "7"}]
+    coerced = schema.coerce(rows)
+    assert coerced == expected_rows, err_msg
+    # Rows are copied (the output can be shared by sub-features) so are not changed
+    assert rows == [{"vlan": "10", "id": "x"}, {"vlan": "20", "other": "7"}], err_msg
+    # Coercing again doesn't change already converted rows
+    assert schema.coerce(coerced) == expected_rows, err_msg
+
+
+# DECLARED: Tests formatter specs are compiled per OS type and undeclared sub-features or raw output fall back
+def test_declared_formatters() -> None:
+    err_msg = "❌ declared_formatters: Function testing failed"
+    formatters = DeclaredFormatters(
+        {
+            "peer": FormatterSpec(
+                key="peer",
+                fields={
+                    "site": "site_id",
+                    "color": {"ios": "local_color", "viptela": "remote_color"},
+                    "state": "state",
+                },
+                schema=RowSchema({"site_id": "int_or_str"}),
+                actual_only=("state",),
+                transforms={"color": str.upper},
+            ),
+            "stack": FormatterSpec(
+                key="switch",
+                fields={"priority": "priority"},
+                schema=RowSchema({"switch": "int_or_str", "priority": "int_or_str"}),
+                key_format="switch{}",
+            ),
+        }
+    )
+    rows = [
+        {"peer": "1.1.1.1", "site_id": "10", "local_color": "mpls", "state": "up"},
+        {"peer": "1.1.1.1", "site_id": "20", "local_color": "lte", "state": "down"},
+    ]
+    assert formatters.format(False, "ios", "peer", rows) == {
+        "1.1.1.1": {"site": 20, "color": "LTE", "state": "down"}
+    }, err_msg
+    assert formatters.format(True, "ios", "peer", rows) == {
+        "1.1.1.1": {"site": 20, "color": "LTE"}
+    }, err_msg
+    # Rows are not changed by the schema
+    assert rows[0]["site_id"] == "10", err_msg
+    stack = [{"switch": "1", "priority": "15"}, {"switch": "2", "priority": "1"}]
+    assert formatters.format(False, "asa", "stack", stack) == {
+        "switch1": {"priority": 15},
+        "switch2": {"priority": 1},
+    }, err_msg
+    # FALLBACK: OS type without per OS type fields, undeclared sub-feature, raw or empty output
+    assert formatters.format(False, "nxos", "peer", rows) is None, err_msg
+    assert formatters.format(False, "ios", "other", rows) is None, err_msg
+    assert formatters.format(False, "ios", "stack", ["switch 1"]) is None, err_msg
+    assert formatters.format(False, "ios", "stack", []) is None, err_msg
+
+
+# COMPACT: Tests declared sub-features are held as records and only the compared entries are converted to dicts
+def test_record_table() -> None:
+    err_msg = "❌ record_table: Function testing failed"
+    cmd_output = {
+        "wifi": {
+            "ap": [
+                {
+                    "ap_name": "ap1",
+                    "ap_model": "9120",
+                    "ip_address": "10.1.1.1",
+                    "clients": "5",
+                },
+                {
+                    "ap_name": "ap2",
+                    "ap_model": "9130",
+                    "ip_address": "10.1.1.2",
+                    "clients": "0",
+                },
+            ],
+            "client_count": ["Number of Clients................................ 5"],
+        }
+    }
+    expected = actual_state_engine(False, "wlc", cmd_output)
+    actual_state = actual_state_engine(False, "wlc", cmd_output, compact=True)
+    table = actual_state["wifi"]["ap"]
+    assert isinstance(table, RecordTable), err_msg
+    # Raw output sub-features aren't declared so are still dicts
+    assert actual_state["wifi"]["client_count"] == {"total_count": 5}, err_msg
+    assert table == expected["wifi"]["ap"], err_msg
+    assert len(table) == 2, err_msg
+    assert "ap1" in table, err_msg
+    assert "ap3" not in table, err_msg
+    assert table.get("ap2") == {"model": "9130", "ip": "10.1.1.2", "client_count": 0}, (
+        err_msg
+    )
+    assert table.get("ap3") is None, err_msg
+    # MATERIALISE: Only desired entries, strict mode lists the others as extra, lists use all entries
+    assert materialise_actual_state({"ap1": {}, "ap3": {}}, table) == {
+        "ap1": {"model": "9120", "ip": "10.1.1.1", "client_count": 5}
+    }, err_msg
+    assert materialise_actual_state({"_mode": "strict", "ap1": {}}, table) == {
+        "ap1": {"model": "9120", "ip": "10.1.1.1", "client_count": 5},
+        "ap2": None,
+    }, err_msg
+    assert materialise_actual_state({"list": ["ap1"]}, table) == table.as_dict(), (
+        err_msg
+    )
+    assert materialise_actual_state({"ap1": {}}, {"ap1": 1}) == {"ap1": 1}, err_msg
+    # REPORT: Same compliance report as the dict actual state
+    desired_state = {"wifi": {"ap": {"_mode": "strict", "ap1": {"model": "9120"}}}}
+    report = generate_validate_report(desired_state, actual_state, "h", None)
+    expected_ds = {"wifi": {"ap": {"_mode": "strict", "ap1": {"model": "9120"}}}}
+    assert report == generate_validate_report(expected_ds, expected, "h", None), err_msg
+    assert report["report"]["wifi.ap"]["extra"] == ["ap2"], err_msg
+    # SIZE: The records of the compact table are measured (slots) and take less memory than the dicts
+    cmd_output = {
+        "wifi": {
+            "ap": [
+                {
+                    "ap_name": f"ap{idx}",
+                    "ap_model": "9120",
+                    "ip_address": f"10.1.{idx // 250}.{idx % 250}",
+                    "clients": str(idx % 50),
+                }
+                for idx in range(1000)
+            ]
+        }
+    }
+    table = actual_state_engine(False, "wlc", cmd_output, compact=True)["wifi"]["ap"]
+    dict_size = deep_sizeof(actual_state_engine(False, "wlc", cmd_output)["wifi"]["ap"])
+    assert deep_sizeof(table) > deep_sizeof(table.records), err_msg
+    assert deep_sizeof(table) < dict_size, err_msg
+
+
+# WIFI: Tests only the APs in the desired state are formatted and the AP and client counts are aggregated in one pass
+def test_wifi_aggregation() -> None:
+    err_msg = "❌ wifi_aggregation: Function testing failed"
+    aps = [
+        {
+            "ap_name": f"AP-{idx}",
+            "ap_model": model,
+            "ip_address": f"10.1.1.{idx}",
+            "clients": clients,
+        }
+        for idx, (model, clients) in enumerate(
+            [("9120", "5"), ("9120", "3"), ("9130", "0"), ("9130", "N/A")]
+        )
+    ]
+    header = "MAC Address       AP Name           Slot Status        WLAN  Auth"
+    dashes = "----------------- ----------------- ---- ------------- ----- ----"
+    clients = [
+        "Number of Clients................................ 3",
+        header,
+        dashes,
+        "88:c0:8b:58:2e:32 AP-0               1   Associated     31   Yes",
+        "8c:c6:81:f9:8d:ad AP-1               1   Associated     20   Yes",
+        "a0:d8:07:23:d0:b0 AP-0               1   Associated     31   Yes",
+        "",
+        "Error: Invalid WLAN ID 99931 - must be in the range 1-513",
+        "Number of Clients in WLAN........................ 2",
+        "Error: Invalid WLAN ID 99920 - must be in the range 1-513",
+    ]
+    cmd_output = {
+        "wifi": {
+            "ap": aps,
+            "ap_model": aps,
+            "client_count": clients,
+            "wlan_client": clients,
+        }
+    }
+    desired_state = {"wifi": {"ap": {"AP-1": {"model": "9120"}, "AP-9": {}}}}
+    actual_state = actual_state_engine(False, "wlc", cmd_output, None, desired_state)
+    assert actual_state["wifi"]["ap"] == {
+        "AP-1": {"model": "9120", "ip": "10.1.1.1", "client_count": 3}
+    }, err_msg
+    assert actual_state["wifi"]["ap_model"] == {
+        "9120": {"ap_count": 2, "client_count": 8},
+        "9130": {"ap_count": 2, "client_count": 0},
+    }, err_msg
+    # Last WLAN has no count so is not added
+    assert actual_state["wifi"]["client_count"] == {
+        "total_count": 3,
+        "wl31_count": 2,
+    }, err_msg
+    assert actual_state["wifi"]["wlan_client"] == {
+        31: {"client_count": 2},
+        20: {"client_count": 1},
+    }, err_msg
+    # STRICT: Needs all APs to find extra ones, as does no desired state
+    desired_state = {"wifi": {"ap": {"_mode": "strict", "AP-1": {}}}}
+    actual_state = actual_state_engine(False, "wlc", cmd_output, None, desired_state)
+    assert len(actual_state["wifi"]["ap"]) == 4, err_msg
+    assert len(actual_state_engine(False, "wlc", cmd_output)["wifi"]["ap"]) == 4, (
+        err_msg
+    )
+    # Any other _mode is not strict so still only has the named APs
+    desired_state = {"wifi": {"ap": {"_mode": "loose", "AP-1": {}}}}
+    actual_state = actual_state_engine(False, "wlc", cmd_output, None, desired_state)
+    assert list(actual_state["wifi"]["ap"]) == ["AP-1"], err_msg